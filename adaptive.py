@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+WarGames - Adaptive Monte Carlo
+Estimates one metric to a requested precision, playing only as many games
+as that takes
+
+Games are played in sequential batches. After each batch the confidence
+interval is recomputed and the run stops as soon as its full width is
+within the target (or max_games is reached). Two optional variance
+reductions cut the games needed:
+
+* Antithetic variates: games are played in pairs from the same seed, the
+  second through MirroredRandom, which reflects every draw (u -> 1 - u,
+  randint(a, b) -> a + b - k, choice -> the mirror element). A lucky game
+  is paired with an unlucky one and the pair average is the sample.
+* Control variates: every strike hits with a known chance, so
+  hits - chance * strikes has mean exactly zero for each side. Those two
+  counts are regressed out of the metric, removing the noise that comes
+  from the hit rolls alone.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence
+
+from montecarlo import resolve_policy, shard_seed
+from wargames import WOPR, EndReason, GameResult, PLAYER_POLICIES, Rules, World
+
+# Metric name -> value of one finished game, from the player's side
+Metric = Callable[[GameResult, str], float]
+METRICS: Dict[str, Metric] = {
+    "win": lambda result, player: float(result.winner == player),
+    "loss": lambda result, player: float(result.winner is not None and result.winner != player),
+    "mutual": lambda result, player: float(result.reason.value == EndReason.MUTUAL_DESTRUCTION.value),
+    "casualties": lambda result, player: float(sum(result.casualties.values())),
+    "player_casualties": lambda result, player: float(result.casualties[player]),
+    "turns": lambda result, player: float(result.turns),
+}
+PROPORTIONS = {"win", "loss", "mutual"}
+
+class MirroredRandom(random.Random):
+    """The antithetic twin of random.Random: same stream, every draw reflected"""
+    
+    def random(self) -> float:
+        return 1.0 - super().random()
+    
+    def randint(self, a: int, b: int) -> int:
+        return a + b - super().randint(a, b)
+    
+    def choice(self, seq: Sequence):
+        return seq[len(seq) - 1 - super().randint(0, len(seq) - 1)]
+
+class StrikeCounter:
+    """A WOPR event hook that only counts strikes and hits per side"""
+    
+    def __init__(self):
+        self.strikes: Dict[str, int] = {}
+        self.hits: Dict[str, int] = {}
+    
+    def start(self, wopr: WOPR):
+        self.strikes = {country: 0 for country in wopr.cities}
+        self.hits = {country: 0 for country in wopr.cities}
+    
+    def strike(self, wopr: WOPR, attacker: str, target_city, hit: bool):
+        self.strikes[attacker] += 1
+        self.hits[attacker] += hit
+    
+    def action(self, wopr: WOPR, country: str, action: str):
+        pass
+    
+    def tension(self, wopr: WOPR, delta: int):
+        pass
+    
+    def defcon(self, wopr: WOPR):
+        pass
+    
+    def missiles(self, wopr: WOPR, country: str, base: int, count: int):
+        pass
+    
+    def base_offline(self, wopr: WOPR, country: str, base: int):
+        pass
+    
+    def turn(self, wopr: WOPR):
+        pass
+    
+    def end(self, wopr: WOPR, reason: EndReason):
+        pass
+
+def solve_linear(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    """Gaussian elimination for the tiny control-variate normal equations"""
+    size = len(vector)
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(size):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][size] / rows[i][i] for i in range(size)]
+
+class ControlledMean:
+    """Running sums for a mean with optional zero-mean control variates"""
+    
+    def __init__(self, controls: int):
+        self.n = 0
+        self.sy = 0.0
+        self.syy = 0.0
+        self.sc = [0.0] * controls
+        self.syc = [0.0] * controls
+        self.scc = [[0.0] * controls for _ in range(controls)]
+    
+    def add(self, y: float, c: Sequence[float]):
+        self.n += 1
+        self.sy += y
+        self.syy += y * y
+        for i, ci in enumerate(c):
+            self.sc[i] += ci
+            self.syc[i] += y * ci
+            row = self.scc[i]
+            for j, cj in enumerate(c):
+                row[j] += ci * cj
+    
+    def cov(self, s_ab: float, s_a: float, s_b: float) -> float:
+        return (s_ab - s_a * s_b / self.n) / (self.n - 1)
+    
+    def estimate(self):
+        """(mean, variance of one sample after the controls are regressed out)"""
+        mean = self.sy / self.n
+        var_y = max(self.cov(self.syy, self.sy, self.sy), 0.0) if self.n > 1 else 0.0
+        # Only controls that actually varied can be regressed on
+        active = [i for i in range(len(self.sc))
+                  if self.n > 1 and self.cov(self.scc[i][i], self.sc[i], self.sc[i]) > 1e-12]
+        if not active:
+            return mean, var_y
+        cov_cc = [[self.cov(self.scc[i][j], self.sc[i], self.sc[j]) for j in active] for i in active]
+        cov_cy = [self.cov(self.syc[i], self.sc[i], self.sy) for i in active]
+        beta = solve_linear(cov_cc, cov_cy)
+        if beta is None:
+            return mean, var_y
+        # The controls have known mean zero
+        mean -= sum(b * self.sc[i] / self.n for b, i in zip(beta, active))
+        residual = var_y - sum(b * c for b, c in zip(beta, cov_cy))
+        return mean, max(residual, 0.0)
+
+@dataclass
+class Estimate:
+    """Outcome of an adaptive run"""
+    metric: str
+    mean: float
+    half_width: float
+    confidence: float
+    games: int
+    batches: int
+    converged: bool
+    variance_reduction: float  # plain per-game variance / effective per-game variance
+    
+    @property
+    def interval(self):
+        return self.mean - self.half_width, self.mean + self.half_width
+
+class AdaptiveEstimator:
+    """Sequential batches of headless games until the interval is narrow enough"""
+    
+    def __init__(self, metric: str = "win", policy="wopr", player_country: str = "USA",
+                 antithetic: bool = False, control: bool = False, seed: int = 0,
+                 rules: Optional[Rules] = None, world: Optional[World] = None):
+        self.metric = METRICS[metric]
+        self.metric_name = metric
+        self.policy = resolve_policy(policy)
+        self.player_country = player_country
+        self.antithetic = antithetic
+        self.control = control
+        self.seed = seed
+        self.counter = StrikeCounter()
+        self.game = WOPR(random.Random(), world, rules=rules)
+        self.game.events = self.counter
+        self.twin = WOPR(MirroredRandom(), self.game.world, rules=rules)
+        self.twin.events = self.counter
+        self.ai_country = self.game.opponent(player_country)
+        self.sums = ControlledMean(2 if control else 0)
+        self.plain = ControlledMean(0)
+        self.games = 0
+    
+    def play(self, wopr: WOPR):
+        """One game: (metric value, zero-mean controls)"""
+        result = wopr.play_headless(self.policy, self.player_country)
+        self.games += 1
+        y = self.metric(result, self.player_country)
+        self.plain.add(y, ())
+        if not self.control:
+            return y, ()
+        rules = wopr.rules
+        counter = self.counter
+        return y, (counter.hits[self.player_country] - rules.player_hit_chance * counter.strikes[self.player_country],
+                   counter.hits[self.ai_country] - rules.ai_hit_chance * counter.strikes[self.ai_country])
+    
+    def sample(self, index: int):
+        """Add one sample: a single game, or an antithetic pair's average"""
+        seed = shard_seed(self.seed, index)
+        self.game.rng.seed(seed)
+        y, c = self.play(self.game)
+        if self.antithetic:
+            self.twin.rng.seed(seed)
+            y2, c2 = self.play(self.twin)
+            y, c = (y + y2) / 2, tuple((a + b) / 2 for a, b in zip(c, c2))
+        self.sums.add(y, c)
+    
+    def current(self, confidence: float, batches: int, converged: bool = False) -> Estimate:
+        """Estimate from everything played so far"""
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        mean, variance = self.sums.estimate()
+        half_width = z * (variance / self.sums.n) ** 0.5
+        if self.metric_name in PROPORTIONS and self.plain.sy in (0, self.plain.n):
+            # Nothing seen yet: fall back to the rule of three instead of a zero-width interval
+            half_width = max(half_width, 3.0 / self.games)
+        per_game = variance * (2 if self.antithetic else 1)
+        plain = self.plain.estimate()[1]
+        reduction = plain / per_game if per_game > 0 else float("inf") if plain > 0 else 1.0
+        return Estimate(self.metric_name, mean, half_width, confidence, self.games,
+                        batches, converged, reduction)
+    
+    def run(self, width: float, confidence: float = 0.95, batch: int = 1000,
+            max_games: int = 10000000, min_games: int = 2000,
+            progress: Optional[Callable[[Estimate], None]] = None) -> Estimate:
+        """Play batches until the interval's full width is at most `width`"""
+        per_sample = 2 if self.antithetic else 1
+        batches = 0
+        index = 0
+        while True:
+            for _ in range(max(1, min(batch, max_games - self.games) // per_sample)):
+                self.sample(index)
+                index += 1
+            batches += 1
+            estimate = self.current(confidence, batches)
+            if progress is not None:
+                progress(estimate)
+            if self.games >= min_games and 2 * estimate.half_width <= width:
+                estimate.converged = True
+                return estimate
+            if self.games + per_sample > max_games:
+                return estimate
+
+def estimate(metric: str, width: float, policy="wopr", player_country: str = "USA",
+             antithetic: bool = False, control: bool = False, seed: int = 0,
+             confidence: float = 0.95, batch: int = 1000, max_games: int = 10000000,
+             rules: Optional[Rules] = None) -> Estimate:
+    """Estimate a metric to a target confidence-interval width"""
+    estimator = AdaptiveEstimator(metric, policy, player_country, antithetic, control, seed, rules)
+    return estimator.run(width, confidence, batch, max_games)
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Estimate a WOPR metric to a target precision")
+    parser.add_argument("--metric", choices=sorted(METRICS), default="win")
+    parser.add_argument("--width", type=float, required=True,
+                        help="stop when the confidence interval is at most this wide")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    parser.add_argument("--antithetic", action="store_true", help="play mirrored game pairs")
+    parser.add_argument("--control", action="store_true", help="regress out the hit-roll noise")
+    parser.add_argument("--batch", type=int, default=1000, help="games between interval checks")
+    parser.add_argument("--max-games", type=int, default=10000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="print the interval after every batch")
+    args = parser.parse_args()
+    
+    def progress(estimate: Estimate):
+        print(f"  {estimate.games:>10,} GAMES  {estimate.mean:,.6g} +/- {estimate.half_width:,.4g}")
+    
+    start = time.perf_counter()
+    estimator = AdaptiveEstimator(args.metric, args.policy, args.side, args.antithetic,
+                                  args.control, args.seed)
+    result = estimator.run(args.width, args.confidence, args.batch, args.max_games,
+                           progress=progress if args.verbose else None)
+    elapsed = time.perf_counter() - start
+    
+    low, high = result.interval
+    print(f"{args.metric.upper()}: {result.mean:,.6g}  "
+          f"({args.confidence:.0%} CI {low:,.6g} .. {high:,.6g})")
+    print(f"GAMES PLAYED: {result.games:,} IN {result.batches} BATCHES, {elapsed:.1f}s")
+    print(f"VARIANCE REDUCTION: {result.variance_reduction:.2f}x")
+    if not result.converged:
+        print("TARGET WIDTH NOT REACHED BEFORE --max-games")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+WarGames - Salvo Target Allocation
+Spreads a salvo of K warheads over targets to maximize the expected
+strategic value destroyed
+
+A target of value v that needs `hardness` hits is destroyed by n warheads
+of hit chance p with probability P(Binomial(n, p) >= hardness), so every
+extra warhead on the same target is worth less than the one before (for
+hardness 1 the n-th adds v * p * (1 - p)^(n - 1)).
+
+* greedy_allocate keeps one heap entry per target keyed by the gain of its
+  next warhead and hands out warheads one pop at a time. For hardness 1
+  the objective is a sum of concave terms and this greedy is optimal; for
+  harder targets it compares the best average gain over the next
+  `hardness` warheads so a first, individually useless, warhead is still
+  considered.
+* exact_allocate is a dynamic program over (targets, warheads) for small
+  instances, and the reference the greedy is checked against.
+* expected_damage evaluates allocations, vectorized with NumPy when it is
+  installed.
+
+plan_salvo applies this to a live game: WOPR.fire_salvo backs the player's
+PLANNED SALVO command and the "salvo" self-play policy, and salvo_ai_policy
+lets the AI fire salvos too (wargames.py --ai salvo).
+"""
+
+import heapq
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+from wargames import AI_STRIKE_ACTIONS, WOPR, CityView
+
+# Largest targets * warheads^2 the exact solver will take on
+EXACT_LIMIT = 2000000
+
+@dataclass
+class Allocation:
+    """Warheads per target and the expected value they destroy"""
+    counts: List[int]
+    expected_value: float
+    
+    def assignments(self) -> List[Tuple[int, int]]:
+        """(target, warheads) for every target that gets any"""
+        return [(target, count) for target, count in enumerate(self.counts) if count]
+
+def kill_probability(p: float, warheads: int, hardness: int = 1) -> float:
+    """P(at least `hardness` of `warheads` independent shots hit)"""
+    if warheads < hardness:
+        return 0.0
+    if hardness == 1:
+        return 1.0 - (1.0 - p) ** warheads
+    return 1.0 - sum(math.comb(warheads, j) * p ** j * (1.0 - p) ** (warheads - j)
+                     for j in range(hardness))
+
+def expected_damage(values: Sequence[float], probabilities: Sequence[float], counts: Sequence[int],
+                    hardness: Optional[Sequence[int]] = None) -> float:
+    """Expected value destroyed by an allocation"""
+    if np is None:
+        hardness = hardness or [1] * len(values)
+        return sum(v * kill_probability(p, n, k)
+                   for v, p, n, k in zip(values, probabilities, counts, hardness))
+    v = np.asarray(values, dtype=float)
+    p = np.asarray(probabilities, dtype=float)
+    n = np.asarray(counts, dtype=float)
+    if hardness is None:
+        return float((v * (1.0 - (1.0 - p) ** n)).sum())
+    k = np.asarray(hardness)
+    # P(fewer than k hits), summing binomial terms j = 0 .. k-1 for all targets at once
+    miss = np.clip(1.0 - p, 1e-300, None)
+    term = miss ** n
+    below = np.zeros_like(v)
+    for j in range(int(k.max())):
+        below += np.where(j < k, term, 0.0)
+        term = term * np.clip(n - j, 0, None) / (j + 1) * p / miss
+    return float((v * (1.0 - below)).sum())
+
+def _gains(value: float, p: float, hardness: int, have: int, budget: int) -> Tuple[float, int]:
+    """Best average marginal gain over the next 1..hardness warheads, and how many"""
+    base = kill_probability(p, have, hardness)
+    best, best_m = 0.0, 1
+    for m in range(1, min(hardness, budget) + 1):
+        gain = value * (kill_probability(p, have + m, hardness) - base) / m
+        if gain > best:
+            best, best_m = gain, m
+    return best, best_m
+
+def greedy_allocate(values: Sequence[float], probabilities: Sequence[float], missiles: int,
+                    hardness: Optional[Sequence[int]] = None,
+                    max_per_target: Optional[int] = None) -> Allocation:
+    """Heap-based marginal-gain greedy allocation"""
+    counts = [0] * len(values)
+    cap = max_per_target if max_per_target is not None else missiles
+    if hardness is None:
+        # The next warhead on target i is worth value * p * (1 - p)^count
+        heap = [(-v * p, i) for i, (v, p) in enumerate(zip(values, probabilities)) if v > 0 and p > 0]
+        heapq.heapify(heap)
+        left = missiles
+        while left and heap:
+            gain, i = heapq.heappop(heap)
+            counts[i] += 1
+            left -= 1
+            if counts[i] < cap:
+                heapq.heappush(heap, (gain * (1.0 - probabilities[i]), i))
+    else:
+        heap = []
+        for i, (v, p, k) in enumerate(zip(values, probabilities, hardness)):
+            gain, m = _gains(v, p, k, 0, min(missiles, cap))
+            if gain > 0:
+                heap.append((-gain, i, m))
+        heapq.heapify(heap)
+        left = missiles
+        while left and heap:
+            _, i, m = heapq.heappop(heap)
+            if m > left:
+                # The bundle no longer fits; re-rate the target for what is left
+                gain, m = _gains(values[i], probabilities[i], hardness[i], counts[i],
+                                 min(left, cap - counts[i]))
+                if gain > 0:
+                    heapq.heappush(heap, (-gain, i, m))
+                continue
+            counts[i] += m
+            left -= m
+            room = min(left, cap - counts[i])
+            if room > 0:
+                gain, m = _gains(values[i], probabilities[i], hardness[i], counts[i], room)
+                if gain > 0:
+                    heapq.heappush(heap, (-gain, i, m))
+    return Allocation(counts, expected_damage(values, probabilities, counts, hardness))
+
+def exact_allocate(values: Sequence[float], probabilities: Sequence[float], missiles: int,
+                   hardness: Optional[Sequence[int]] = None,
+                   max_per_target: Optional[int] = None) -> Allocation:
+    """Optimal allocation by dynamic programming over targets and warheads used"""
+    targets = len(values)
+    if targets * (missiles + 1) ** 2 > EXACT_LIMIT:
+        raise ValueError(f"{targets} targets x {missiles} warheads is too large to solve exactly")
+    hardness = hardness or [1] * targets
+    cap = min(missiles, max_per_target if max_per_target is not None else missiles)
+    # best[j]: most value from the targets so far using exactly j warheads
+    best = [0.0] + [-math.inf] * missiles
+    choices: List[List[int]] = []
+    for v, p, k in zip(values, probabilities, hardness):
+        worth = [v * kill_probability(p, n, k) for n in range(cap + 1)]
+        row = [0] * (missiles + 1)
+        after = [-math.inf] * (missiles + 1)
+        for j in range(missiles + 1):
+            for n in range(min(j, cap) + 1):
+                total = best[j - n] + worth[n]
+                if total > after[j]:
+                    after[j], row[j] = total, n
+        best = after
+        choices.append(row)
+    j = max(range(missiles + 1), key=lambda used: best[used])
+    counts = [0] * targets
+    for i in range(targets - 1, -1, -1):
+        counts[i] = choices[i][j]
+        j -= counts[i]
+    return Allocation(counts, expected_damage(values, probabilities, counts, hardness))
+
+def allocate(values: Sequence[float], probabilities: Sequence[float], missiles: int,
+             hardness: Optional[Sequence[int]] = None, exact: Optional[bool] = None) -> Allocation:
+    """Greedy where it is optimal or the instance is large, exact otherwise"""
+    if exact is None:
+        exact = hardness is not None and len(values) * (missiles + 1) ** 2 <= EXACT_LIMIT
+    solver = exact_allocate if exact else greedy_allocate
+    return solver(values, probabilities, missiles, hardness)
+
+def plan_salvo(wopr: WOPR, attacker: str, missiles: int) -> List[Tuple[CityView, int]]:
+    """Allocate a salvo over the enemy's intact cities; returns (city, warheads) pairs"""
+    defender = wopr.opponent(attacker)
+    # Only the `missiles` most valuable cities can get a first warhead. Kept in list
+    # order, the greedy breaks ties between them exactly as over every intact city.
+    cities = sorted(wopr.targets[defender].top(missiles), key=lambda city: city.index)
+    rules = wopr.rules
+    p = rules.player_hit_chance if attacker == wopr.player_country else rules.ai_hit_chance
+    plan = allocate([city.strategic_value for city in cities], [p] * len(cities), missiles)
+    return [(cities[target], count) for target, count in plan.assignments()]
+
+def salvo_ai_policy(wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+    """AI policy: WOPR's tension bands, with every strike upgraded to an allocated salvo"""
+    action = wopr.ai_decide()
+    if action in AI_STRIKE_ACTIONS:
+        return "salvo", None
+    return action, None
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Allocate a salvo over random targets")
+    parser.add_argument("--targets", type=int, default=10000)
+    parser.add_argument("--missiles", type=int, default=1000)
+    parser.add_argument("--hardness", type=int, default=1, help="hits needed per target")
+    parser.add_argument("--exact", action="store_true", help="also run the exact solver (small cases)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    values = [rng.randint(1, 10) for _ in range(args.targets)]
+    probabilities = [rng.uniform(0.5, 0.95) for _ in range(args.targets)]
+    hardness = [args.hardness] * args.targets if args.hardness > 1 else None
+    
+    start = time.perf_counter()
+    greedy = greedy_allocate(values, probabilities, args.missiles, hardness)
+    elapsed = time.perf_counter() - start
+    used = len(greedy.assignments())
+    print(f"GREEDY: {greedy.expected_value:,.3f} EXPECTED VALUE, "
+          f"{used:,} TARGETS, {elapsed * 1000:.1f} MS")
+    if args.exact:
+        start = time.perf_counter()
+        exact = exact_allocate(values, probabilities, args.missiles, hardness)
+        elapsed = time.perf_counter() - start
+        print(f"EXACT:  {exact.expected_value:,.3f} EXPECTED VALUE, "
+              f"{len(exact.assignments()):,} TARGETS, {elapsed * 1000:.1f} MS")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+WarGames - Benchmarks
+Times WOPR's hot paths offline and compares them with a saved baseline
+
+Micro-benchmarks cover strike resolution (launch_strike, ai_launch_strike
+and the headless resolve_* calls under them), check_end_conditions,
+adjust_defcon, the status displays and world construction. Macro-benchmarks
+play full headless games on worlds of 10, 1,000 and 100,000 cities per
+side.
+
+Every benchmark is calibrated like timeit.autorange and timed with the
+garbage collector off, as timeit does. Each repeat is followed by a fixed
+pure-Python reference loop, and the benchmark is scored by its median rate
+relative to that loop: shared machines drift by a third or more between
+runs (frequency scaling, noisy neighbours), and the drift cancels out of
+the ratio where it would swamp the raw rate. The baseline file (BASELINE,
+JSON) keeps one relative rate per benchmark plus the allowed slowdown:
+default_threshold, with per-benchmark overrides under "thresholds". A run
+compares itself with the baseline and exits with status 1 when anything is
+slower than that, so it can gate CI:
+
+    python3 benchmarks.py --save          # record this machine's baseline
+    python3 benchmarks.py                 # compare; exit 1 on regression
+    python3 benchmarks.py --filter strike --quick
+
+Rates only compare on the same hardware and Python; record the baseline on
+the machine that runs the checks.
+"""
+
+import gc
+import json
+import os
+import platform
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from renderers import NullRenderer
+from wargames import WOPR, City, GameState, World, wopr_policy
+
+BASELINE = "benchmark-baseline.json"
+# Format 2 gates on median rates relative to the reference loop; format 1 kept best repeats
+BASELINE_FORMAT = 2
+# Fraction a benchmark may slow down before it counts as a regression
+DEFAULT_THRESHOLD = 0.35
+
+# Seconds per timed repeat, and repeats per benchmark
+MIN_TIME = 0.2
+REPEATS = 9
+
+# A setup builds its fixture and returns a step; each call of step is one operation
+Setup = Callable[[], Callable[[], None]]
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Setup
+    unit: str
+    description: str
+
+@dataclass
+class Measurement:
+    name: str
+    unit: str
+    rate: float       # operations per second, median repeat
+    best: float       # operations per second, best repeat
+    relative: float   # median of rate / reference loop rate over the repeats
+    operations: int   # operations per repeat
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+def benchmark(name: str, unit: str = "ops"):
+    """Register a setup function as a benchmark"""
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = Benchmark(name, setup, unit, (setup.__doc__ or "").strip())
+        return setup
+    return register
+
+class ScriptedRenderer(NullRenderer):
+    """Drops output and answers every prompt with the same reply"""
+    
+    def __init__(self, reply: str = "1"):
+        super().__init__()
+        self.reply = reply
+    
+    def read_line(self, prompt: str) -> str:
+        return self.reply
+
+_worlds: Dict[int, World] = {}
+
+def sized_world(cities: int) -> World:
+    """The built-in bases with `cities` cities per side; 10 is the built-in world"""
+    if cities not in _worlds:
+        template = WOPR(renderer=NullRenderer())
+        if cities == len(template.world.sides["USA"].city_names):
+            _worlds[cities] = template.world
+        else:
+            rng = random.Random(cities)
+            records = {}
+            for country, side in template.world.sides.items():
+                lon = (min(side.city_x), max(side.city_x))
+                lat = (min(side.city_y), max(side.city_y))
+                records[country] = [City(f"{country} {i}", rng.randint(50000, 8000000), rng.randint(1, 10),
+                                         coordinates=(rng.randint(*lon), rng.randint(*lat)))
+                                    for i in range(cities)]
+            _worlds[cities] = World.from_records(records, template.create_missile_bases())
+    return _worlds[cities]
+
+def war_in_progress(cities: int = 1000, renderer=None) -> WOPR:
+    """A seeded game between USA (player) and USSR, ready for turns"""
+    wopr = WOPR(random.Random(0), sized_world(cities), renderer or NullRenderer())
+    start_war(wopr)
+    return wopr
+
+def start_war(wopr: WOPR):
+    wopr.reset()
+    wopr.player_country, wopr.ai_country = "USA", "USSR"
+    wopr.state = GameState.SIMULATION
+
+def striking(strike: Callable[[WOPR], None], defender: str, renderer=None) -> Callable[[], None]:
+    """A step running strike, starting a fresh war whenever the defender runs out of cities"""
+    wopr = war_in_progress(renderer=renderer)
+    
+    def step():
+        if not wopr.targets[defender]:
+            start_war(wopr)
+        strike(wopr)
+    return step
+
+@benchmark("strike.resolve_player", "strikes")
+def bench_resolve_player():
+    """resolve_player_strike on the AI's best target (1k cities per side)"""
+    return striking(lambda wopr: wopr.resolve_player_strike("USA", wopr.choose_target("USSR")), "USSR")
+
+@benchmark("strike.resolve_ai", "strikes")
+def bench_resolve_ai():
+    """resolve_ai_strike on the player's best target (1k cities per side)"""
+    return striking(lambda wopr: wopr.resolve_ai_strike(wopr.choose_target("USA")), "USA")
+
+@benchmark("strike.launch_strike", "strikes")
+def bench_launch_strike():
+    """launch_strike with its menu and output, target 1 every time"""
+    return striking(lambda wopr: wopr.launch_strike("USA", "USSR"), "USSR", ScriptedRenderer("1"))
+
+@benchmark("strike.ai_launch_strike", "strikes")
+def bench_ai_launch_strike():
+    """ai_launch_strike with its output"""
+    return striking(lambda wopr: wopr.ai_launch_strike(), "USA")
+
+@benchmark("turn.check_end_conditions", "checks")
+def bench_end_conditions():
+    """check_end_conditions in the middle of a war"""
+    wopr = war_in_progress()
+    for _ in range(300):
+        wopr.resolve_player_strike("USA", wopr.choose_target("USSR"))
+    return wopr.check_end_conditions
+
+@benchmark("turn.adjust_defcon", "updates")
+def bench_adjust_defcon():
+    """adjust_defcon as tension sweeps through every band"""
+    wopr = war_in_progress()
+    tensions = list(range(0, 120, 7))
+    state = {"i": 0}
+    
+    def step():
+        state["i"] = (state["i"] + 1) % len(tensions)
+        wopr.global_tension = tensions[state["i"]]
+        wopr.adjust_defcon()
+    return step
+
+@benchmark("status.display_status", "reports")
+def bench_display_status():
+    """display_status aggregation, output dropped"""
+    wopr = war_in_progress()
+    for _ in range(300):
+        wopr.resolve_ai_strike(wopr.choose_target("USA"))
+    return wopr.display_status
+
+@benchmark("status.detailed_status", "reports")
+def bench_detailed_status():
+    """detailed_status with a few destroyed cities (built-in world), output dropped"""
+    wopr = war_in_progress(10)
+    for _ in range(4):
+        wopr.resolve_player_strike("USA", wopr.choose_target("USSR"))
+    return wopr.detailed_status
+
+@benchmark("world.create", "worlds")
+def bench_world_create():
+    """create_cities and create_missile_bases packed into a World"""
+    wopr = WOPR(renderer=NullRenderer())
+    
+    def step():
+        World.from_records(wopr.create_cities(), wopr.create_missile_bases())
+    return step
+
+@benchmark("world.reset_100k", "resets")
+def bench_world_reset():
+    """reset on a world of 100k cities per side: per-game state copies"""
+    return WOPR(random.Random(0), sized_world(100000), NullRenderer()).reset
+
+def headless_games(cities: int) -> Callable[[], None]:
+    wopr = WOPR(random.Random(0), sized_world(cities), NullRenderer())
+    return lambda: wopr.play_headless(wopr_policy, "USA")
+
+@benchmark("games.10", "games")
+def bench_games_10():
+    """Headless games, wopr policy, 10 cities per side"""
+    return headless_games(10)
+
+@benchmark("games.1k", "games")
+def bench_games_1k():
+    """Headless games, wopr policy, 1,000 cities per side"""
+    return headless_games(1000)
+
+@benchmark("games.100k", "games")
+def bench_games_100k():
+    """Headless games, wopr policy, 100,000 cities per side"""
+    return headless_games(100000)
+
+def reference_step():
+    """A fixed interpreter workload that yardsticks the machine's current speed"""
+    table = {}
+    for i in range(200):
+        table[i & 31] = table.get(i & 31, 0) + i * 3
+    return sorted(table.values())
+
+def calibrate(step: Callable[[], None], min_time: float) -> int:
+    """Loops of step that take about min_time"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            step()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10:
+            break
+        loops *= 10 if elapsed < min_time / 100 else 2
+    return max(1, int(loops * min_time / elapsed))
+
+def timed(step: Callable[[], None], loops: int) -> float:
+    """Operations per second over loops calls of step"""
+    start = time.perf_counter()
+    for _ in range(loops):
+        step()
+    return loops / (time.perf_counter() - start)
+
+def measure(bench: Benchmark, min_time: float = MIN_TIME, repeats: int = REPEATS) -> Measurement:
+    """Calibrate a loop count that runs for about min_time, then time repeats of it"""
+    step = bench.setup()
+    loops = calibrate(step, min_time)
+    reference_loops = calibrate(reference_step, min_time / 4)
+    rates, relative = [], []
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            rate = timed(step, loops)
+            rates.append(rate)
+            relative.append(rate / timed(reference_step, reference_loops))
+    finally:
+        if collecting:
+            gc.enable()
+    rates.sort()
+    relative.sort()
+    return Measurement(bench.name, bench.unit, rates[len(rates) // 2], rates[-1],
+                       relative[len(relative) // 2], loops)
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor(),
+    }
+
+def load_baseline(path: str) -> Optional[dict]:
+    """The saved baseline, or None if there is none in the current format"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        baseline = json.load(handle)
+    if baseline.get("format") != BASELINE_FORMAT:
+        print(f"IGNORING {path}: FORMAT {baseline.get('format')}, RECORD A NEW ONE WITH --save\n")
+        return None
+    return baseline
+
+def save_baseline(path: str, results: List[Measurement], previous: Optional[dict],
+                  threshold: Optional[float]):
+    """Write (or update) the baseline, keeping any thresholds already set"""
+    baseline = previous or {"format": BASELINE_FORMAT, "default_threshold": DEFAULT_THRESHOLD,
+                            "thresholds": {}, "results": {}}
+    if threshold is not None:
+        baseline["default_threshold"] = threshold
+    baseline["environment"] = environment()
+    for result in results:
+        baseline["results"][result.name] = {"rate": round(result.rate, 3), "relative": result.relative,
+                                            "unit": result.unit}
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(baseline, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+    os.replace(temporary, path)
+
+def compare(result: Measurement, baseline: Optional[dict], threshold: Optional[float]):
+    """(change from baseline or None, allowed slowdown, regressed?)"""
+    if baseline is None or result.name not in baseline["results"]:
+        return None, threshold, False
+    if threshold is None:
+        threshold = baseline["thresholds"].get(result.name, baseline["default_threshold"])
+    change = result.relative / baseline["results"][result.name]["relative"] - 1.0
+    return change, threshold, change < -threshold
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark WOPR's hot paths against a baseline")
+    parser.add_argument("--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE, metavar="PATH")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="allowed slowdown for every benchmark, e.g. 0.25 (default: the baseline's)")
+    parser.add_argument("--quick", action="store_true", help="shorter, noisier timings")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+    
+    selected = [bench for name, bench in BENCHMARKS.items() if args.filter in name]
+    if args.list:
+        for bench in selected:
+            print(f"{bench.name:<28} {bench.description}")
+        return
+    baseline = load_baseline(args.baseline)
+    min_time, repeats = (MIN_TIME / 4, 5) if args.quick else (MIN_TIME, REPEATS)
+    
+    print(f"{'BENCHMARK':<28} {'RATE':>14} {'UNIT':<10} {'BASELINE':>10} {'LIMIT':>7}  STATUS")
+    results: List[Measurement] = []
+    regressions = 0
+    for bench in selected:
+        result = measure(bench, min_time, repeats)
+        results.append(result)
+        change, threshold, regressed = compare(result, baseline, args.threshold)
+        regressions += regressed
+        versus = f"{change:+.1%}" if change is not None else "-"
+        limit = f"-{threshold:.0%}" if change is not None else "-"
+        status = "REGRESSED" if regressed else "OK" if change is not None else "NEW"
+        print(f"{bench.name:<28} {result.rate:>14,.1f} {bench.unit + '/s':<10} {versus:>10} {limit:>7}  {status}",
+              flush=True)
+    
+    if args.save:
+        save_baseline(args.baseline, results, baseline, args.threshold)
+        print(f"\nBASELINE SAVED TO {args.baseline}")
+    elif regressions:
+        print(f"\n{regressions} BENCHMARK(S) SLOWER THAN THE BASELINE ALLOWS")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
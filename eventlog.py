@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+WarGames - Event Log
+Append-only binary record of every state change, and a replayer that
+rebuilds a WOPR at any turn of any logged game
+
+Set wopr.events to an EventWriter and the engine reports each strike (with
+target, hit and radiation), action, tension delta, DEFCON change, missile
+expenditure, base taken offline, turn and end condition. Records are a few bytes each:
+
+    kind u8, turn u16, then a kind-specific payload (little-endian)
+
+A log file starts with a magic string and a JSON header naming the sides.
+Games follow one after another, each opening with a START record. Every
+`keyframe_every` turns a KEYFRAME record holds a full packed GameSnapshot,
+so seeking to a turn restores the nearest keyframe and replays only the
+events after it. A game that does not begin from a fresh reset (WOPR.run's
+"play again" carries on in the last game's world) has a keyframe right
+after its START, so it replays from where it really began. The writer buffers at most `buffer_size` bytes and streams
+the offset of each game to a sidecar ".idx" file, so memory stays flat no
+matter how many games are logged.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections import namedtuple
+from typing import Iterator, List, Optional, Tuple
+
+from wargames import AI_ACTION_MESSAGES, WOPR, EndReason, GameResult, GameSnapshot, GameState, World
+
+LOG_MAGIC = b"WOPRLOG1"
+
+# Record kinds
+START, ACTION, STRIKE, TENSION, DEFCON, MISSILES, TURN, END, KEYFRAME, OFFLINE = range(1, 11)
+
+# Every record starts with kind u8 and turn u16
+RECORDS = {
+    START: struct.Struct("<BHB"),        # player side
+    ACTION: struct.Struct("<BHBB"),      # side, action code
+    STRIKE: struct.Struct("<BHBIBI"),    # attacker side, city index, hit, radiation
+    TENSION: struct.Struct("<BHi"),      # delta
+    DEFCON: struct.Struct("<BHB"),       # new level
+    MISSILES: struct.Struct("<BHBIH"),   # side, base index, count
+    TURN: struct.Struct("<BH"),          # turn in the header is the new turn
+    END: struct.Struct("<BHB"),          # end reason code
+    KEYFRAME: struct.Struct("<BHI"),     # snapshot length, then the snapshot
+    OFFLINE: struct.Struct("<BHBI"),     # side, base index
+}
+HEADER = struct.Struct("<BH")
+
+ACTIONS = ("strike", "defend", "negotiate", "surrender", "exit") + tuple(AI_ACTION_MESSAGES)
+REASONS = list(EndReason)
+# Encoded by value so enums from a wargames run as __main__ match too
+REASON_CODES = {reason.value: code for code, reason in enumerate(REASONS)}
+
+Event = namedtuple("Event", "kind turn data")
+
+def pack_snapshot(snapshot: GameSnapshot) -> bytes:
+    """Serialize a snapshot of a known world (countries are implied by the log)"""
+    parts = [struct.pack("<iBH", snapshot.tension, snapshot.defcon, snapshot.turn)]
+    for mask, radiation, missiles, operational in zip(snapshot.destroyed, snapshot.radiation,
+                                                      snapshot.missiles, snapshot.operational):
+        mask_bytes = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+        for blob in (mask_bytes, radiation, missiles, operational):
+            parts.append(struct.pack("<I", len(blob)))
+            parts.append(blob)
+    return b"".join(parts)
+
+def unpack_snapshot(data: bytes, countries: Tuple[str, ...], player_country: str) -> GameSnapshot:
+    """Inverse of pack_snapshot"""
+    tension, defcon, turn = struct.unpack_from("<iBH", data)
+    offset = struct.calcsize("<iBH")
+    fields: List[List[bytes]] = [[], [], [], []]
+    for _ in countries:
+        for column in fields:
+            length = struct.unpack_from("<I", data, offset)[0]
+            column.append(bytes(data[offset + 4:offset + 4 + length]))
+            offset += 4 + length
+    masks, radiation, missiles, operational = fields
+    return GameSnapshot(
+        countries=countries,
+        destroyed=tuple(int.from_bytes(mask, "little") for mask in masks),
+        radiation=tuple(radiation),
+        missiles=tuple(missiles),
+        operational=tuple(operational),
+        tension=tension,
+        defcon=defcon,
+        turn=turn,
+        player_country=player_country,
+    )
+
+class EventWriter:
+    """Streams events from one or more WOPR games to a log file"""
+    
+    def __init__(self, path: str, world: World, keyframe_every: int = 5, buffer_size: int = 1 << 16):
+        self.path = path
+        self.countries = tuple(world.sides)
+        self.side_index = {country: i for i, country in enumerate(self.countries)}
+        self.keyframe_every = keyframe_every
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.handle = open(path, "wb")
+        self.index = open(path + ".idx", "wb")
+        self.games = 0
+        
+        header = json.dumps({
+            "version": 1,
+            "countries": list(self.countries),
+            "cities": [len(world.sides[country].city_names) for country in self.countries],
+            "bases": [len(world.sides[country].base_names) for country in self.countries],
+            "keyframe_every": keyframe_every,
+        }).encode("utf-8")
+        self.handle.write(LOG_MAGIC + struct.pack("<I", len(header)) + header)
+        self.offset = self.handle.tell()
+    
+    def __enter__(self) -> "EventWriter":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def emit(self, kind: int, turn: int, *fields):
+        """Append one record, writing the buffer out when it is full"""
+        self.buffer += RECORDS[kind].pack(kind, min(turn, 0xFFFF), *fields)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered records to disk"""
+        self.handle.write(self.buffer)
+        self.offset += len(self.buffer)
+        self.buffer.clear()
+        self.index.flush()
+        self.handle.flush()
+    
+    def close(self):
+        """Flush and close the log and its index"""
+        if not self.handle.closed:
+            self.flush()
+            self.handle.close()
+            self.index.close()
+    
+    def keyframe(self, wopr: WOPR):
+        """Append the game's full state as a KEYFRAME record"""
+        blob = pack_snapshot(wopr.snapshot())
+        self.emit(KEYFRAME, wopr.turn_count, len(blob))
+        self.buffer += blob
+    
+    @staticmethod
+    def fresh(wopr: WOPR) -> bool:
+        """Whether the game stands as reset() leaves it"""
+        if wopr.turn_count or wopr.global_tension or wopr.defcon_level != 5:
+            return False
+        for country, bases in wopr.missile_bases.items():
+            if wopr.destroyed_cities[country] or bases.missiles != array("q", bases.side.base_missiles) \
+                    or bases.operational != bytearray(bases.side.base_operational):
+                return False
+        return True
+    
+    # Hooks called by WOPR
+    
+    def start(self, wopr: WOPR):
+        self.index.write(struct.pack("<Q", self.offset + len(self.buffer)))
+        self.games += 1
+        self.emit(START, wopr.turn_count, self.side_index[wopr.player_country])
+        if not self.fresh(wopr):
+            self.keyframe(wopr)
+    
+    def action(self, wopr: WOPR, country: str, action: str):
+        self.emit(ACTION, wopr.turn_count, self.side_index[country], ACTIONS.index(action))
+    
+    def strike(self, wopr: WOPR, attacker: str, target_city, hit: bool):
+        self.emit(STRIKE, wopr.turn_count, self.side_index[attacker], target_city.index,
+                  hit, target_city.radiation_level if hit else 0)
+    
+    def tension(self, wopr: WOPR, delta: int):
+        if delta:
+            self.emit(TENSION, wopr.turn_count, delta)
+    
+    def defcon(self, wopr: WOPR):
+        self.emit(DEFCON, wopr.turn_count, wopr.defcon_level)
+    
+    def missiles(self, wopr: WOPR, country: str, base: int, count: int):
+        self.emit(MISSILES, wopr.turn_count, self.side_index[country], base, count)
+    
+    def base_offline(self, wopr: WOPR, country: str, base: int):
+        self.emit(OFFLINE, wopr.turn_count, self.side_index[country], base)
+    
+    def turn(self, wopr: WOPR):
+        self.emit(TURN, wopr.turn_count)
+        if self.keyframe_every and wopr.turn_count % self.keyframe_every == 0:
+            self.keyframe(wopr)
+    
+    def end(self, wopr: WOPR, reason: EndReason):
+        self.emit(END, wopr.turn_count, REASON_CODES[reason.value])
+
+class Replayer:
+    """Reads an event log and rebuilds game states from it"""
+    
+    def __init__(self, path: str, world: Optional[World] = None):
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if bytes(self.data[:len(LOG_MAGIC)]) != LOG_MAGIC:
+            raise ValueError(f"{path} is not a WOPR event log")
+        length = struct.unpack_from("<I", self.data, len(LOG_MAGIC))[0]
+        start = len(LOG_MAGIC) + 4
+        self.header = json.loads(bytes(self.data[start:start + length]))
+        self.body = start + length
+        self.countries = tuple(self.header["countries"])
+        
+        self.wopr = WOPR(world=world)
+        if tuple(self.wopr.world.sides) != self.countries or \
+                [len(self.wopr.cities[country]) for country in self.countries] != self.header["cities"]:
+            raise ValueError(f"{path} was recorded on a different world")
+        self.offsets = self.load_index(path + ".idx")
+    
+    def load_index(self, path: str) -> array:
+        """Game start offsets from the sidecar index, or from a scan if it is missing"""
+        offsets = array("Q")
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                offsets.frombytes(handle.read())
+            # Drop entries for games whose records never reached the log
+            while offsets and offsets[-1] >= len(self.data):
+                offsets.pop()
+            return offsets
+        offset = self.body
+        while offset < len(self.data):
+            kind = self.data[offset]
+            if kind == START:
+                offsets.append(offset)
+            offset = self.skip(offset)
+        return offsets
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def skip(self, offset: int) -> int:
+        """Offset of the record after the one at `offset`"""
+        kind = self.data[offset]
+        record = RECORDS[kind]
+        if kind == KEYFRAME:
+            return offset + record.size + record.unpack_from(self.data, offset)[2]
+        return offset + record.size
+    
+    def span(self, game: int) -> Tuple[int, int]:
+        """Byte range of one game's records"""
+        start = self.offsets[game]
+        end = self.offsets[game + 1] if game + 1 < len(self.offsets) else len(self.data)
+        return start, end
+    
+    def records(self, game: int, start: Optional[int] = None) -> Iterator[Tuple[int, Event]]:
+        """(offset, Event) for each record of a game, optionally from an offset"""
+        offset, end = self.span(game)
+        if start is not None:
+            offset = start
+        data = self.data
+        while offset < end:
+            kind = data[offset]
+            if kind == START and offset != self.offsets[game]:
+                break
+            values = RECORDS[kind].unpack_from(data, offset)
+            if kind == KEYFRAME:
+                blob_start = offset + RECORDS[KEYFRAME].size
+                event = Event(kind, values[1], (data[blob_start:blob_start + values[2]],))
+            else:
+                event = Event(kind, values[1], values[2:])
+            yield offset, event
+            offset = self.skip(offset)
+    
+    def events(self, game: int) -> Iterator[Event]:
+        """Decoded events of one game, in order"""
+        for _, event in self.records(game):
+            yield event
+    
+    def state_at(self, game: int, turn: Optional[int] = None) -> Tuple[WOPR, Optional[EndReason]]:
+        """The game as it stood at the start of `turn` (or at its end when None)
+        
+        Returns the rebuilt WOPR, which is reused between calls, and the end
+        reason if the game was over by then.
+        """
+        wopr = self.wopr
+        data = self.data
+        start, end = self.span(game)
+        player = self.countries[RECORDS[START].unpack_from(data, start)[2]]
+        
+        # A game that began mid-world opens with a keyframe of where it began
+        opening = self.skip(start)
+        resume = opening if opening < end and data[opening] == KEYFRAME else None
+        # Find the last keyframe at or before the requested turn by skipping headers
+        if turn is not None:
+            offset = start
+            while offset < end:
+                kind, at = HEADER.unpack_from(data, offset)
+                if at > turn or (kind == START and offset != start):
+                    break
+                if kind == KEYFRAME:
+                    resume = offset
+                offset = self.skip(offset)
+        
+        wopr.reset()
+        wopr.player_country = player
+        wopr.ai_country = wopr.opponent(player)
+        wopr.state = GameState.SIMULATION
+        if resume is not None:
+            blob_start = resume + RECORDS[KEYFRAME].size
+            length = RECORDS[KEYFRAME].unpack_from(data, resume)[2]
+            wopr.restore(unpack_snapshot(data[blob_start:blob_start + length], self.countries, player))
+        
+        reason = None
+        for _, event in self.records(game, self.skip(resume) if resume is not None else start):
+            if turn is not None and (event.turn > turn or
+                                     (event.turn == turn and event.kind not in (TURN, KEYFRAME))):
+                break
+            reason = self.apply(wopr, event) or reason
+        return wopr, reason
+    
+    def apply(self, wopr: WOPR, event: Event) -> Optional[EndReason]:
+        """Apply one event to a rebuilt game"""
+        kind, turn, data = event
+        if kind == STRIKE:
+            attacker, city, hit, radiation = data
+            if hit:
+                country = wopr.opponent(self.countries[attacker])
+                wopr.destroy_city(country, wopr.cities[country][city], radiation)
+        elif kind == TENSION:
+            wopr.global_tension += data[0]
+        elif kind == DEFCON:
+            wopr.defcon_level = data[0]
+        elif kind == MISSILES:
+            side, base, count = data
+            country = self.countries[side]
+            bases = wopr.missile_bases[country]
+            bases.missiles[base] -= count
+            if bases.operational[base]:
+                wopr.missile_totals[country] -= count
+        elif kind == OFFLINE:
+            side, base = data
+            wopr.disable_base(self.countries[side], base)
+        elif kind == TURN:
+            wopr.turn_count = turn
+        elif kind == END:
+            wopr.state = GameState.GAME_OVER
+            return REASONS[data[0]]
+        return None
+    
+    def result(self, game: int) -> Optional[GameResult]:
+        """The final result of a game, or None if it never finished"""
+        wopr, reason = self.state_at(game)
+        return wopr.result(reason) if reason is not None else None
+
+def describe(event: Event, countries: Tuple[str, ...]) -> str:
+    """One human-readable line for an event"""
+    kind, turn, data = event
+    if kind == START:
+        text = f"{countries[data[0]]} TAKES THE PLAYER SIDE"
+    elif kind == ACTION:
+        text = f"{countries[data[0]]} {ACTIONS[data[1]].upper()}"
+    elif kind == STRIKE:
+        attacker, city, hit, radiation = data
+        text = f"{countries[attacker]} STRIKES CITY {city}: " + \
+            (f"DIRECT HIT, {radiation} RADS" if hit else "INTERCEPTED")
+    elif kind == TENSION:
+        text = f"TENSION {data[0]:+d}"
+    elif kind == DEFCON:
+        text = f"DEFCON {data[0]}"
+    elif kind == MISSILES:
+        text = f"{countries[data[0]]} BASE {data[1]} EXPENDS {data[2]} MISSILES"
+    elif kind == OFFLINE:
+        text = f"{countries[data[0]]} BASE {data[1]} KNOCKED OUT"
+    elif kind == TURN:
+        text = "NEXT TURN"
+    elif kind == END:
+        text = f"END: {REASONS[data[0]].value.upper()}"
+    else:
+        text = f"KEYFRAME ({len(data[0])} BYTES)"
+    return f"[{turn:>3}] {text}"
+
+def main():
+    """Command line entry point"""
+    import argparse
+    import random
+    import time
+    
+    from wargames import PLAYER_POLICIES
+    
+    parser = argparse.ArgumentParser(description="Record and replay WOPR event logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="log headless self-play games")
+    record.add_argument("path")
+    record.add_argument("games", type=int)
+    record.add_argument("--seed", type=int, default=None)
+    record.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr")
+    record.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    record.add_argument("--keyframe-every", type=int, default=5)
+    show = commands.add_parser("show", help="print a game's events, or its state at a turn")
+    show.add_argument("path")
+    show.add_argument("game", type=int)
+    show.add_argument("--turn", type=int, default=None)
+    commands.add_parser("info", help="summarize a log").add_argument("path")
+    args = parser.parse_args()
+    
+    if args.command == "record":
+        wopr = WOPR(random.Random(args.seed))
+        start = time.perf_counter()
+        with EventWriter(args.path, wopr.world, args.keyframe_every) as writer:
+            wopr.events = writer
+            for _ in range(args.games):
+                wopr.play_headless(PLAYER_POLICIES[args.policy], args.side)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(args.path)
+        print(f"LOGGED {args.games:,} GAMES IN {size:,} BYTES ({size / max(args.games, 1):,.0f} PER GAME)")
+        print(f"GAMES PER SECOND: {args.games / elapsed:,.0f}")
+        return
+    
+    replayer = Replayer(args.path)
+    if args.command == "info":
+        start = time.perf_counter()
+        outcomes = {}
+        for game in range(len(replayer)):
+            result = replayer.result(game)
+            key = "UNFINISHED" if result is None else \
+                f"{result.winner} WINS" if result.winner else result.reason.value.upper()
+            outcomes[key] = outcomes.get(key, 0) + 1
+        elapsed = time.perf_counter() - start
+        print(f"GAMES LOGGED: {len(replayer):,}")
+        for outcome, count in sorted(outcomes.items()):
+            print(f"  {outcome}: {count:,}")
+        print(f"GAMES REPLAYED PER SECOND: {len(replayer) / max(elapsed, 1e-9):,.0f}")
+    elif args.turn is None:
+        for event in replayer.events(args.game):
+            print(describe(event, replayer.countries))
+    else:
+        wopr, reason = replayer.state_at(args.game, args.turn)
+        wopr.display_status()
+        if reason is not None:
+            print(f"\nGAME OVER: {reason.value.upper()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+WarGames - Factions
+Plays wars between any number of factions grouped into alliances, from
+two to hundreds, on the same World data as the two-sided game
+
+Every side of a World is a faction. WOPR's tension bands and Rules drive
+each faction's turn, aimed at whichever enemy it is most tense with. The
+engine is built so a turn costs time in proportion to the live factions and
+to what happened, never factions squared or factions times cities:
+
+* Per-faction state (casualties, intact cities, missiles, alliance) lives
+  in arrays indexed by faction number; cities and bases reuse the game's
+  CityTable, BaseTable and TargetIndex.
+* Tension is a symmetric pairwise matrix stored as sparse rows: only pairs
+  that have had an incident, strike or talks are present, and per-turn
+  decay only visits those pairs.
+* Eliminations update running counts of live factions per alliance and of
+  armed factions, so every end condition is an O(1) check.
+
+Each turn every live faction may provoke a rival (an incident that raises
+their tension), as often as not the one it already has a grudge against.
+It then acts on the rival it is most tense with, by that pair's tension:
+
+* above high_tension: strike (if armed, with retaliation_chance), else
+  stand down, lowering the tension by 5
+* above medium_tension: strike (if armed), talk (diplomacy_chance to
+  lower the tension by 10 to 15) or defend, lowering it by 3
+* otherwise: hold, lowering it by 2
+
+A struck faction calls on a couple of its allies, whose tension with the
+attacker rises too.
+"""
+
+import random
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from renderers import Renderer, TerminalRenderer
+from wargames import (AI_HIT_RADIATION, AI_HIT_TENSION, DEFAULT_RULES, City, CityTable, BaseTable,
+                      EndReason, MissileBase, Rules, TargetIndex, World)
+
+# Chance per turn that a live faction provokes a random rival, and the tension it adds
+INCIDENT_CHANCE = 0.3
+INCIDENT_TENSION = (10, 30)
+# Allies a struck faction calls on, and the share of the tension rise they take up
+ALLIES_CALLED = 2
+ALLY_SHARE = 0.5
+# Pair tension kept from one turn to the next; pairs below TENSION_FLOOR are dropped
+TENSION_DECAY = 0.9
+TENSION_FLOOR = 1.0
+# Chance an incident involves the faction's current enemy rather than a random rival
+GRUDGE_CHANCE = 0.5
+# Random rivals tried before an incident is given up (all might be allies)
+RIVAL_TRIES = 4
+
+class TensionMatrix:
+    """Symmetric pairwise tension between factions, stored as sparse rows"""
+    
+    def __init__(self, size: int):
+        self.rows: List[Dict[int, float]] = [{} for _ in range(size)]
+        self.pairs = 0
+        self.peak = 0.0
+    
+    def get(self, a: int, b: int) -> float:
+        return self.rows[a].get(b, 0.0)
+    
+    def add(self, a: int, b: int, delta: float):
+        """Change the tension between a and b; it never drops below zero"""
+        row = self.rows[a]
+        value = max(0.0, row.get(b, 0.0) + delta)
+        if value < TENSION_FLOOR:
+            if b in row:
+                del row[b]
+                del self.rows[b][a]
+                self.pairs -= 1
+            return
+        if b not in row:
+            self.pairs += 1
+        row[b] = value
+        self.rows[b][a] = value
+        self.peak = max(self.peak, value)
+    
+    def decay(self, factor: float, active: Sequence[int]):
+        """Scale every present pair among the active factions, dropping faint ones"""
+        self.peak = 0.0
+        for a in active:
+            row = self.rows[a]
+            for b in [b for b in row if b > a]:
+                value = row[b] * factor
+                if value < TENSION_FLOOR:
+                    del row[b]
+                    del self.rows[b][a]
+                    self.pairs -= 1
+                else:
+                    row[b] = value
+                    self.rows[b][a] = value
+                    self.peak = max(self.peak, value)
+    
+    def forget(self, a: int):
+        """Remove every pair of an eliminated faction"""
+        for b in self.rows[a]:
+            del self.rows[b][a]
+        self.pairs -= len(self.rows[a])
+        self.rows[a] = {}
+    
+    def dense(self) -> List[List[float]]:
+        """The full matrix, e.g. for inspection of a small game"""
+        size = len(self.rows)
+        return [[row.get(b, 0.0) for b in range(size)] for row in self.rows]
+
+@dataclass
+class FactionResult:
+    """Structured outcome of one multi-faction war"""
+    reason: EndReason
+    winner: Optional[str]        # surviving alliance after an elimination
+    turns: int
+    defcon: int
+    survivors: int               # factions with intact cities left
+    casualties: Dict[str, int]
+    cities_destroyed: Dict[str, int]
+
+class FactionGame:
+    """A war between every side of a World, grouped into alliances"""
+    
+    def __init__(self, world: World, alliances: Optional[Dict[str, str]] = None,
+                 rng: Optional[random.Random] = None, rules: Optional[Rules] = None,
+                 renderer: Optional[Renderer] = None):
+        """alliances maps faction name to alliance name; unlisted factions stand alone"""
+        self.world = world
+        self.rng = rng if rng is not None else random.Random()
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.renderer = renderer if renderer is not None else TerminalRenderer()
+        self.names: Tuple[str, ...] = tuple(world.sides)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        alliances = alliances or {}
+        groups = [alliances.get(name, name) for name in self.names]
+        self.alliance_names: List[str] = list(dict.fromkeys(groups))
+        group_index = {group: i for i, group in enumerate(self.alliance_names)}
+        self.alliance = array("i", [group_index[group] for group in groups])
+        self.members: List[List[int]] = [[] for _ in self.alliance_names]
+        for faction, group in enumerate(self.alliance):
+            self.members[group].append(faction)
+        self.reset()
+    
+    def reset(self):
+        """Fresh cities, bases and tension for a new war"""
+        sides = [self.world.sides[name] for name in self.names]
+        count = len(sides)
+        self.turn_count = 0
+        self.defcon_level = 5
+        self.cities = [CityTable(side) for side in sides]
+        self.bases = [BaseTable(side) for side in sides]
+        self.targets = [TargetIndex(cities) for cities in self.cities]
+        self.tension = TensionMatrix(count)
+        self.casualties = array("q", bytes(8 * count))
+        self.destroyed = array("i", bytes(4 * count))
+        self.intact = array("i", [len(cities) for cities in self.cities])
+        self.missiles = array("q", [sum(missiles for missiles, up in zip(bases.missiles, bases.operational) if up)
+                                    for bases in self.bases])
+        self.next_base = array("i", bytes(4 * count))
+        # Live factions in no particular order, with each one's position for O(1) removal
+        self.active = array("i", [i for i in range(count) if self.intact[i]])
+        self.position = array("i", [-1] * count)
+        for slot, faction in enumerate(self.active):
+            self.position[faction] = slot
+        self.alliance_alive = array("i", bytes(4 * len(self.alliance_names)))
+        for faction in self.active:
+            self.alliance_alive[self.alliance[faction]] += 1
+        self.alliances_alive = sum(1 for alive in self.alliance_alive if alive)
+        self.armed = sum(1 for faction in self.active if self.missiles[faction] > 0)
+    
+    def alive(self, faction: int) -> bool:
+        return self.position[faction] >= 0
+    
+    def eliminate(self, faction: int):
+        """Drop a faction with no intact cities from every running count"""
+        slot = self.position[faction]
+        last = self.active.pop()
+        if last != faction:
+            self.active[slot] = last
+            self.position[last] = slot
+        self.position[faction] = -1
+        if self.missiles[faction] > 0:
+            self.armed -= 1
+        group = self.alliance[faction]
+        self.alliance_alive[group] -= 1
+        if not self.alliance_alive[group]:
+            self.alliances_alive -= 1
+        self.tension.forget(faction)
+    
+    def expend_missiles(self, faction: int, count: int):
+        """Take count missiles from the faction's first base that still has any"""
+        bases = self.bases[faction]
+        i = self.next_base[faction]
+        while i < len(bases) and (bases.missiles[i] <= 0 or not bases.operational[i]):
+            i += 1
+        self.next_base[faction] = i
+        if i == len(bases):
+            return
+        count = min(count, bases.missiles[i])
+        bases.missiles[i] -= count
+        before = self.missiles[faction]
+        self.missiles[faction] -= count
+        if before > 0 and self.missiles[faction] <= 0 and self.alive(faction):
+            self.armed -= 1
+    
+    def strike(self, attacker: int, victim: int) -> bool:
+        """One missile at the victim's most valuable city; True on a hit"""
+        city = self.targets[victim].choose(self.rng)
+        if city is None:
+            return False
+        hit = self.rng.random() < self.rules.ai_hit_chance
+        if hit:
+            city.destroyed = True
+            city.radiation_level = self.rng.randint(*AI_HIT_RADIATION)
+            self.targets[victim].discard(city)
+            self.casualties[victim] += city.population
+            self.destroyed[victim] += 1
+            self.intact[victim] -= 1
+            rise = self.rng.randint(*AI_HIT_TENSION)
+            self.tension.add(attacker, victim, rise)
+            # A few allies rather than all of them, so a hit costs the same in any alliance
+            members = self.members[self.alliance[victim]]
+            for _ in range(ALLIES_CALLED if len(members) > 1 else 0):
+                ally = members[self.rng.randrange(len(members))]
+                if ally != victim and self.alive(ally):
+                    self.tension.add(attacker, ally, rise * ALLY_SHARE)
+            if not self.intact[victim]:
+                self.eliminate(victim)
+        self.expend_missiles(attacker, self.rng.randint(1, 3))
+        return hit
+    
+    def incident(self, faction: int):
+        """Provoke the current enemy, or a random rival from another alliance"""
+        rival = self.enemy(faction)
+        if rival is not None and self.rng.random() < GRUDGE_CHANCE:
+            self.tension.add(faction, rival, self.rng.randint(*INCIDENT_TENSION))
+            return
+        group = self.alliance[faction]
+        for _ in range(RIVAL_TRIES):
+            rival = self.active[self.rng.randrange(len(self.active))]
+            if self.alliance[rival] != group:
+                self.tension.add(faction, rival, self.rng.randint(*INCIDENT_TENSION))
+                return
+    
+    def enemy(self, faction: int) -> Optional[int]:
+        """The live rival the faction is most tense with"""
+        group = self.alliance[faction]
+        best, level = None, 0.0
+        for rival, value in self.tension.rows[faction].items():
+            if value > level and self.alliance[rival] != group:
+                best, level = rival, value
+        return best
+    
+    def faction_turn(self, faction: int):
+        """WOPR's tension bands, applied to the faction's hottest rivalry"""
+        rules = self.rules
+        rival = self.enemy(faction)
+        if rival is None:
+            return
+        level = self.tension.get(faction, rival)
+        armed = self.missiles[faction] > 0
+        if level > rules.high_tension:
+            if armed and self.rng.random() < rules.retaliation_chance:
+                self.strike(faction, rival)
+            else:
+                self.tension.add(faction, rival, -5)
+        elif level > rules.medium_tension:
+            action = self.rng.choice(["attack", "defend", "negotiate"])
+            if action == "attack" and armed:
+                self.strike(faction, rival)
+            elif action == "negotiate":
+                if self.rng.random() < rules.diplomacy_chance:
+                    self.tension.add(faction, rival, -self.rng.randint(10, 15))
+            else:
+                self.tension.add(faction, rival, -3)
+        else:
+            self.tension.add(faction, rival, -2)
+    
+    def end_condition(self) -> Optional[EndReason]:
+        """Why the war is over, or None; every check reads a running count"""
+        if self.alliances_alive == 0:
+            return EndReason.MUTUAL_DESTRUCTION
+        if self.alliances_alive == 1:
+            return EndReason.ELIMINATION
+        if self.armed == 0:
+            return EndReason.STALEMATE
+        if self.turn_count >= self.rules.turn_limit:
+            return EndReason.TIME_LIMIT
+        return None
+    
+    def adjust_defcon(self):
+        """DEFCON follows the hottest rivalry anywhere"""
+        self.defcon_level = 5
+        for level, threshold in enumerate(self.rules.defcon_thresholds, 1):
+            if self.tension.peak >= threshold:
+                self.defcon_level = level
+                break
+    
+    def play_turn(self) -> Optional[EndReason]:
+        """Incidents, then every live faction's move, then tension decay"""
+        rng = self.rng
+        for faction in list(self.active):
+            if self.alive(faction) and rng.random() < INCIDENT_CHANCE:
+                self.incident(faction)
+        for faction in list(self.active):
+            if self.alive(faction):
+                self.faction_turn(faction)
+                reason = self.end_condition()
+                if reason is not None and reason is not EndReason.TIME_LIMIT:
+                    return reason
+        self.tension.decay(TENSION_DECAY, self.active)
+        self.adjust_defcon()
+        self.turn_count += 1
+        return self.end_condition()
+    
+    def play(self) -> FactionResult:
+        """Play one war to the end headless"""
+        self.reset()
+        reason = self.end_condition()
+        while reason is None:
+            reason = self.play_turn()
+        return self.result(reason)
+    
+    def result(self, reason: EndReason) -> FactionResult:
+        winner = None
+        if reason is EndReason.ELIMINATION:
+            winner = self.alliance_names[self.alliance[self.active[0]]]
+        return FactionResult(
+            reason=reason,
+            winner=winner,
+            turns=self.turn_count,
+            defcon=self.defcon_level,
+            survivors=len(self.active),
+            casualties=dict(zip(self.names, self.casualties)),
+            cities_destroyed=dict(zip(self.names, self.destroyed)),
+        )
+    
+    def display_status(self, top: int = 10):
+        """Turn summary with the hardest-hit factions"""
+        self.renderer.line(f"\n--- TURN {self.turn_count + 1} ---")
+        self.renderer.line(f"DEFCON LEVEL: {self.defcon_level}")
+        self.renderer.line(f"FACTIONS STANDING: {len(self.active)}/{len(self.names)}  "
+                           f"ALLIANCES STANDING: {self.alliances_alive}/{len(self.alliance_names)}")
+        self.renderer.line(f"HOSTILE PAIRS: {self.tension.pairs:,}  PEAK TENSION: {self.tension.peak:.0f}")
+        worst = sorted(range(len(self.names)), key=lambda i: self.casualties[i], reverse=True)[:top]
+        self.renderer.line("\nCASUALTIES:")
+        for faction in worst:
+            if self.casualties[faction]:
+                self.renderer.line(f"  {self.names[faction]}: {self.casualties[faction]:,}")
+
+def random_world(factions: int, cities: int, bases: int, rng: random.Random) -> World:
+    """A world of identical-sized factions with random cities and stocks"""
+    city_records: Dict[str, List[City]] = {}
+    base_records: Dict[str, List[MissileBase]] = {}
+    for f in range(factions):
+        name = f"FACTION-{f + 1:03d}"
+        city_records[name] = [City(f"{name} CITY {c + 1}", rng.randint(100000, 5000000), rng.randint(1, 10))
+                              for c in range(cities)]
+        base_records[name] = [MissileBase(f"{name} BASE {b + 1}", name, rng.randint(20, 200))
+                              for b in range(bases)]
+    return World.from_records(city_records, base_records)
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play wars between many factions")
+    parser.add_argument("--factions", type=int, default=100)
+    parser.add_argument("--alliances", type=int, default=0,
+                        help="deal the factions round-robin into this many alliances (0: none)")
+    parser.add_argument("--cities", type=int, default=20, help="cities per generated faction")
+    parser.add_argument("--bases", type=int, default=3, help="bases per generated faction")
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file instead")
+    parser.add_argument("--ally", action="append", default=[], metavar="FACTION=ALLIANCE",
+                        help="put a world file's faction in an alliance (repeatable)")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--turn-limit", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    if args.world:
+        from world import load_world
+        world = load_world(args.world)
+    else:
+        world = random_world(args.factions, args.cities, args.bases, rng)
+    alliances = dict(spec.split("=", 1) for spec in args.ally)
+    if args.alliances:
+        for i, name in enumerate(world.sides):
+            alliances.setdefault(name, f"ALLIANCE-{i % args.alliances + 1}")
+    
+    game = FactionGame(world, alliances, rng, Rules(turn_limit=args.turn_limit))
+    outcomes: Dict[str, int] = {}
+    turns = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        result = game.play()
+        turns += result.turns
+        key = f"{result.winner} WINS" if result.winner else result.reason.value.upper()
+        outcomes[key] = outcomes.get(key, 0) + 1
+    elapsed = time.perf_counter() - start
+    
+    print(f"FACTIONS: {len(game.names)}  ALLIANCES: {len(game.alliance_names)}  GAMES: {args.games}")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome}: {count:,}")
+    print(f"MEAN TURNS: {turns / args.games:.1f}  TURN COST: {elapsed / max(turns, 1) * 1e6:,.0f} US")
+    game.display_status()
+
+if __name__ == "__main__":
+    main()
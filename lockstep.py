@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+WarGames - Lockstep Simulator
+Advances a whole batch of headless games at once with NumPy
+
+Each game in the batch lives in a row of struct-of-arrays state (destroyed
+masks, radiation, missiles, tension, DEFCON, turn) and every round applies
+the launch_strike, ai_turn, adjust_defcon and check_end_conditions rules to
+all live rows in one vectorized step. Finished rows are masked out.
+
+NumPy is optional for the rest of the game; only this module needs it.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+from wargames import (AI_HIT_RADIATION, AI_HIT_TENSION, PLAYER_HIT_RADIATION,
+                      PLAYER_HIT_TENSION, TARGET_NOISE, WOPR, EndReason, Rules)
+
+SIDES = ("USA", "USSR")
+REASONS = list(EndReason)
+
+# Player action codes used by the vectorized policies
+STRIKE, DEFEND, NEGOTIATE = 0, 1, 2
+
+def require_numpy():
+    """Fail with a clear message when NumPy is missing"""
+    if np is None:
+        raise RuntimeError("the lockstep simulator requires NumPy (pip install numpy)")
+
+@dataclass
+class LockstepResults:
+    """Per-game outcome columns for a finished batch"""
+    winner: "np.ndarray"            # side index, -1 for no winner
+    reason: "np.ndarray"            # index into REASONS
+    turns: "np.ndarray"
+    defcon: "np.ndarray"
+    tension: "np.ndarray"
+    casualties: "np.ndarray"        # (games, 2) in SIDES order
+    cities_destroyed: "np.ndarray"  # (games, 2) in SIDES order
+    
+    def summary(self) -> Dict[str, int]:
+        """Count game outcomes by winner or end reason, like wargames.summarize"""
+        summary: Dict[str, int] = {}
+        for side, name in enumerate(SIDES):
+            count = int((self.winner == side).sum())
+            if count:
+                summary[f"{name} WINS"] = count
+        for code, reason in enumerate(REASONS):
+            count = int(((self.reason == code) & (self.winner < 0)).sum())
+            if count:
+                summary[reason.value.upper()] = count
+        return summary
+
+class LockstepSimulator:
+    """A batch of WOPR games stored as arrays and played in lockstep"""
+    
+    def __init__(self, games: int, policy: str = "wopr", player_country: str = "USA",
+                 seed: Optional[int] = None, template: Optional[WOPR] = None,
+                 rules: Optional[Rules] = None):
+        require_numpy()
+        template = template if template is not None else WOPR()
+        self.rules = rules if rules is not None else template.rules
+        # adjust_defcon thresholds, ascending for searchsorted
+        self.defcon_steps = sorted(self.rules.defcon_thresholds)
+        self.rng = np.random.default_rng(seed)
+        self.games = games
+        self.policy = VECTOR_POLICIES[policy]
+        self.player = SIDES.index(player_country)
+        self.ai = 1 - self.player
+        
+        # Immutable world columns shared by every game in the batch
+        cities = max(len(template.cities[side]) for side in SIDES)
+        bases = max(len(template.missile_bases[side]) for side in SIDES)
+        self.population = np.zeros((2, cities), dtype=np.int64)
+        self.value = np.full((2, cities), -1, dtype=np.int64)
+        self.present = np.zeros((2, cities), dtype=bool)
+        self.operational = np.zeros((2, bases), dtype=bool)
+        start_missiles = np.zeros((2, bases), dtype=np.int64)
+        for side, name in enumerate(SIDES):
+            for i, city in enumerate(template.cities[name]):
+                self.population[side, i] = city.population
+                self.value[side, i] = city.strategic_value
+                self.present[side, i] = True
+            for i, base in enumerate(template.missile_bases[name]):
+                self.operational[side, i] = base.operational
+                start_missiles[side, i] = base.missiles
+                
+        # Mutable per-game state
+        self.destroyed = np.broadcast_to(~self.present, (games, 2, cities)).copy()
+        self.radiation = np.zeros((games, 2, cities), dtype=np.int32)
+        self.missiles = np.broadcast_to(start_missiles, (games, 2, bases)).copy()
+        self.tension = np.zeros(games, dtype=np.int64)
+        self.defcon = np.full(games, 5, dtype=np.int64)
+        self.turn = np.zeros(games, dtype=np.int64)
+        self.alive = np.ones(games, dtype=bool)
+        self.reason = np.full(games, -1, dtype=np.int64)
+        self.winner = np.full(games, -1, dtype=np.int64)
+        
+    def randint(self, low: int, high: int, size: int) -> "np.ndarray":
+        """Inclusive integer rolls, matching random.randint"""
+        return self.rng.integers(low, high + 1, size)
+        
+    def adjust_defcon(self, games: "np.ndarray"):
+        """Vectorized adjust_defcon for the given game rows"""
+        self.defcon[games] = 5 - np.searchsorted(self.defcon_steps, self.tension[games], side="right")
+        
+    def choose_targets(self, games: "np.ndarray", side: int):
+        """Noisy highest-value intact city per game; returns (games, cities) that have one"""
+        destroyed = self.destroyed[games, side]
+        scores = self.value[side] + self.rng.integers(0, TARGET_NOISE + 1, destroyed.shape)
+        scores[destroyed] = -1
+        has_target = ~destroyed.all(axis=1)
+        return games[has_target], scores[has_target].argmax(axis=1)
+        
+    def strike(self, games: "np.ndarray", side: int, hit_chance: float,
+               radiation: tuple, tension: tuple):
+        """Resolve one strike per game against the given side"""
+        games, targets = self.choose_targets(games, side)
+        hit = self.rng.random(len(games)) < hit_chance
+        hit_games, hit_targets = games[hit], targets[hit]
+        self.destroyed[hit_games, side, hit_targets] = True
+        self.radiation[hit_games, side, hit_targets] = self.randint(*radiation, len(hit_games))
+        self.tension[hit_games] += self.randint(*tension, len(hit_games))
+        self.adjust_defcon(hit_games)
+        return games
+        
+    def player_turn(self, games: "np.ndarray"):
+        """Vectorized player_step for the policy's actions"""
+        actions = self.policy(self, games)
+        
+        strikers = self.strike(games[actions == STRIKE], self.ai, self.rules.player_hit_chance,
+                               PLAYER_HIT_RADIATION, PLAYER_HIT_TENSION)
+        # Expend missiles from the first base that still has any
+        stocked = self.missiles[strikers, self.player] > 0
+        armed = stocked.any(axis=1)
+        strikers = strikers[armed]
+        first_base = stocked[armed].argmax(axis=1)
+        self.missiles[strikers, self.player, first_base] -= self.randint(1, 3, len(strikers))
+        
+        defenders = games[actions == DEFEND]
+        self.tension[defenders] = np.maximum(0, self.tension[defenders] - self.randint(5, 10, len(defenders)))
+        
+        negotiators = games[actions == NEGOTIATE]
+        success = self.rng.random(len(negotiators)) < self.rules.negotiation_chance
+        won, lost = negotiators[success], negotiators[~success]
+        self.tension[won] = np.maximum(0, self.tension[won] - self.randint(20, 30, len(won)))
+        self.tension[lost] += self.randint(5, 10, len(lost))
+        
+    def ai_turn(self, games: "np.ndarray"):
+        """Vectorized ai_step"""
+        tension = self.tension[games]
+        high = tension > self.rules.high_tension
+        medium = ~high & (tension > self.rules.medium_tension)
+        low = ~high & ~medium
+        
+        roll = self.rng.random(len(games))
+        choice = self.rng.integers(0, 3, len(games))
+        attack = (high & (roll < self.rules.retaliation_chance)) | (medium & (choice == 0))
+        posture = high & (roll >= self.rules.retaliation_chance)
+        reinforce = medium & (choice == 1)
+        diplomacy = medium & (choice == 2)
+        
+        self.strike(games[attack], self.player, self.rules.ai_hit_chance,
+                    AI_HIT_RADIATION, AI_HIT_TENSION)
+        
+        rows = games[posture]
+        self.tension[rows] = np.maximum(0, self.tension[rows] - 5)
+        self.tension[games[reinforce]] -= 3
+        rows = games[diplomacy]
+        opened = rows[self.rng.random(len(rows)) < self.rules.diplomacy_chance]
+        self.tension[opened] -= self.randint(10, 15, len(opened))
+        rows = games[low]
+        self.tension[rows] = np.maximum(0, self.tension[rows] - 2)
+        
+    def check_end_conditions(self, games: "np.ndarray"):
+        """Vectorized end_condition; marks finished rows dead"""
+        wiped = self.destroyed[games].all(axis=2)
+        usa, ussr = wiped[:, 0], wiped[:, 1]
+        mutual = usa & ussr
+        eliminated = usa ^ ussr
+        remaining = (self.missiles[games] * self.operational).sum(axis=2)
+        stalemate = ~mutual & ~eliminated & (remaining == 0).all(axis=1)
+        time_limit = ~mutual & ~eliminated & ~stalemate & (self.turn[games] >= self.rules.turn_limit)
+        
+        for mask, reason in ((mutual, EndReason.MUTUAL_DESTRUCTION),
+                             (eliminated, EndReason.ELIMINATION),
+                             (stalemate, EndReason.STALEMATE),
+                             (time_limit, EndReason.TIME_LIMIT)):
+            self.reason[games[mask]] = REASONS.index(reason)
+        self.winner[games[eliminated]] = np.where(usa[eliminated], 1, 0)
+        self.alive[games[mutual | eliminated | stalemate | time_limit]] = False
+        
+    def step(self):
+        """Play one round in every live game"""
+        games = np.flatnonzero(self.alive)
+        self.player_turn(games)
+        self.check_end_conditions(games)
+        
+        games = np.flatnonzero(self.alive)
+        self.ai_turn(games)
+        self.check_end_conditions(games)
+        
+        self.turn[self.alive] += 1
+        
+    def run(self) -> LockstepResults:
+        """Play every game in the batch to completion"""
+        while self.alive.any():
+            self.step()
+        casualties = ((self.destroyed & self.present) * self.population).sum(axis=2)
+        return LockstepResults(
+            winner=self.winner,
+            reason=self.reason,
+            turns=self.turn,
+            defcon=self.defcon,
+            tension=self.tension,
+            casualties=casualties,
+            cities_destroyed=(self.destroyed & self.present).sum(axis=2),
+        )
+
+def wopr_actions(sim: LockstepSimulator, games: "np.ndarray") -> "np.ndarray":
+    """Vectorized wopr_policy"""
+    tension = sim.tension[games]
+    roll = sim.rng.random(len(games))
+    choice = sim.rng.integers(0, 3, len(games))
+    return np.select([tension > sim.rules.high_tension, tension > sim.rules.medium_tension],
+                     [np.where(roll < sim.rules.retaliation_chance, STRIKE, DEFEND), choice],
+                     DEFEND)
+
+def hawk_actions(sim: LockstepSimulator, games: "np.ndarray") -> "np.ndarray":
+    """Vectorized hawk_policy"""
+    return np.full(len(games), STRIKE)
+
+def dove_actions(sim: LockstepSimulator, games: "np.ndarray") -> "np.ndarray":
+    """Vectorized dove_policy"""
+    return np.full(len(games), NEGOTIATE)
+
+VECTOR_POLICIES: Dict[str, Callable[[LockstepSimulator, "np.ndarray"], "np.ndarray"]] = {
+    "wopr": wopr_actions,
+    "hawk": hawk_actions,
+    "dove": dove_actions,
+}
+
+def lockstep(games: int, policy: str = "wopr", player_country: str = "USA",
+             seed: Optional[int] = None, rules: Optional[Rules] = None) -> LockstepResults:
+    """Play a batch of games in lockstep and return their outcome columns"""
+    return LockstepSimulator(games, policy, player_country, seed, rules=rules).run()
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play a batch of WOPR games in NumPy lockstep")
+    parser.add_argument("games", type=int, help="number of games in the batch")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(VECTOR_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=list(SIDES), default="USA")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    results = lockstep(args.games, args.policy, args.side, args.seed)
+    elapsed = time.perf_counter() - start
+    
+    print(f"GAMES PLAYED: {args.games:,}")
+    for outcome, count in sorted(results.summary().items()):
+        print(f"  {outcome}: {count:,} ({count / args.games:.2%})")
+    for side, name in enumerate(SIDES):
+        print(f"MEAN {name} CASUALTIES: {results.casualties[:, side].mean():,.0f}")
+    print(f"MEAN TURNS: {results.turns.mean():.2f}")
+    print(f"GAMES PER SECOND: {args.games / elapsed:,.0f}")
+
+if __name__ == "__main__":
+    main()
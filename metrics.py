@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+WarGames - Metrics
+Opt-in timers and counters for WOPR's turn loop, exported in-process, as a
+Prometheus text file or through the profilers
+
+Metrics.attach(wopr) shadows the instrumented methods of one WOPR (and of
+its renderer) with timing wrappers stored on the instance. Nothing in the
+classes changes, so a WOPR that was never attached runs exactly the code it
+always did and disabled instrumentation costs nothing. detach() removes the
+wrappers again.
+
+For every instrumented method the wrappers record calls, inclusive time,
+self time (minus instrumented callees), the slowest call and the net
+change in allocated memory blocks. Methods are grouped into phases
+(player turn, AI turn, strikes, end checks, rendering, ...) and the strike
+resolvers also count hits and misses. Games are counted as they finish, for
+games per second.
+
+* In process: Metrics.phase_totals(), Metrics.methods, Metrics.as_dict()
+* Prometheus: Metrics.prometheus() / write_prometheus(path), the text
+  exposition format, for a node-exporter textfile collector or a push job
+* Profilers: cprofile() wraps cProfile, and CallProfiler is a lighter
+  sys.setprofile hook that only times functions from this package
+"""
+
+import cProfile
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from wargames import WOPR, PLAYER_POLICIES, self_play
+
+# Phase -> WOPR methods timed under it
+PHASES: Dict[str, Tuple[str, ...]] = {
+    "player_turn": ("player_turn", "player_step"),
+    "ai_turn": ("ai_turn", "ai_step", "ai_choose"),
+    "launch_strike": ("launch_strike", "ai_launch_strike", "resolve_player_strike",
+                      "resolve_ai_strike", "fire_salvo"),
+    "check_end_conditions": ("check_end_conditions", "end_condition"),
+    "status": ("display_status", "detailed_status"),
+    "turn": ("next_turn", "adjust_defcon"),
+    "game": ("play_out", "game_over"),
+}
+# Renderer methods timed as the rendering phase; read_line is its own phase
+# since it mostly waits for the operator
+RENDER_METHODS = ("write", "line", "type", "pause", "flush", "update")
+INPUT_METHODS = ("read_line",)
+# Methods that end a game, counted for games per second
+GAME_METHODS = ("play_out", "game_over")
+# Methods returning True on a hit
+STRIKE_METHODS = ("resolve_player_strike", "resolve_ai_strike")
+
+@dataclass
+class MethodStats:
+    """Accumulated timings of one instrumented method"""
+    phase: str
+    method: str
+    calls: int = 0
+    total_ns: int = 0
+    self_ns: int = 0
+    max_ns: int = 0
+    allocated_blocks: int = 0   # net change in allocated memory blocks, callees included
+
+class Metrics:
+    """Per-phase timers and counters for any number of attached games"""
+    
+    def __init__(self, allocations: bool = True):
+        self.allocations = allocations
+        self.methods: Dict[Tuple[str, str], MethodStats] = {}
+        self.counters: Dict[str, int] = {"games": 0, "strikes_hit": 0, "strikes_missed": 0}
+        self.started = time.perf_counter()
+        # Child-time accumulators of the instrumented calls in progress
+        self._stack: List[List[int]] = []
+        self._attached: List[Tuple[object, Tuple[str, ...]]] = []
+    
+    def stats(self, phase: str, method: str) -> MethodStats:
+        key = (phase, method)
+        if key not in self.methods:
+            self.methods[key] = MethodStats(phase, method)
+        return self.methods[key]
+    
+    def wrap(self, stats: MethodStats, func: Callable,
+             on_result: Optional[Callable[[object], None]] = None) -> Callable:
+        """A timing wrapper around one bound method"""
+        stack = self._stack
+        clock = time.perf_counter_ns
+        blocks = sys.getallocatedblocks if self.allocations else (lambda: 0)
+        
+        def timed(*args, **kwargs):
+            children = [0]
+            stack.append(children)
+            before = blocks()
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stats.allocated_blocks += blocks() - before
+                stack.pop()
+                stats.calls += 1
+                stats.total_ns += elapsed
+                stats.self_ns += elapsed - children[0]
+                if elapsed > stats.max_ns:
+                    stats.max_ns = elapsed
+                if stack:
+                    stack[-1][0] += elapsed
+            if on_result is not None:
+                on_result(result)
+            return result
+        timed.__wrapped__ = func
+        return timed
+    
+    def count_strike(self, hit) -> None:
+        self.counters["strikes_hit" if hit else "strikes_missed"] += 1
+    
+    def count_game(self, result) -> None:
+        self.counters["games"] += 1
+    
+    def instrument(self, target: object, phase_of: Dict[str, str]):
+        """Shadow target's methods with timing wrappers on the instance"""
+        names = []
+        for name, phase in phase_of.items():
+            method = getattr(target, name, None)
+            if method is None:
+                continue
+            on_result = (self.count_strike if name in STRIKE_METHODS
+                         else self.count_game if name in GAME_METHODS else None)
+            setattr(target, name, self.wrap(self.stats(phase, name), method, on_result))
+            names.append(name)
+        self._attached.append((target, tuple(names)))
+    
+    def attach(self, wopr: WOPR) -> WOPR:
+        """Instrument one game and its renderer; returns the game"""
+        self.instrument(wopr, {name: phase for phase, names in PHASES.items() for name in names})
+        renderer_phases = {name: "render" for name in RENDER_METHODS}
+        renderer_phases.update({name: "input" for name in INPUT_METHODS})
+        self.instrument(wopr.renderer, renderer_phases)
+        return wopr
+    
+    def detach(self):
+        """Remove every wrapper, restoring the plain class methods"""
+        for target, names in self._attached:
+            for name in names:
+                target.__dict__.pop(name, None)
+        self._attached = []
+    
+    def reset(self):
+        """Zero every timer and counter"""
+        self.methods = {key: MethodStats(stats.phase, stats.method) for key, stats in self.methods.items()}
+        self.counters = {name: 0 for name in self.counters}
+        self.started = time.perf_counter()
+    
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+    
+    @property
+    def games_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.counters["games"] / elapsed if elapsed > 0 else 0.0
+    
+    def phase_totals(self) -> Dict[str, Tuple[int, float]]:
+        """Phase -> (calls, self seconds); self times add up without double counting"""
+        totals: Dict[str, Tuple[int, float]] = {}
+        for stats in self.methods.values():
+            calls, seconds = totals.get(stats.phase, (0, 0.0))
+            totals[stats.phase] = (calls + stats.calls, seconds + stats.self_ns / 1e9)
+        return totals
+    
+    def as_dict(self) -> Dict[str, object]:
+        """Everything measured, as plain data"""
+        return {
+            "elapsed_seconds": self.elapsed,
+            "games_per_second": self.games_per_second,
+            "counters": dict(self.counters),
+            "phases": {phase: {"calls": calls, "self_seconds": seconds}
+                       for phase, (calls, seconds) in self.phase_totals().items()},
+            "methods": [{"phase": s.phase, "method": s.method, "calls": s.calls,
+                         "seconds": s.total_ns / 1e9, "self_seconds": s.self_ns / 1e9,
+                         "max_seconds": s.max_ns / 1e9, "allocated_blocks": s.allocated_blocks}
+                        for s in self.methods.values()],
+        }
+    
+    def prometheus(self, prefix: str = "wopr") -> str:
+        """The metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        
+        def family(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{text}}} {value}" if text else f"{prefix}_{name} {value}")
+        
+        methods = list(self.methods.values())
+        
+        def per_method(value):
+            return [({"phase": s.phase, "method": s.method}, value(s)) for s in methods]
+        
+        family("calls_total", "counter", "Calls of each instrumented method",
+               per_method(lambda s: s.calls))
+        family("seconds_total", "counter", "Time inside each method, callees included",
+               per_method(lambda s: f"{s.total_ns / 1e9:.9f}"))
+        family("self_seconds_total", "counter", "Time inside each method, instrumented callees excluded",
+               per_method(lambda s: f"{s.self_ns / 1e9:.9f}"))
+        family("max_seconds", "gauge", "Slowest single call of each method",
+               per_method(lambda s: f"{s.max_ns / 1e9:.9f}"))
+        family("allocated_blocks", "gauge", "Net memory blocks allocated inside each method",
+               per_method(lambda s: s.allocated_blocks))
+        family("games_total", "counter", "Games finished", [({}, self.counters["games"])])
+        family("games_per_second", "gauge", "Games finished per wall-clock second since start",
+               [({}, f"{self.games_per_second:.3f}")])
+        family("strikes_total", "counter", "Strikes resolved by outcome",
+               [({"outcome": "hit"}, self.counters["strikes_hit"]),
+                ({"outcome": "miss"}, self.counters["strikes_missed"])])
+        return "\n".join(lines) + "\n"
+    
+    def write_prometheus(self, path: str, prefix: str = "wopr"):
+        """Atomically replace path with the current metrics"""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as handle:
+            handle.write(self.prometheus(prefix))
+        os.replace(temporary, path)
+    
+    def report(self, out=print):
+        """Per-phase and per-method table"""
+        elapsed = self.elapsed
+        out(f"GAMES: {self.counters['games']:,}  ({self.games_per_second:,.0f} PER SECOND)  "
+            f"STRIKES: {self.counters['strikes_hit']:,} HIT, {self.counters['strikes_missed']:,} MISSED")
+        out(f"\n{'PHASE':<22} {'CALLS':>12} {'SELF S':>10} {'SHARE':>7}")
+        for phase, (calls, seconds) in sorted(self.phase_totals().items(), key=lambda item: -item[1][1]):
+            out(f"{phase:<22} {calls:>12,} {seconds:>10.3f} {seconds / elapsed:>7.1%}")
+        out(f"\n{'METHOD':<26} {'CALLS':>12} {'TOTAL S':>10} {'SELF S':>10} {'MEAN US':>9} "
+            f"{'MAX US':>9} {'BLOCKS':>9}")
+        for s in sorted(self.methods.values(), key=lambda s: -s.self_ns):
+            if s.calls:
+                out(f"{s.method:<26} {s.calls:>12,} {s.total_ns / 1e9:>10.3f} {s.self_ns / 1e9:>10.3f} "
+                    f"{s.total_ns / s.calls / 1e3:>9.2f} {s.max_ns / 1e3:>9.1f} {s.allocated_blocks:>9,}")
+
+@contextmanager
+def cprofile(path: Optional[str] = None) -> Iterator[cProfile.Profile]:
+    """Run the block under cProfile, dumping pstats to path if given"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(path)
+
+class CallProfiler:
+    """A sys.setprofile hook timing only the functions defined under root (this module excluded)"""
+    
+    def __init__(self, root: Optional[str] = None):
+        self.root = root if root is not None else os.path.dirname(os.path.abspath(__file__))
+        # code object -> [calls, inclusive ns]
+        self.functions: Dict[object, List[int]] = {}
+        self._starts: List[Tuple[object, int]] = []
+        self._ours: Dict[object, bool] = {}
+    
+    def hook(self, frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            ours = self._ours.get(code)
+            if ours is None:
+                ours = self._ours[code] = (code.co_filename.startswith(self.root)
+                                           and code.co_filename != __file__)
+            if ours:
+                self._starts.append((code, time.perf_counter_ns()))
+        elif event == "return" and self._starts and self._starts[-1][0] is frame.f_code:
+            code, start = self._starts.pop()
+            entry = self.functions.setdefault(code, [0, 0])
+            entry[0] += 1
+            entry[1] += time.perf_counter_ns() - start
+    
+    def __enter__(self) -> "CallProfiler":
+        sys.setprofile(self.hook)
+        return self
+    
+    def __exit__(self, *exc_info):
+        sys.setprofile(None)
+    
+    def top(self, count: int = 20) -> List[Tuple[str, int, float]]:
+        """(function, calls, inclusive seconds), slowest first"""
+        rows = [(f"{os.path.basename(code.co_filename)}:{code.co_name}", calls, ns / 1e9)
+                for code, (calls, ns) in self.functions.items()]
+        return sorted(rows, key=lambda row: -row[2])[:count]
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play instrumented headless games and report where time goes")
+    parser.add_argument("games", type=int, nargs="?", default=10000)
+    parser.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    parser.add_argument("--prometheus", metavar="PATH", help="write the metrics in Prometheus text format")
+    parser.add_argument("--cprofile", metavar="PATH", help="also run under cProfile and dump pstats")
+    parser.add_argument("--calls", action="store_true", help="also time package functions via sys.setprofile")
+    parser.add_argument("--no-allocations", action="store_true", help="skip allocated-block counts")
+    args = parser.parse_args()
+    
+    metrics = Metrics(allocations=not args.no_allocations)
+    profiler = CallProfiler() if args.calls else None
+    with cprofile(args.cprofile) if args.cprofile else _nothing():
+        with profiler if profiler is not None else _nothing():
+            self_play(args.games, PLAYER_POLICIES[args.policy], args.side, metrics=metrics)
+    
+    metrics.report()
+    if profiler is not None:
+        print(f"\n{'FUNCTION':<40} {'CALLS':>12} {'SECONDS':>10}")
+        for name, calls, seconds in profiler.top():
+            print(f"{name:<40} {calls:>12,} {seconds:>10.3f}")
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+        print(f"\nMETRICS WRITTEN TO {args.prometheus}")
+    if args.cprofile:
+        print(f"PROFILE WRITTEN TO {args.cprofile}")
+
+@contextmanager
+def _nothing():
+    yield
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+WarGames - Monte Carlo Runner
+Shards headless WOPR self-play across worker processes
+
+Games are split into fixed-size shards and every shard draws from its own
+random.Random stream derived from the master seed, so the same seed gives
+the same totals no matter how many workers run the shards.
+"""
+
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Union
+
+from wargames import WOPR, GameResult, PLAYER_POLICIES, PlayerPolicy, World
+
+DEFAULT_SHARD_SIZE = 1000
+
+# Worlds already loaded in this process, keyed by path
+_worlds: Dict[str, World] = {}
+
+@dataclass
+class Tally:
+    """Aggregate outcome counters for a batch of games"""
+    games: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    casualties: Dict[str, int] = field(default_factory=lambda: {"USA": 0, "USSR": 0})
+    cities_destroyed: Dict[str, int] = field(default_factory=lambda: {"USA": 0, "USSR": 0})
+    turns: int = 0
+    defcon: Dict[int, int] = field(default_factory=dict)
+    
+    def add(self, result: GameResult):
+        """Count one finished game"""
+        self.games += 1
+        key = f"{result.winner} WINS" if result.winner else result.reason.value.upper()
+        self.outcomes[key] = self.outcomes.get(key, 0) + 1
+        for country in self.casualties:
+            self.casualties[country] += result.casualties[country]
+            self.cities_destroyed[country] += result.cities_destroyed[country]
+        self.turns += result.turns
+        self.defcon[result.defcon] = self.defcon.get(result.defcon, 0) + 1
+        
+    def merge(self, other: "Tally"):
+        """Fold another tally into this one"""
+        self.games += other.games
+        for key, count in other.outcomes.items():
+            self.outcomes[key] = self.outcomes.get(key, 0) + count
+        for country in self.casualties:
+            self.casualties[country] += other.casualties[country]
+            self.cities_destroyed[country] += other.cities_destroyed[country]
+        self.turns += other.turns
+        for level, count in other.defcon.items():
+            self.defcon[level] = self.defcon.get(level, 0) + count
+            
+    def mean_turns(self) -> float:
+        """Average game length in turns"""
+        return self.turns / self.games if self.games else 0.0
+        
+    def mean_casualties(self, country: str) -> float:
+        """Average casualties per game for one side"""
+        return self.casualties[country] / self.games if self.games else 0.0
+
+def shard_seed(seed: int, shard: int) -> int:
+    """Derive an independent seed for one shard from the master seed"""
+    digest = hashlib.sha256(f"{seed}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def resolve_policy(policy: Union[str, PlayerPolicy]) -> PlayerPolicy:
+    """Accept either a registered policy name or a policy function"""
+    if isinstance(policy, str):
+        return PLAYER_POLICIES[policy]
+    return policy
+
+def shared_world(path: Optional[str]) -> Optional[World]:
+    """Load a world file once per process; binary worlds share pages via mmap"""
+    if path is None:
+        return None
+    if path not in _worlds:
+        from world import load_world
+        _worlds[path] = load_world(path)
+    return _worlds[path]
+
+def run_shard(shard: int, games: int, seed: int, policy: Union[str, PlayerPolicy],
+              player_country: str, world_path: Optional[str] = None) -> Tally:
+    """Play one shard of games and return only its tally"""
+    wopr = WOPR(random.Random(shard_seed(seed, shard)), shared_world(world_path))
+    player_policy = resolve_policy(policy)
+    tally = Tally()
+    for _ in range(games):
+        tally.add(wopr.play_headless(player_policy, player_country))
+    return tally
+
+def monte_carlo(games: int, seed: int = 0, workers: Optional[int] = None,
+                policy: Union[str, PlayerPolicy] = "wopr", player_country: str = "USA",
+                shard_size: int = DEFAULT_SHARD_SIZE, world_path: Optional[str] = None) -> Tally:
+    """Play games across a process pool and merge the shard tallies in order"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+        
+    shards = [(index, min(shard_size, games - start))
+              for index, start in enumerate(range(0, games, shard_size))]
+    total = Tally()
+    
+    if workers <= 1 or len(shards) <= 1:
+        for index, count in shards:
+            total.merge(run_shard(index, count, seed, policy, player_country, world_path))
+        return total
+        
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tallies = executor.map(run_shard,
+                               [index for index, _ in shards],
+                               [count for _, count in shards],
+                               [seed] * len(shards),
+                               [policy] * len(shards),
+                               [player_country] * len(shards),
+                               [world_path] * len(shards))
+        for tally in tallies:
+            total.merge(tally)
+    return total
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run WOPR self-play across all cores")
+    parser.add_argument("games", type=int, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                        help="games per shard; part of what the seed reproduces")
+    parser.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    tally = monte_carlo(args.games, args.seed, args.workers, args.policy, args.side,
+                        args.shard_size, args.world)
+    elapsed = time.perf_counter() - start
+    
+    print(f"GAMES PLAYED: {tally.games:,}")
+    for outcome, count in sorted(tally.outcomes.items()):
+        print(f"  {outcome}: {count:,} ({count / tally.games:.2%})")
+    print(f"MEAN USA CASUALTIES: {tally.mean_casualties('USA'):,.0f}")
+    print(f"MEAN USSR CASUALTIES: {tally.mean_casualties('USSR'):,.0f}")
+    print(f"MEAN TURNS: {tally.mean_turns():.2f}")
+    print(f"GAMES PER SECOND: {tally.games / elapsed:,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+WarGames - Renderers
+Where WOPR's text goes, and how fast
+
+WOPR never prints, sleeps or reads the keyboard itself; it hands lines,
+typed text, pauses and prompts to its renderer, and calls update() once a
+turn. Backends:
+
+    terminal  the authentic experience: typed characters and real pauses
+    batched   no delays, one write and flush per turn (good for piping)
+    null      discards everything, for headless runs
+    curses    a dashboard that redraws only the screen cells that changed
+
+Renderers are context managers; curses needs it to restore the terminal.
+"""
+
+import sys
+import time
+from typing import Dict, List, Optional, TextIO, Type
+
+class Renderer:
+    """Output interface used by WOPR; the base class writes straight to stdout"""
+    
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream if stream is not None else sys.stdout
+    
+    def __enter__(self) -> "Renderer":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def write(self, text: str):
+        """Raw text, no newline added"""
+        self.stream.write(text)
+    
+    def line(self, text: str = ""):
+        """One line of output, like print()"""
+        self.write(text + "\n")
+    
+    def type(self, text: str, delay: float = 0.05):
+        """Text typed out character by character"""
+        self.write(text)
+    
+    def pause(self, seconds: float):
+        """A dramatic pause"""
+    
+    def flush(self):
+        """Push buffered output to the screen"""
+        self.stream.flush()
+    
+    def read_line(self, prompt: str) -> str:
+        """Show a prompt and read the operator's reply"""
+        self.write(prompt)
+        self.flush()
+        return input()
+    
+    def update(self, wopr):
+        """Called once per turn with the game, after its state has changed"""
+    
+    def close(self):
+        """Flush and release the output"""
+        self.flush()
+
+class TerminalRenderer(Renderer):
+    """The 1983 terminal: one character at a time and real pauses
+    
+    `pace` scales every delay; 0 keeps the flushes but never sleeps.
+    """
+    
+    def __init__(self, stream: Optional[TextIO] = None, pace: float = 1.0):
+        super().__init__(stream)
+        self.pace = pace
+    
+    def type(self, text: str, delay: float = 0.05):
+        for char in text:
+            self.stream.write(char)
+            self.stream.flush()
+            if self.pace:
+                time.sleep(delay * self.pace)
+    
+    def pause(self, seconds: float):
+        self.stream.flush()
+        if self.pace:
+            time.sleep(seconds * self.pace)
+
+class BatchedRenderer(Renderer):
+    """No delays; output is collected and written with one flush per turn"""
+    
+    def __init__(self, stream: Optional[TextIO] = None):
+        super().__init__(stream)
+        self.buffer: List[str] = []
+    
+    def write(self, text: str):
+        self.buffer.append(text)
+    
+    def flush(self):
+        if self.buffer:
+            self.stream.write("".join(self.buffer))
+            self.buffer.clear()
+        self.stream.flush()
+    
+    def update(self, wopr):
+        self.flush()
+
+class NullRenderer(Renderer):
+    """Drops all output; prompts still read stdin"""
+    
+    def write(self, text: str):
+        pass
+    
+    def flush(self):
+        pass
+
+class CursesRenderer(Renderer):
+    """A live dashboard over a scrolling log, redrawn by changed cells only
+    
+    The top rows show turn, DEFCON, tension and both sides' losses; the rest
+    of the screen is the most recent log output with the prompt at the
+    bottom. Each refresh compares the new screen with the last one drawn
+    and rewrites only the runs of cells that differ.
+    """
+    
+    STATUS_ROWS = 6
+    
+    def __init__(self, pace: float = 0.0):
+        super().__init__()
+        import curses
+        self.curses = curses
+        self.pace = pace
+        self.screen = curses.initscr()
+        curses.noecho()
+        curses.cbreak()
+        self.height, self.width = self.screen.getmaxyx()
+        self.status: List[str] = []
+        self.log: List[str] = [""]
+        self.shown: List[str] = [" " * self.width for _ in range(self.height)]
+        self.cells_drawn = 0
+    
+    def write(self, text: str):
+        lines = text.split("\n")
+        self.log[-1] += lines[0]
+        self.log.extend(lines[1:])
+        # Keep only what can still be seen
+        del self.log[:-self.height]
+    
+    def type(self, text: str, delay: float = 0.05):
+        self.write(text)
+        if self.pace:
+            self.flush()
+            time.sleep(delay * self.pace * len(text))
+    
+    def pause(self, seconds: float):
+        self.flush()
+        if self.pace:
+            time.sleep(seconds * self.pace)
+    
+    def update(self, wopr):
+        countries = sorted(wopr.cities)
+        self.status = [
+            f" W.O.P.R.   TURN {wopr.turn_count + 1:<4} DEFCON {wopr.defcon_level}   "
+            f"TENSION {wopr.global_tension}%",
+            "",
+        ] + [
+            f" {country:<6} CASUALTIES {wopr.side_casualties(country):>14,}   "
+            f"CITIES {len(wopr.targets[country]):>6,}/{len(wopr.cities[country]):<6,}   "
+            f"MISSILES {wopr.missiles_remaining(country):>8,}"
+            for country in countries
+        ]
+        self.status = (self.status + [""] * self.STATUS_ROWS)[:self.STATUS_ROWS - 1] + ["-" * self.width]
+        self.flush()
+    
+    def compose(self) -> List[str]:
+        """The full screen as rows of exactly `width` characters"""
+        log_rows = self.height - len(self.status)
+        rows = self.status + self.log[-log_rows:]
+        rows += [""] * (self.height - len(rows))
+        return [row[:self.width].ljust(self.width) for row in rows]
+    
+    def flush(self):
+        rows = self.compose()
+        for y, (old, new) in enumerate(zip(self.shown, rows)):
+            x = 0
+            while x < self.width:
+                if old[x] == new[x]:
+                    x += 1
+                    continue
+                end = x + 1
+                while end < self.width and old[end] != new[end]:
+                    end += 1
+                # The bottom-right cell cannot be written without scrolling
+                if y == self.height - 1:
+                    end = min(end, self.width - 1)
+                if end > x:
+                    self.screen.addstr(y, x, new[x:end])
+                    self.cells_drawn += end - x
+                x = end + 1
+        self.shown = rows
+        # Leave the cursor at the end of the log, where a prompt waits
+        log_rows = self.height - len(self.status)
+        y = len(self.status) + min(len(self.log), log_rows) - 1
+        self.screen.move(min(y, self.height - 1), min(len(self.log[-1]), self.width - 1))
+        self.screen.refresh()
+    
+    def read_line(self, prompt: str) -> str:
+        self.write(prompt)
+        self.flush()
+        self.curses.echo()
+        try:
+            reply = self.screen.getstr().decode("utf-8", "replace")
+        finally:
+            self.curses.noecho()
+        self.write(reply + "\n")
+        # getstr echoed the reply onto the screen; make our copy agree with it
+        self.shown = self.compose()
+        return reply
+    
+    def close(self):
+        self.curses.nocbreak()
+        self.curses.echo()
+        self.curses.endwin()
+
+RENDERERS: Dict[str, Type[Renderer]] = {
+    "terminal": TerminalRenderer,
+    "batched": BatchedRenderer,
+    "null": NullRenderer,
+    "curses": CursesRenderer,
+}
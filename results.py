@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+WarGames - Results Pipeline
+Streams per-game results to disk and keeps online statistics, in memory
+that does not grow with the number of games
+
+A ResultSink takes GameResults one at a time (the numbers game_over prints:
+casualties and cities destroyed per side, turns, final DEFCON and end
+reason). It writes them out in chunks, either JSONL or a compact columnar
+binary file per chunk, and folds each one into ResultStats:
+
+* Welford running mean and variance for every numeric column
+* exact histograms for the small discrete columns (turns, DEFCON, cities)
+* relative-error quantile sketches (log-spaced buckets) for casualties and
+  game length
+
+Everything is mergeable, so shards can be aggregated in worker processes
+and combined in any order.
+"""
+
+import json
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from wargames import WOPR, EndReason, GameResult
+
+COLUMNS_MAGIC = b"WOPRCOL1"
+REASONS = [reason.value for reason in EndReason]
+
+class RunningStats:
+    """Welford's online mean and variance, plus min and max"""
+    __slots__ = ("count", "mean", "m2", "min", "max")
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, value: float):
+        """Fold in one observation"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def merge(self, other: "RunningStats"):
+        """Combine with another set of observations (Chan et al.)"""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    @property
+    def variance(self) -> float:
+        """Sample variance"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error
+    
+    Positive values land in logarithmic buckets of ratio gamma, so any
+    reported quantile is within `relative_accuracy` of a true sample value.
+    The bucket count depends only on the value range, never on the count.
+    """
+    __slots__ = ("relative_accuracy", "gamma", "log_gamma", "buckets", "zeros", "count")
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+    
+    def add(self, value: float):
+        """Fold in one non-negative observation"""
+        self.count += 1
+        if value <= 0:
+            if value < 0:
+                raise ValueError("QuantileSketch only accepts non-negative values")
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+    
+    def merge(self, other: "QuantileSketch"):
+        """Combine with a sketch of the same accuracy"""
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracy")
+        self.count += other.count
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+    
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile, 0 <= q <= 1"""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+def _count(histogram: Dict, key, amount: int = 1):
+    histogram[key] = histogram.get(key, 0) + amount
+
+@dataclass
+class ResultStats:
+    """Online aggregates over a stream of GameResults"""
+    games: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    defcon: Dict[int, int] = field(default_factory=dict)
+    turns: Dict[int, int] = field(default_factory=dict)
+    cities_destroyed: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    moments: Dict[str, RunningStats] = field(default_factory=dict)
+    sketches: Dict[str, QuantileSketch] = field(default_factory=dict)
+    
+    def moment(self, name: str) -> RunningStats:
+        if name not in self.moments:
+            self.moments[name] = RunningStats()
+        return self.moments[name]
+    
+    def sketch(self, name: str) -> QuantileSketch:
+        if name not in self.sketches:
+            self.sketches[name] = QuantileSketch()
+        return self.sketches[name]
+    
+    def add(self, result: GameResult):
+        """Fold in one finished game"""
+        self.games += 1
+        key = f"{result.winner} WINS" if result.winner else result.reason.value.upper()
+        _count(self.outcomes, key)
+        _count(self.defcon, result.defcon)
+        _count(self.turns, result.turns)
+        self.moment("turns").add(result.turns)
+        self.moment("defcon").add(result.defcon)
+        self.moment("tension").add(result.tension)
+        self.sketch("turns").add(result.turns)
+        total = 0
+        for country, casualties in result.casualties.items():
+            total += casualties
+            self.moment(f"casualties.{country}").add(casualties)
+            self.sketch(f"casualties.{country}").add(casualties)
+            destroyed = result.cities_destroyed[country]
+            self.moment(f"cities_destroyed.{country}").add(destroyed)
+            _count(self.cities_destroyed.setdefault(country, {}), destroyed)
+        self.moment("casualties.total").add(total)
+        self.sketch("casualties.total").add(total)
+    
+    def merge(self, other: "ResultStats"):
+        """Combine with aggregates from another shard"""
+        self.games += other.games
+        for mine, theirs in ((self.outcomes, other.outcomes), (self.defcon, other.defcon),
+                             (self.turns, other.turns)):
+            for key, count in theirs.items():
+                _count(mine, key, count)
+        for country, histogram in other.cities_destroyed.items():
+            for key, count in histogram.items():
+                _count(self.cities_destroyed.setdefault(country, {}), key, count)
+        for name, stats in other.moments.items():
+            self.moment(name).merge(stats)
+        for name, sketch in other.sketches.items():
+            self.sketch(name).merge(sketch)
+
+def result_row(result: GameResult) -> dict:
+    """A GameResult as a flat JSON-ready dict"""
+    row = {
+        "winner": result.winner,
+        "reason": result.reason.value,
+        "turns": result.turns,
+        "defcon": result.defcon,
+        "tension": result.tension,
+    }
+    for country, casualties in result.casualties.items():
+        row[f"casualties_{country}"] = casualties
+    for country, destroyed in result.cities_destroyed.items():
+        row[f"cities_destroyed_{country}"] = destroyed
+    return row
+
+class ResultSink:
+    """Writes results in chunks and keeps ResultStats as they arrive
+    
+    With no directory only the statistics are kept. Otherwise every
+    `chunk_size` results become one file named {prefix}-{chunk:05d}.jsonl
+    or .col, so at most one chunk is ever held in memory.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, fmt: str = "jsonl",
+                 chunk_size: int = 100000, prefix: str = "results"):
+        if fmt not in ("jsonl", "columnar"):
+            raise ValueError(f"unknown result format {fmt!r}")
+        self.directory = directory
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.stats = ResultStats()
+        self.chunks = 0
+        self.rows = 0
+        self.handle = None
+        self.columns: Dict[str, array] = {}
+        self.countries: List[str] = []
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+    
+    def __enter__(self) -> "ResultSink":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def chunk_path(self, chunk: int) -> str:
+        extension = "jsonl" if self.fmt == "jsonl" else "col"
+        return os.path.join(self.directory, f"{self.prefix}-{chunk:05d}.{extension}")
+    
+    def add(self, result: GameResult):
+        """Record one finished game"""
+        self.stats.add(result)
+        if self.directory is None:
+            return
+        if self.fmt == "jsonl":
+            if self.handle is None:
+                self.handle = open(self.chunk_path(self.chunks), "w")
+            self.handle.write(json.dumps(result_row(result)) + "\n")
+        else:
+            self.append_columns(result)
+        self.rows += 1
+        if self.rows == self.chunk_size:
+            self.end_chunk()
+    
+    def append_columns(self, result: GameResult):
+        """Add one row to the in-memory columnar chunk"""
+        columns = self.columns
+        if not columns:
+            columns["winner"] = array("b")
+            columns["reason"] = array("B")
+            columns["turns"] = array("I")
+            columns["defcon"] = array("B")
+            columns["tension"] = array("i")
+            for country in result.casualties:
+                columns[f"casualties_{country}"] = array("q")
+                columns[f"cities_destroyed_{country}"] = array("I")
+        countries = list(result.casualties)
+        columns["winner"].append(countries.index(result.winner) if result.winner else -1)
+        columns["reason"].append(REASONS.index(result.reason.value))
+        columns["turns"].append(result.turns)
+        columns["defcon"].append(result.defcon)
+        columns["tension"].append(result.tension)
+        for country in countries:
+            columns[f"casualties_{country}"].append(result.casualties[country])
+            columns[f"cities_destroyed_{country}"].append(result.cities_destroyed[country])
+        self.countries = countries
+    
+    def end_chunk(self):
+        """Close the current chunk file"""
+        if self.rows:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+            if self.columns:
+                write_columns(self.chunk_path(self.chunks), self.columns,
+                              {"countries": self.countries, "reasons": REASONS})
+                self.columns = {}
+            self.chunks += 1
+            self.rows = 0
+    
+    def close(self):
+        """Write out the last partial chunk"""
+        if self.directory is not None:
+            self.end_chunk()
+
+def write_columns(path: str, columns: Dict[str, array], extra: dict):
+    """Columnar chunk: magic, u32 header length, JSON header, 8-byte aligned columns"""
+    blocks: List[bytes] = []
+    header = {"byteorder": sys.byteorder, "columns": [], **extra}
+    offset = 0
+    for name, column in columns.items():
+        data = column.tobytes()
+        header["columns"].append({"name": name, "typecode": column.typecode,
+                                  "offset": offset, "length": len(data)})
+        blocks.append(data + bytes(-len(data) % 8))
+        offset += len(blocks[-1])
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * (-(len(COLUMNS_MAGIC) + 4 + len(encoded)) % 8)
+    with open(path, "wb") as handle:
+        handle.write(COLUMNS_MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        for block in blocks:
+            handle.write(block)
+
+def read_columns(path: str) -> Dict[str, array]:
+    """Load a columnar chunk written by ResultSink"""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if data[:len(COLUMNS_MAGIC)] != COLUMNS_MAGIC:
+        raise ValueError(f"{path} is not a WOPR results chunk")
+    length = struct.unpack_from("<I", data, len(COLUMNS_MAGIC))[0]
+    start = len(COLUMNS_MAGIC) + 4
+    header = json.loads(data[start:start + length])
+    base = start + length
+    columns = {}
+    for column in header["columns"]:
+        values = array(column["typecode"])
+        values.frombytes(data[base + column["offset"]:base + column["offset"] + column["length"]])
+        if header["byteorder"] != sys.byteorder:
+            values.byteswap()
+        columns[column["name"]] = values
+    return columns
+
+def stream_shard(shard: int, games: int, seed: int, policy: str, player_country: str,
+                 directory: Optional[str], fmt: str, chunk_size: int,
+                 world_path: Optional[str] = None) -> ResultStats:
+    """Play one shard into its own sink and return only the statistics"""
+    import random
+    from montecarlo import resolve_policy, shard_seed, shared_world
+    
+    wopr = WOPR(random.Random(shard_seed(seed, shard)), shared_world(world_path))
+    player_policy = resolve_policy(policy)
+    with ResultSink(directory, fmt, chunk_size, prefix=f"shard{shard:05d}") as sink:
+        for _ in range(games):
+            sink.add(wopr.play_headless(player_policy, player_country))
+    return sink.stats
+
+def stream(games: int, seed: int = 0, workers: Optional[int] = None, policy: str = "wopr",
+           player_country: str = "USA", directory: Optional[str] = None, fmt: str = "jsonl",
+           chunk_size: int = 100000, shard_size: int = 100000,
+           world_path: Optional[str] = None) -> ResultStats:
+    """Play games across a process pool, streaming results and merging statistics"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = [(index, min(shard_size, games - start))
+              for index, start in enumerate(range(0, games, shard_size))]
+    total = ResultStats()
+    arguments = [(index, count, seed, policy, player_country, directory, fmt, chunk_size, world_path)
+                 for index, count in shards]
+    if workers <= 1 or len(shards) <= 1:
+        for args in arguments:
+            total.merge(stream_shard(*args))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for stats in executor.map(stream_shard, *zip(*arguments)):
+            total.merge(stats)
+    return total
+
+def report(stats: ResultStats):
+    """Print a summary of streamed statistics"""
+    print(f"GAMES PLAYED: {stats.games:,}")
+    for outcome, count in sorted(stats.outcomes.items()):
+        print(f"  {outcome}: {count:,} ({count / stats.games:.2%})")
+    print("\n                          MEAN        STDEV          P50          P90          P99")
+    for name in sorted(stats.sketches):
+        moment, sketch = stats.moments[name], stats.sketches[name]
+        print(f"{name.upper():<20} {moment.mean:>11,.1f} {moment.stdev:>12,.1f} "
+              f"{sketch.quantile(0.5):>12,.0f} {sketch.quantile(0.9):>12,.0f} "
+              f"{sketch.quantile(0.99):>12,.0f}")
+    print("\nFINAL DEFCON:")
+    for level, count in sorted(stats.defcon.items()):
+        print(f"  {level}: {'#' * max(1, round(40 * count / stats.games)) if count else ''} {count:,}")
+
+def main():
+    """Command line entry point"""
+    import argparse
+    from wargames import PLAYER_POLICIES
+    
+    parser = argparse.ArgumentParser(description="Stream self-play results with online statistics")
+    parser.add_argument("games", type=int, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    parser.add_argument("--out", metavar="DIR", help="write result chunks here")
+    parser.add_argument("--format", choices=["jsonl", "columnar"], default="jsonl")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--shard-size", type=int, default=100000)
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    stats = stream(args.games, args.seed, args.workers, args.policy, args.side, args.out,
+                   args.format, args.chunk_size, args.shard_size, args.world)
+    elapsed = time.perf_counter() - start
+    report(stats)
+    print(f"\nGAMES PER SECOND: {stats.games / elapsed:,.0f}")
+
+if __name__ == "__main__":
+    main()
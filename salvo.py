@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+WarGames - Salvo Engine
+Discrete-event resolution of full missile exchanges on a WOPR game
+
+Where a normal turn fires one abstract missile, a salvo launches hundreds
+or thousands of missiles from specific bases. Every missile becomes a short
+chain of timestamped events on one heapq priority queue:
+
+    LAUNCH     the base must still be operational and stocked; one missile
+               is expended from it and the missile is in flight
+    INTERCEPT  terminal defence: the target side spends an interceptor, if it
+               has any left, and may destroy the warhead
+    ARRIVAL    the warhead hits with the attacker's hit chance and destroys
+               its city (countervalue) or knocks its base offline
+               (counterforce)
+
+Flight time is a boost phase plus the great-circle distance from base to
+target over the mean speed, with coordinates read as (longitude, latitude)
+in degrees. A base knocked out before its later launches are due never
+fires them, so counterforce races are decided by geometry and timing.
+plan() queues every launch up front; after that each missile costs at
+most two more pushes (intercept and arrival), so exchanges with 10^5 or
+more missiles resolve in about a second.
+
+All effects go through the WOPR (destroy_city, expend_from, disable_base,
+tension and DEFCON), so event logs and status reports see them too.
+"""
+
+import heapq
+import math
+import random
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from wargames import WOPR, MissileBase, World
+
+EARTH_RADIUS_KM = 6371.0
+BOOST_SECONDS = 300.0
+SPEED_KM_S = 7.0
+# Terminal defences engage this long before impact
+INTERCEPT_LEAD_SECONDS = 120.0
+
+# Event kinds, in the order they happen to one missile
+LAUNCH, INTERCEPT, ARRIVAL = range(3)
+# Target kinds
+CITY, BASE = range(2)
+
+def great_circle_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Haversine distance between two (longitude, latitude) points in degrees"""
+    lon1, lat1 = map(math.radians, a)
+    lon2, lat2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+def flight_seconds(distance_km: float) -> float:
+    """Launch-to-impact time for a ballistic missile"""
+    return BOOST_SECONDS + distance_km / SPEED_KM_S
+
+@dataclass
+class SideReport:
+    """What happened to one side's missiles, and to its country"""
+    launched: int = 0
+    scrubbed: int = 0        # base offline or empty when the launch came due
+    intercepted: int = 0     # of this side's warheads, by the enemy
+    missed: int = 0
+    cities_destroyed: int = 0
+    overkill: int = 0        # warheads that arrived on something already destroyed
+    bases_destroyed: int = 0
+    casualties_inflicted: int = 0
+    interceptors_used: int = 0
+
+@dataclass
+class SalvoReport:
+    """Outcome of one exchange"""
+    sides: Dict[str, SideReport] = field(default_factory=dict)
+    events: int = 0
+    peak_in_flight: int = 0
+    duration: float = 0.0    # simulated seconds from first launch to last impact
+
+class SalvoEngine:
+    """Schedules and resolves missile salvos against a WOPR game's state
+    
+    `interceptors` is the terminal defence stock per side and
+    `intercept_chance` the chance each interceptor kills its warhead.
+    Hit chances default to the game's Rules: the player's side uses
+    player_hit_chance, the other side ai_hit_chance.
+    """
+    
+    def __init__(self, wopr: WOPR, interceptors: Optional[Dict[str, int]] = None,
+                 intercept_chance: float = 0.5, hit_chance: Optional[Dict[str, float]] = None,
+                 rng: Optional[random.Random] = None):
+        self.wopr = wopr
+        self.rng = rng if rng is not None else wopr.rng
+        self.countries = tuple(wopr.cities)
+        self.interceptors = {country: 0 for country in self.countries}
+        self.interceptors.update(interceptors or {})
+        self.intercept_chance = intercept_chance
+        rules = wopr.rules
+        self.hit_chance = {country: rules.player_hit_chance if country == wopr.player_country
+                           else rules.ai_hit_chance for country in self.countries}
+        self.hit_chance.update(hit_chance or {})
+        # Missiles as parallel columns; the queue holds (time, sequence, kind, missile)
+        self.side = array("B")
+        self.base = array("i")
+        self.target_kind = array("B")
+        self.target = array("i")
+        self.impact = array("d")
+        self.queue: List[Tuple[float, int, int, int]] = []
+        self.sequence = 0
+        self.flight_times: Dict[Tuple[int, int, int, int], float] = {}
+    
+    def launch(self, attacker: str, base: int, target_kind: int, target: int, at: float = 0.0) -> int:
+        """Schedule one missile; returns its id"""
+        missile = len(self.side)
+        self.side.append(self.countries.index(attacker))
+        self.base.append(base)
+        self.target_kind.append(target_kind)
+        self.target.append(target)
+        self.impact.append(0.0)
+        self.queue.append((at, self.sequence, LAUNCH, missile))
+        self.sequence += 1
+        return missile
+    
+    def plan(self, attacker: str, count: int, counterforce: float = 0.0,
+             start: float = 0.0, interval: float = 2.0) -> int:
+        """Schedule a salvo of up to `count` missiles from the attacker's stocked bases
+        
+        A `counterforce` share goes at the enemy's operational bases, largest
+        stock first; the rest at intact cities, most valuable first. Each base
+        fires one missile every `interval` seconds, counterforce first.
+        Returns how many missiles were scheduled.
+        """
+        wopr = self.wopr
+        defender = wopr.opponent(attacker)
+        enemy_bases = wopr.missile_bases[defender]
+        base_targets = sorted((i for i in range(len(enemy_bases)) if enemy_bases.operational[i]),
+                              key=lambda i: -enemy_bases.missiles[i])
+        cities = wopr.cities[defender]
+        city_targets = sorted((city.index for city in cities if not city.destroyed),
+                              key=lambda i: (-cities[i].strategic_value, -cities[i].population))
+        if not base_targets and not city_targets:
+            return 0
+        
+        bases = wopr.missile_bases[attacker]
+        launchers = [(i, bases.missiles[i]) for i in range(len(bases))
+                     if bases.operational[i] and bases.missiles[i] > 0]
+        stock = sum(missiles for _, missiles in launchers)
+        count = min(count, stock)
+        strikes = round(count * counterforce) if base_targets else 0
+        if not city_targets:
+            strikes = count
+        targets = [(BASE, base_targets[k % len(base_targets)]) for k in range(strikes)]
+        targets += [(CITY, city_targets[k % len(city_targets)]) for k in range(count - strikes)]
+        
+        # Deal the targets out base by base, round robin, so every base fires early
+        fired = {base: 0 for base, _ in launchers}
+        k = 0
+        while k < count:
+            for base, missiles in launchers:
+                if k == count:
+                    break
+                if fired[base] < missiles:
+                    target_kind, target = targets[k]
+                    self.launch(attacker, base, target_kind, target, start + fired[base] * interval)
+                    fired[base] += 1
+                    k += 1
+        return count
+    
+    def flight_time(self, side: int, base: int, target_kind: int, target: int) -> float:
+        """Memoized flight time from a base to a target"""
+        key = (side, base, target_kind, target)
+        seconds = self.flight_times.get(key)
+        if seconds is None:
+            wopr = self.wopr
+            attacker = self.countries[side]
+            defender = wopr.opponent(attacker)
+            origin = wopr.missile_bases[attacker][base].coordinates
+            if target_kind == CITY:
+                destination = wopr.cities[defender][target].coordinates
+            else:
+                destination = wopr.missile_bases[defender][target].coordinates
+            seconds = self.flight_times[key] = flight_seconds(great_circle_km(origin, destination))
+        return seconds
+    
+    def run(self) -> SalvoReport:
+        """Resolve every scheduled missile in time order"""
+        wopr = self.wopr
+        rng = self.rng
+        report = SalvoReport(sides={country: SideReport() for country in self.countries})
+        reports = [report.sides[country] for country in self.countries]
+        queue = self.queue
+        heapq.heapify(queue)
+        push, pop = heapq.heappush, heapq.heappop
+        in_flight = 0
+        first = queue[0][0] if queue else 0.0
+        now = first
+        
+        while queue:
+            now, _, kind, missile = pop(queue)
+            report.events += 1
+            side = self.side[missile]
+            attacker = self.countries[side]
+            defender = self.countries[1 - side]
+            stats = reports[side]
+            
+            if kind == LAUNCH:
+                base = self.base[missile]
+                bases = wopr.missile_bases[attacker]
+                if not bases.operational[base] or bases.missiles[base] <= 0:
+                    stats.scrubbed += 1
+                    continue
+                wopr.expend_from(attacker, base, 1)
+                stats.launched += 1
+                in_flight += 1
+                if in_flight > report.peak_in_flight:
+                    report.peak_in_flight = in_flight
+                impact = now + self.flight_time(side, base, self.target_kind[missile], self.target[missile])
+                self.impact[missile] = impact
+                if self.interceptors[defender] > 0:
+                    push(queue, (max(now, impact - INTERCEPT_LEAD_SECONDS), self.sequence, INTERCEPT, missile))
+                else:
+                    push(queue, (impact, self.sequence, ARRIVAL, missile))
+                self.sequence += 1
+            
+            elif kind == INTERCEPT:
+                if self.interceptors[defender] > 0:
+                    self.interceptors[defender] -= 1
+                    reports[1 - side].interceptors_used += 1
+                    if rng.random() < self.intercept_chance:
+                        stats.intercepted += 1
+                        in_flight -= 1
+                        continue
+                push(queue, (self.impact[missile], self.sequence, ARRIVAL, missile))
+                self.sequence += 1
+            
+            else:
+                in_flight -= 1
+                if rng.random() >= self.hit_chance[attacker]:
+                    stats.missed += 1
+                elif self.target_kind[missile] == CITY:
+                    city = wopr.cities[defender][self.target[missile]]
+                    if city.destroyed:
+                        stats.overkill += 1
+                    else:
+                        self.destroy_city(attacker, city)
+                        stats.cities_destroyed += 1
+                        stats.casualties_inflicted += city.population
+                else:
+                    base = self.target[missile]
+                    if wopr.missile_bases[defender].operational[base]:
+                        wopr.disable_base(defender, base)
+                        stats.bases_destroyed += 1
+                    else:
+                        stats.overkill += 1
+        
+        report.duration = now - first
+        self.queue = []
+        return report
+    
+    def destroy_city(self, attacker: str, city):
+        """A warhead lands: the same damage and escalation as a turn's strike"""
+        self.wopr.land_warhead(attacker, city, ai=attacker != self.wopr.player_country)
+
+def scaled_world(scale: int) -> World:
+    """The built-in world with every base's stock multiplied, for stress runs"""
+    template = WOPR()
+    bases = {country: [MissileBase(base.name, base.country, base.missiles * scale,
+                                   base.operational, base.coordinates) for base in records]
+             for country, records in template.create_missile_bases().items()}
+    return World.from_records(template.create_cities(), bases)
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Resolve a full missile exchange event by event")
+    parser.add_argument("--usa", type=int, default=500, help="missiles the USA launches")
+    parser.add_argument("--ussr", type=int, default=500, help="missiles the USSR launches")
+    parser.add_argument("--counterforce", type=float, default=0.5,
+                        help="share of each salvo aimed at enemy bases")
+    parser.add_argument("--ussr-delay", type=float, default=600.0,
+                        help="seconds between the USA's first launch and the USSR's response")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between launches per base")
+    parser.add_argument("--interceptors", type=int, default=100, help="terminal interceptors per side")
+    parser.add_argument("--intercept-chance", type=float, default=0.5)
+    parser.add_argument("--scale", type=int, default=1, help="multiply every base's stock")
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    world = None
+    if args.world:
+        from world import load_world
+        world = load_world(args.world)
+    elif args.scale > 1:
+        world = scaled_world(args.scale)
+    wopr = WOPR(random.Random(args.seed), world)
+    wopr.player_country, wopr.ai_country = "USA", "USSR"
+    
+    engine = SalvoEngine(wopr, {"USA": args.interceptors, "USSR": args.interceptors},
+                         args.intercept_chance)
+    engine.plan("USA", args.usa, args.counterforce, interval=args.interval)
+    engine.plan("USSR", args.ussr, args.counterforce, start=args.ussr_delay, interval=args.interval)
+    
+    start = time.perf_counter()
+    report = engine.run()
+    elapsed = time.perf_counter() - start
+    
+    for country, side in report.sides.items():
+        print(f"\n{country}:")
+        print(f"  LAUNCHED {side.launched:,}  SCRUBBED {side.scrubbed:,}  "
+              f"INTERCEPTED {side.intercepted:,}  MISSED {side.missed:,}  OVERKILL {side.overkill:,}")
+        print(f"  ENEMY CITIES DESTROYED {side.cities_destroyed}  ENEMY BASES DESTROYED {side.bases_destroyed}  "
+              f"CASUALTIES INFLICTED {side.casualties_inflicted:,}")
+        print(f"  INTERCEPTORS USED {side.interceptors_used:,}  "
+              f"MISSILES LEFT {wopr.missiles_remaining(country):,}")
+    print(f"\nEXCHANGE LASTED {report.duration / 60:.1f} MINUTES")
+    print(f"FINAL DEFCON LEVEL: {wopr.defcon_level}  GLOBAL TENSION: {wopr.global_tension}%")
+    print(f"EVENTS: {report.events:,} (PEAK {report.peak_in_flight:,} IN FLIGHT) IN {elapsed:.2f}s, "
+          f"{report.events / elapsed if elapsed else 0:,.0f} EVENTS/S")
+
+if __name__ == "__main__":
+    main()
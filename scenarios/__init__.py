@@ -0,0 +1,226 @@
+"""
+WarGames - Scenarios
+The rest of WOPR's menu: wars defined as data, compiled once and cached
+
+A scenario is one JSON data package, named after its menu title
+(theater-european-war.json for "Theater European War"):
+
+    {"title": "Theater European War",
+     "briefing": ["NATO AND THE WARSAW PACT FACE EACH OTHER ACROSS CENTRAL EUROPE"],
+     "sides": {"USA": "NATO", "USSR": "Warsaw Pact"},
+     "rules": {"turn_limit": 15, "high_tension": 60},
+     "ai": {"policy": "bands"},
+     "cities": {"USA": [...], "USSR": [...]},
+     "missile_bases": {"USA": [...], "USSR": [...]}}
+
+The two sides keep the engine's USA and USSR slots; "sides" gives them
+their names. "rules" overrides wargames.Rules fields, "ai" picks the
+opponent (bands, salvo, search with budget_ms, or trained with table), and
+cities and bases use the world.py JSON layout.
+
+The registry only lists file names: nothing is imported or parsed until a
+scenario is picked. The first load compiles the package into a binary
+world file (world.py's format, with the targeting buckets precomputed and
+the validated rules, AI and briefing in its header) under __compiled__/
+next to the source. Later loads map that file instead, as long as the
+source's size and modification time still match.
+
+Scenarios are looked up in this package and in every directory listed in
+WOPR_SCENARIOS (os.pathsep separated); later directories win, so in-house
+packages can replace the built-in ones.
+
+    python3 -m scenarios list
+    python3 -m scenarios compile
+"""
+
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from wargames import Rules, World
+from world import read_world_binary, save_world_binary, world_from_dict
+
+SOURCE_SUFFIX = ".json"
+COMPILED_DIR = "__compiled__"
+COMPILED_SUFFIX = ".wsc"
+# Bump when the compiled layout or its meta changes; older caches are rebuilt
+COMPILED_FORMAT = 1
+AI_POLICIES = ("bands", "salvo", "search", "trained")
+SIDES = ("USA", "USSR")
+
+def slugify(title: str) -> str:
+    """File name stem for a menu title"""
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+@dataclass
+class Scenario:
+    """A compiled scenario, ready for WOPR.play_scenario"""
+    slug: str
+    title: str
+    briefing: List[str]
+    sides: Dict[str, str]
+    world: World
+    rules: Rules
+    ai: Dict[str, object]
+    
+    def ai_policy(self, warn: Optional[Callable[[str], None]] = None):
+        """A fresh AI policy for one game; None plays the classic tension bands
+        
+        A trained policy whose table is missing or unreadable falls back to
+        the bands, telling `warn` why.
+        """
+        policy = self.ai.get("policy", "bands")
+        if policy == "salvo":
+            from allocation import salvo_ai_policy
+            return salvo_ai_policy
+        if policy == "search":
+            from search import SearchAI
+            return SearchAI(budget_ms=self.ai.get("budget_ms", 50.0))
+        if policy == "trained":
+            from training import TABLE, PolicyTable
+            table = self.ai.get("table", TABLE)
+            try:
+                return PolicyTable.load(table)
+            except (OSError, ValueError) as exc:
+                if warn is not None:
+                    warn(f"TRAINED OPPONENT UNAVAILABLE ({table}: {exc})")
+                    warn("FALLING BACK TO STANDARD DOCTRINE")
+        return None
+
+def _stamp(source: str) -> Dict[str, int]:
+    info = os.stat(source)
+    return {"size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+def compile_scenario(source: str, compiled: Optional[str] = None) -> Scenario:
+    """Parse and check a scenario package, writing its compiled form if a path is given"""
+    slug = os.path.basename(source)[:-len(SOURCE_SUFFIX)]
+    stamp = _stamp(source)
+    with open(source) as handle:
+        data = json.load(handle)
+    if sorted(data.get("cities", {})) != sorted(SIDES) or not all(data["cities"].values()):
+        raise ValueError(f"{source}: scenarios need cities for both {' and '.join(SIDES)}")
+    try:
+        rules = Rules.from_dict(data.get("rules", {}))
+    except TypeError as exc:
+        raise ValueError(f"{source}: bad rules: {exc}") from None
+    ai = dict(data.get("ai", {}))
+    if ai.get("policy", "bands") not in AI_POLICIES:
+        raise ValueError(f"{source}: unknown AI policy {ai['policy']!r}")
+    meta = {
+        "format": COMPILED_FORMAT,
+        "source": stamp,
+        "slug": slug,
+        "title": data.get("title", slug.replace("-", " ").title()),
+        "briefing": list(data.get("briefing", [])),
+        "sides": {side: data.get("sides", {}).get(side, side) for side in SIDES},
+        "rules": rules.as_dict(),
+        "ai": ai,
+    }
+    world = world_from_dict(data)
+    if compiled is not None:
+        try:
+            os.makedirs(os.path.dirname(compiled), exist_ok=True)
+            temporary = f"{compiled}.{os.getpid()}.tmp"
+            save_world_binary(world, temporary, meta)
+            os.replace(temporary, compiled)
+        except OSError:
+            # A read-only install still plays; it just compiles every time
+            pass
+    return _scenario(world, meta)
+
+def load_compiled(compiled: str, source: str) -> Optional[Scenario]:
+    """The compiled scenario, or None when it is missing or older than its source"""
+    try:
+        world, meta = read_world_binary(compiled)
+    except (OSError, ValueError):
+        return None
+    if not meta or meta.get("format") != COMPILED_FORMAT or meta.get("source") != _stamp(source):
+        return None
+    return _scenario(world, meta)
+
+def _scenario(world: World, meta: dict) -> Scenario:
+    return Scenario(meta["slug"], meta["title"], meta["briefing"], meta["sides"], world,
+                    Rules.from_dict(meta["rules"]), meta["ai"])
+
+def default_paths() -> List[str]:
+    paths = [os.path.dirname(os.path.abspath(__file__))]
+    paths += [path for path in os.environ.get("WOPR_SCENARIOS", "").split(os.pathsep) if path]
+    return paths
+
+class ScenarioRegistry:
+    """Scenario packages by slug, listed from file names and compiled on first load"""
+    
+    def __init__(self, paths: Sequence[str]):
+        self.paths = list(paths)
+        self._sources: Optional[Dict[str, str]] = None
+        # slug -> (source stamp, scenario) for scenarios already loaded by this process
+        self.loaded: Dict[str, Tuple[Dict[str, int], Scenario]] = {}
+    
+    def sources(self) -> Dict[str, str]:
+        """slug -> source path, from one directory listing per path"""
+        if self._sources is None:
+            found: Dict[str, str] = {}
+            for directory in self.paths:
+                try:
+                    entries = os.scandir(directory)
+                except OSError:
+                    continue
+                with entries:
+                    for entry in entries:
+                        if entry.name.endswith(SOURCE_SUFFIX) and entry.is_file():
+                            found[entry.name[:-len(SOURCE_SUFFIX)]] = entry.path
+            self._sources = found
+        return self._sources
+    
+    def titles(self) -> List[Tuple[str, str]]:
+        """(slug, menu title) for every scenario, titles taken from the file names"""
+        return [(slug, slug.replace("-", " ").title()) for slug in sorted(self.sources())]
+    
+    def compiled_path(self, source: str) -> str:
+        directory, name = os.path.split(source)
+        return os.path.join(directory, COMPILED_DIR, name[:-len(SOURCE_SUFFIX)] + COMPILED_SUFFIX)
+    
+    def load(self, title: str) -> Optional[Scenario]:
+        """The scenario for a menu title or slug, or None if there is no such package"""
+        slug = slugify(title)
+        source = self.sources().get(slug)
+        if source is None:
+            return None
+        stamp = _stamp(source)
+        if slug in self.loaded and self.loaded[slug][0] == stamp:
+            return self.loaded[slug][1]
+        compiled = self.compiled_path(source)
+        scenario = load_compiled(compiled, source) or compile_scenario(source, compiled)
+        self.loaded[slug] = (stamp, scenario)
+        return scenario
+
+REGISTRY = ScenarioRegistry(default_paths())
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="python3 -m scenarios",
+                                     description="List and compile WOPR scenario packages")
+    parser.add_argument("command", choices=["list", "compile"])
+    parser.add_argument("--force", action="store_true", help="recompile even if the cache is current")
+    args = parser.parse_args()
+    
+    for slug, title in REGISTRY.titles():
+        source = REGISTRY.sources()[slug]
+        if args.command == "list":
+            print(f"{slug:<32} {source}")
+            continue
+        compiled = REGISTRY.compiled_path(source)
+        start = time.perf_counter()
+        if args.force or load_compiled(compiled, source) is None:
+            compile_scenario(source, compiled)
+        compile_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        scenario = load_compiled(compiled, source)
+        load_ms = (time.perf_counter() - start) * 1000
+        cities = sum(len(side.city_names) for side in scenario.world.sides.values()) if scenario else 0
+        print(f"{slug:<32} {cities:>7,} CITIES  COMPILE {compile_ms:7.2f} MS  LOAD {load_ms:6.2f} MS")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+WarGames - Scripted Sessions
+Replays recorded operator sessions through the real menu and turn flow, at
+full speed and without a terminal
+
+A script is the operator's side of one session: one reply per line, in the
+order WOPR asks (game menu, side, commands, strike targets, salvo sizes,
+play again). A stream may hold any number of scripts, separated by a line
+"---". Lines starting with "#" are comments, except the headers
+
+    # name: launch-and-surrender
+    # seed: 1983
+
+Blank lines are replies (an empty answer), so they count as commands.
+
+Each script runs through WOPR.run() unmodified: intro, select_game,
+start_nuclear_war, player_turn, launch_strike's target prompt and the play
+again prompt in run. The renderer answers prompts from the script, never
+pauses and keeps only a CRC-32 of the output (and, if asked, the output
+itself). Every script starts a fresh session, seeded with its "seed"
+header or else with a seed derived from --seed and its position in the
+stream, so the same corpus always replays the same way.
+
+One JSON record is written per script: name, seed, status, commands used
+and left over, the output digest and one result row per game played.
+Status is "complete" when WOPR logged off, "exhausted" when the script ran
+out before WOPR did (where a terminal would have hit end of file) and
+"error" when the game raised.
+
+    python3 scripted.py sessions/*.txt > results.jsonl
+    cat recorded.txt | python3 scripted.py --workers 1
+"""
+
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from montecarlo import shard_seed, shared_world
+from renderers import Renderer
+from results import result_row
+from wargames import WOPR, EndReason, GameState, World
+
+SEPARATOR = "---"
+HEADER = re.compile(r"#\s*(name|seed)\s*:\s*(.*?)\s*$")
+# Scripts handed to a worker at a time
+BATCH_SIZE = 64
+
+@dataclass
+class Script:
+    """One recorded session: the operator's replies, in order"""
+    index: int
+    name: str
+    seed: int
+    commands: List[str]
+
+@dataclass
+class ScriptResult:
+    """What one script did to the game"""
+    index: int
+    name: str
+    seed: int
+    status: str                  # complete, exhausted or error
+    commands: int                # replies consumed
+    unused: int                  # replies left when WOPR logged off
+    digest: str                  # CRC-32 of everything written, prompts and echoed replies included
+    games: List[Dict[str, object]] = field(default_factory=list)
+    error: Optional[str] = None
+    seconds: float = 0.0
+    output: Optional[str] = None
+    
+    def as_row(self, timing: bool = False) -> Dict[str, object]:
+        """A JSON-ready record; without timing it is identical on every replay"""
+        row = {
+            "index": self.index,
+            "name": self.name,
+            "seed": self.seed,
+            "status": self.status,
+            "commands": self.commands,
+            "unused": self.unused,
+            "digest": self.digest,
+            "games": self.games,
+        }
+        if self.error is not None:
+            row["error"] = self.error
+        if timing:
+            row["seconds"] = round(self.seconds, 6)
+        return row
+
+class ScriptRenderer(Renderer):
+    """Answers prompts from a script; output is digested, never shown, and never paced"""
+    
+    def __init__(self, keep_output: bool = False):
+        super().__init__()
+        self.keep_output = keep_output
+        self.load([])
+    
+    def load(self, commands: List[str]):
+        """Start a new script"""
+        self.commands = commands
+        self.position = 0
+        self.crc = 0
+        self.output: List[str] = []
+    
+    def write(self, text: str):
+        self.crc = zlib.crc32(text.encode("utf-8"), self.crc)
+        if self.keep_output:
+            self.output.append(text)
+    
+    def flush(self):
+        pass
+    
+    def read_line(self, prompt: str) -> str:
+        self.write(prompt)
+        if self.position >= len(self.commands):
+            raise EOFError(f"script ended at prompt {prompt.strip()!r}")
+        command = self.commands[self.position]
+        self.position += 1
+        # Echo the reply as a terminal would, so transcripts read like the session
+        self.write(command + "\n")
+        return command
+
+class ScriptRunner:
+    """Replays scripts one after another on a single reused game"""
+    
+    def __init__(self, world: Optional[World] = None, keep_output: bool = False):
+        self.renderer = ScriptRenderer(keep_output)
+        self.wopr = WOPR(random.Random(), world, self.renderer)
+        self.games: List[Dict[str, object]] = []
+        # Record every game as it ends, without touching the flow around it
+        game_over = self.wopr.game_over
+        
+        def recorded_game_over():
+            self.games.append(result_row(self.wopr.result(self.end_reason())))
+            return game_over()
+        self.wopr.game_over = recorded_game_over
+    
+    def end_reason(self) -> EndReason:
+        """Why the game reaching game_over ended, as run_simulation decides it"""
+        reason = self.wopr.end_condition()
+        if reason is not None:
+            return reason
+        return EndReason.SURRENDER if self.wopr.state == GameState.GAME_OVER else EndReason.EXIT
+    
+    def run(self, script: Script) -> ScriptResult:
+        """Play one script as a fresh session"""
+        wopr, renderer = self.wopr, self.renderer
+        wopr.rng.seed(script.seed)
+        wopr.reset()
+        wopr.player_country = wopr.ai_country = None
+        renderer.load(script.commands)
+        self.games = []
+        status, error = "complete", None
+        start = time.perf_counter()
+        try:
+            wopr.run()
+        except EOFError:
+            status = "exhausted"
+        except Exception as exc:
+            status, error = "error", f"{type(exc).__name__}: {exc}"
+        elapsed = time.perf_counter() - start
+        return ScriptResult(
+            index=script.index,
+            name=script.name,
+            seed=script.seed,
+            status=status,
+            commands=renderer.position,
+            unused=len(script.commands) - renderer.position,
+            digest=f"{renderer.crc:08x}",
+            games=self.games,
+            error=error,
+            seconds=elapsed,
+            output="".join(renderer.output) if renderer.keep_output else None,
+        )
+
+def read_scripts(lines: Iterable[str], source: str = "-") -> Iterator[Tuple[str, Optional[int], List[str]]]:
+    """Split one stream into (name, seed or None, commands), lazily"""
+    name: Optional[str] = None
+    seed: Optional[int] = None
+    commands: List[str] = []
+    count = 0
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line.strip() == SEPARATOR:
+            if commands or name is not None:
+                count += 1
+                yield name or f"{source}:{count}", seed, commands
+            name, seed, commands = None, None, []
+            continue
+        if line.startswith("#"):
+            header = HEADER.match(line)
+            if header is not None:
+                key, value = header.groups()
+                if key == "name":
+                    name = value
+                else:
+                    seed = int(value)
+            continue
+        commands.append(line)
+    if commands or name is not None:
+        count += 1
+        yield name or f"{source}:{count}", seed, commands
+
+def load_scripts(paths: Iterable[str], seed: int = 0) -> Iterator[Script]:
+    """Every script in every stream, in order, with its seed settled; "-" reads stdin"""
+    index = 0
+    for path in paths:
+        handle = sys.stdin if path == "-" else open(path)
+        try:
+            for name, script_seed, commands in read_scripts(handle, path):
+                if script_seed is None:
+                    script_seed = shard_seed(seed, index)
+                yield Script(index, name, script_seed, commands)
+                index += 1
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+_runners: Dict[Tuple[Optional[str], bool], ScriptRunner] = {}
+
+def run_batch(scripts: List[Script], world_path: Optional[str] = None,
+              keep_output: bool = False) -> List[ScriptResult]:
+    """Run scripts on this process's runner"""
+    key = (world_path, keep_output)
+    if key not in _runners:
+        _runners[key] = ScriptRunner(shared_world(world_path), keep_output)
+    runner = _runners[key]
+    return [runner.run(script) for script in scripts]
+
+def batches(scripts: Iterable[Script], size: int) -> Iterator[List[Script]]:
+    batch: List[Script] = []
+    for script in scripts:
+        batch.append(script)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def run_scripts(scripts: Iterable[Script], workers: Optional[int] = None,
+                world_path: Optional[str] = None, keep_output: bool = False,
+                batch_size: int = BATCH_SIZE) -> Iterator[ScriptResult]:
+    """Replay scripts across a process pool, yielding results in script order
+    
+    Only a few batches per worker are in flight, so a stream of any length
+    runs in bounded memory.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for batch in batches(scripts, batch_size):
+            yield from run_batch(batch, world_path, keep_output)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches(scripts, batch_size):
+            pending.append(executor.submit(run_batch, batch, world_path, keep_output))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def main():
+    """Command line entry point"""
+    import argparse
+    import json
+    
+    parser = argparse.ArgumentParser(description="Replay scripted operator sessions through the game")
+    parser.add_argument("paths", nargs="*", default=["-"], metavar="PATH",
+                        help="script streams; - (the default) reads stdin")
+    parser.add_argument("--seed", type=int, default=0, help="master seed for scripts without a seed header")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    parser.add_argument("--out", metavar="PATH", help="write result records here instead of stdout")
+    parser.add_argument("--transcripts", metavar="DIR", help="also save each script's output")
+    parser.add_argument("--timing", action="store_true", help="add seconds per script to the records")
+    args = parser.parse_args()
+    
+    if args.transcripts:
+        os.makedirs(args.transcripts, exist_ok=True)
+    out = open(args.out, "w") if args.out else sys.stdout
+    statuses: Dict[str, int] = {}
+    scripts = games = 0
+    start = time.perf_counter()
+    try:
+        for result in run_scripts(load_scripts(args.paths, args.seed), args.workers, args.world,
+                                  keep_output=args.transcripts is not None):
+            out.write(json.dumps(result.as_row(args.timing)) + "\n")
+            if args.transcripts:
+                with open(os.path.join(args.transcripts, f"{result.index:06d}.txt"), "w") as handle:
+                    handle.write(result.output)
+            scripts += 1
+            games += len(result.games)
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    
+    print(f"SCRIPTS RUN: {scripts:,}  GAMES PLAYED: {games:,}", file=sys.stderr)
+    for status, count in sorted(statuses.items()):
+        print(f"  {status.upper()}: {count:,}", file=sys.stderr)
+    if elapsed > 0:
+        print(f"SCRIPTS PER SECOND: {scripts / elapsed:,.0f}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+WarGames - Search Opponent
+Monte Carlo tree search for WOPR's side of the board
+
+Every simulation replays moves through the real engine (resolve_ai_strike,
+ai_diplomacy, ai_stand_down and a player model), so hit chances and tension
+swings are exactly the game's own. Nodes live in a transposition table
+keyed by position: destroyed cities, missile stocks, operational bases,
+tension, DEFCON and turn. Radiation is left out; it is a random reading
+that never changes the play, and keying on it kept equal positions from
+ever meeting. The table also carries the tree over from one turn to the
+next. Each decision stops at a hard wall-clock budget.
+"""
+
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from wargames import (WOPR, CityView, EndReason, GameSnapshot, PlayerPolicy,
+                      wopr_policy)
+
+# A search move: ("strike", city index), ("posture", None) or ("diplomacy", None)
+Move = Tuple[str, Optional[int]]
+
+# Transposition key: everything in a GameSnapshot that decides the rest of the game
+Position = Tuple[Tuple[bytes, ...], Tuple[bytes, ...], Tuple[bytes, ...], int, int, int, Optional[str]]
+
+def position(game: WOPR) -> Position:
+    """The game's transposition key, without the radiation readings"""
+    countries = tuple(game.cities)
+    return (
+        tuple(bytes(game.cities[country].destroyed) for country in countries),
+        tuple(game.missile_bases[country].missiles.tobytes() for country in countries),
+        tuple(bytes(game.missile_bases[country].operational) for country in countries),
+        game.global_tension,
+        game.defcon_level,
+        game.turn_count,
+        game.player_country,
+    )
+
+class Node:
+    """Visit statistics for one AI decision point"""
+    __slots__ = ("visits", "moves", "stats")
+    
+    def __init__(self, moves: List[Move]):
+        self.visits = 0
+        self.moves = moves
+        # move -> [visits, total value]
+        self.stats: Dict[Move, List[float]] = {move: [0, 0.0] for move in moves}
+
+class SearchAI:
+    """Monte Carlo tree search opponent with a per-move time budget
+
+    Use it as a WOPR ai_policy. Strikes are considered against the
+    `candidates` most valuable intact cities; the player is modelled by
+    `player_model` during search.
+    """
+    
+    def __init__(self, budget_ms: float = 50.0, candidates: int = 5, exploration: float = 1.4,
+                 player_model: PlayerPolicy = wopr_policy, max_table: int = 200000,
+                 seed: Optional[int] = None):
+        self.budget = budget_ms / 1000.0
+        self.candidates = candidates
+        self.exploration = exploration
+        self.player_model = player_model
+        self.max_table = max_table
+        self.rng = random.Random(seed)
+        self.table: Dict[Position, Node] = {}
+        self.scratch: Optional[WOPR] = None
+        self.population = 0
+        self.last_simulations = 0
+        
+    def __call__(self, wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+        deadline = time.perf_counter() + self.budget
+        if self.scratch is None or self.scratch.world is not wopr.world or self.scratch.rules != wopr.rules:
+            self.scratch = WOPR(self.rng, wopr.world, rules=wopr.rules)
+            self.population = sum(sum(side.population) for side in wopr.world.sides.values())
+            self.table.clear()
+        if len(self.table) > self.max_table:
+            self.table.clear()
+            
+        root_state = wopr.snapshot()
+        root_key = position(wopr)
+        root = self.table.get(root_key)
+        if root is None:
+            self.scratch.restore(root_state)
+            root = self.expand(root_key, self.scratch)
+            
+        simulations = 0
+        while time.perf_counter() < deadline:
+            self.simulate(root_state, root, deadline)
+            simulations += 1
+        self.last_simulations = simulations
+        
+        if not root.visits:
+            # Out of time before a single playout: fall back to the classic bands
+            return wopr.ai_decide(), None
+        action, index = max(root.moves, key=lambda move: root.stats[move][0])
+        if action == "strike":
+            strike = "retaliate" if wopr.global_tension > wopr.rules.high_tension else "preempt"
+            return strike, wopr.cities[wopr.player_country][index]
+        return action, None
+        
+    def expand(self, key: Position, game: WOPR) -> Node:
+        """Create the node for a state the search has not seen yet"""
+        moves: List[Move] = [("strike", city.index)
+                             for city in game.targets[game.player_country].top(self.candidates)]
+        moves += [("posture", None), ("diplomacy", None)]
+        node = Node(moves)
+        self.table[key] = node
+        return node
+        
+    def select(self, node: Node) -> Move:
+        """UCT choice, trying every move once first"""
+        best, best_score = None, -math.inf
+        log_visits = math.log(node.visits + 1)
+        for move in node.moves:
+            visits, total = node.stats[move]
+            if not visits:
+                return move
+            score = total / visits + self.exploration * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best, best_score = move, score
+        return best
+        
+    def simulate(self, root_state: GameSnapshot, root: Node, deadline: float):
+        """One selection, expansion, rollout and backup pass"""
+        game = self.scratch
+        game.restore(root_state)
+        path = []
+        node = root
+        while True:
+            move = self.select(node)
+            path.append((node, move))
+            reason = self.apply(game, move)
+            if reason is not None:
+                value = self.value(game, reason)
+                break
+            key = position(game)
+            child = self.table.get(key)
+            if child is None:
+                self.expand(key, game)
+                value = self.value(game, self.rollout(game, deadline))
+                break
+            node = child
+            
+        for node, move in path:
+            node.visits += 1
+            stats = node.stats[move]
+            stats[0] += 1
+            stats[1] += value
+            
+    def apply(self, game: WOPR, move: Move) -> Optional[EndReason]:
+        """Play an AI move, then the player model's reply, through the engine"""
+        action, index = move
+        if action == "strike":
+            target_city = game.cities[game.player_country][index]
+            if not target_city.destroyed:
+                game.resolve_ai_strike(target_city)
+        elif action == "diplomacy":
+            game.ai_diplomacy()
+        else:
+            game.ai_stand_down(action)
+        reason = game.end_condition()
+        if reason is not None:
+            return reason
+        game.next_turn()
+        return self.player_reply(game)
+        
+    def player_reply(self, game: WOPR) -> Optional[EndReason]:
+        """The modelled player's move and the end check that follows it"""
+        action, target_city = self.player_model(game)
+        if not game.player_step(action, target_city):
+            return EndReason.SURRENDER if action == "surrender" else EndReason.EXIT
+        return game.end_condition()
+        
+    def rollout(self, game: WOPR, deadline: float) -> Optional[EndReason]:
+        """Finish the game with the classic AI and the player model
+        
+        Stops early with None when the move budget runs out mid-rollout.
+        """
+        while time.perf_counter() < deadline:
+            game.ai_step()
+            reason = game.end_condition()
+            if reason is not None:
+                return reason
+            game.next_turn()
+            reason = self.player_reply(game)
+            if reason is not None:
+                return reason
+        return None
+        
+    def value(self, game: WOPR, reason: Optional[EndReason]) -> float:
+        """Score a game from the AI's side, in [-1, 1]"""
+        winner = game.winner(reason) if reason is not None else None
+        if winner == game.ai_country:
+            return 1.0
+        if winner == game.player_country:
+            return -1.0
+        margin = game.casualties[game.player_country] - game.casualties[game.ai_country]
+        return margin / self.population if self.population else 0.0
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+WarGames - Dial-In Server
+Hosts many WOPR terminals from one asyncio event loop
+
+Every connection is a coroutine playing its own WOPR, with the Session as
+the game's renderer. WOPR's screens and rules are used as they are: the
+Session queues their text, typing and pauses, and the coroutine awaits
+only the prompts (run, select_game, player_turn, ... below mirror WOPR's
+loops around them). Before each prompt the queued output is written, with
+the pauses and typing as awaited sleeps, so an idle or typing session
+costs a few kilobytes and no thread. All sessions share one read-only
+World.
+
+Try it with any telnet-style client:
+
+    python3 server.py --port 2323
+    telnet localhost 2323
+"""
+
+import asyncio
+import random
+import re
+from typing import List, Optional, Tuple
+
+from renderers import Renderer
+from wargames import (AGAIN_PROMPT, MENU_PROMPT, SALVO_PROMPT, SIDE_PROMPT, TARGET_PROMPT, WOPR,
+                      GameState, World)
+
+# Longest input line the server will read; anything longer is invalid input
+LINE_LIMIT = 1024
+
+# Telnet option negotiation (IAC WILL/WONT/DO/DONT x, IAC SB ... SE, other IAC x)
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff\xfa.*?\xff\xf0|\xff[\xf0-\xff]", re.S)
+
+class Disconnected(Exception):
+    """The remote terminal hung up or went idle"""
+
+class Session(Renderer):
+    """One dial-in terminal playing against its own WOPR, and that WOPR's renderer"""
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 world: World, pace: float = 1.0, idle_timeout: Optional[float] = 600.0):
+        super().__init__()
+        self.reader = reader
+        self.writer = writer
+        self.pace = pace
+        self.idle_timeout = idle_timeout
+        # (text, seconds to wait after it) not yet sent
+        self.output: List[Tuple[str, float]] = []
+        self.wopr = WOPR(random.Random(), world, renderer=self)
+    
+    # Renderer interface: WOPR's output is queued, to be sent by send_output()
+    
+    def write(self, text: str):
+        self.output.append((text, 0.0))
+    
+    def type(self, text: str, delay: float = 0.05):
+        if not self.pace:
+            self.write(text)
+            return
+        self.output.extend((char, delay * self.pace) for char in text)
+    
+    def pause(self, seconds: float):
+        if self.pace:
+            self.output.append(("", seconds * self.pace))
+    
+    def flush(self):
+        pass
+    
+    def read_line(self, prompt: str) -> str:
+        raise RuntimeError("dial-in sessions await their prompts; see Session.prompt")
+    
+    # The connection
+    
+    async def send(self, text: str):
+        """Write to the connection, noticing when the other end has gone"""
+        if self.writer.is_closing():
+            raise Disconnected
+        self.writer.write(text.replace("\n", "\r\n").encode("utf-8"))
+        await self.writer.drain()
+    
+    async def send_output(self):
+        """Send the queued output, sleeping through its typing and pauses"""
+        output, self.output = self.output, []
+        chunk = []
+        for text, wait in output:
+            chunk.append(text)
+            if wait:
+                await self.send("".join(chunk))
+                chunk.clear()
+                await asyncio.sleep(wait)
+        if chunk:
+            await self.send("".join(chunk))
+    
+    async def receive(self) -> bytes:
+        """One line from the terminal; a line over LINE_LIMIT comes back empty"""
+        overlong = False
+        while True:
+            try:
+                raw = await self.reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as error:
+                raw = error.partial
+            except asyncio.LimitOverrunError as error:
+                # Throw the line away up to its newline, however long it runs
+                await self.reader.readexactly(error.consumed)
+                overlong = True
+                continue
+            if not raw:
+                raise Disconnected
+            return b"" if overlong else raw
+    
+    async def prompt(self, text: str) -> str:
+        """Show a prompt after the queued output and wait for one line of input"""
+        self.write(text)
+        await self.send_output()
+        try:
+            raw = await asyncio.wait_for(self.receive(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            raise Disconnected from None
+        return TELNET_COMMAND.sub(b"", raw).decode("utf-8", "replace").strip()
+    
+    # WOPR's interactive loops, awaiting each answer
+    
+    async def run(self):
+        """WOPR.run for this connection"""
+        wopr = self.wopr
+        try:
+            wopr.display_intro()
+            while True:
+                wopr.display_menu()
+                if not await self.select_game():
+                    break
+                play_again = (await self.prompt(AGAIN_PROMPT)).upper()
+                if play_again != 'Y':
+                    break
+            wopr.log_off()
+            await self.send_output()
+        except (Disconnected, ConnectionError):
+            pass
+        finally:
+            self.writer.close()
+    
+    async def select_game(self) -> bool:
+        """WOPR.select_game"""
+        wopr = self.wopr
+        while True:
+            stay, selected_game = wopr.menu_choice(await self.prompt(MENU_PROMPT))
+            if not stay:
+                return False
+            if selected_game is None:
+                continue
+            if selected_game == "Global Thermonuclear War":
+                return await self.start_nuclear_war()
+            scenario = wopr.load_scenario(selected_game)
+            if scenario is not None:
+                with wopr.theatre(scenario):
+                    return await self.start_nuclear_war(scenario)
+    
+    async def start_nuclear_war(self, scenario=None) -> bool:
+        """WOPR.start_nuclear_war"""
+        self.wopr.brief(scenario)
+        while not self.wopr.choose_side(await self.prompt(SIDE_PROMPT)):
+            pass
+        return await self.run_simulation()
+    
+    async def run_simulation(self) -> bool:
+        """WOPR.run_simulation"""
+        wopr = self.wopr
+        wopr.commence_simulation()
+        while wopr.state == GameState.SIMULATION:
+            wopr.show_turn()
+            if not await self.player_turn():
+                wopr.quit_simulation()
+                break
+            wopr.finish_turn()
+        return wopr.game_over()
+    
+    async def player_turn(self) -> bool:
+        """WOPR.player_turn; strikes and salvos ask a further question"""
+        wopr = self.wopr
+        wopr.command_options()
+        while True:
+            choice = await self.prompt(wopr.command_prompt())
+            if choice == "1":
+                return await self.launch_strike()
+            if choice == "7":
+                return await self.launch_salvo()
+            result = wopr.command(choice)
+            if result is not None:
+                return result
+    
+    async def launch_strike(self) -> bool:
+        """WOPR.launch_strike for the player"""
+        wopr = self.wopr
+        available_cities = wopr.strike_targets(wopr.player_country, wopr.ai_country)
+        if not available_cities:
+            return True
+        return wopr.strike_choice(wopr.player_country, available_cities, await self.prompt(TARGET_PROMPT))
+    
+    async def launch_salvo(self) -> bool:
+        """WOPR.launch_salvo for the player"""
+        return self.wopr.salvo_order(self.wopr.player_country, await self.prompt(SALVO_PROMPT))
+
+class WOPRServer:
+    """TCP server handing every connection its own Session"""
+    
+    def __init__(self, world: Optional[World] = None, pace: float = 1.0,
+                 idle_timeout: Optional[float] = 600.0, max_sessions: int = 10000):
+        self.world = world if world is not None else WOPR().world
+        self.pace = pace
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions = 0
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Connection callback for asyncio.start_server"""
+        if self.sessions >= self.max_sessions:
+            writer.write(b"ALL LINES BUSY - PLEASE TRY AGAIN LATER\r\n")
+            writer.close()
+            return
+        self.sessions += 1
+        try:
+            await Session(reader, writer, self.world, self.pace, self.idle_timeout).run()
+        finally:
+            self.sessions -= 1
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 2323) -> asyncio.AbstractServer:
+        """Start listening; the returned server is already serving"""
+        return await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+    
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 2323):
+        """Listen until cancelled"""
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Host WOPR terminals over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--pace", type=float, default=1.0,
+                        help="scale for typing and pauses; 0 disables them")
+    parser.add_argument("--idle-timeout", type=float, default=600.0,
+                        help="seconds to wait for input before hanging up")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    args = parser.parse_args()
+    
+    world = None
+    if args.world:
+        from world import load_world
+        world = load_world(args.world)
+    
+    server = WOPRServer(world, args.pace, args.idle_timeout, args.max_sessions)
+    print(f"WOPR ONLINE AT {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nCONNECTION TERMINATED")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+WarGames - Exact Outcome Solver
+Computes the outcome distribution of a game by dynamic programming instead
+of sampling
+
+Hit chances never depend on which city is targeted, so a game factors into
+two chains that are solved separately and then combined exactly:
+
+* The round chain tracks (tension, hits on each side) turn by turn under the
+  built-in AI bands and an exact player policy. Probability mass that lands
+  on the same canonical key is merged; tension is capped once it can no
+  longer fall back into the medium band before the turn limit, since every
+  higher value plays out the same.
+* The damage chain gives the expected casualties after k noisy-max hits on
+  one side. It is memoized on the ordered (strategic value, population)
+  pairs of the intact cities, so positions that differ only in which of
+  two identical cities was lost collapse into one entry.
+
+Missile stocks are not modelled. The solver refuses worlds where a side
+could run out within the turn limit, which never happens in the built-in
+Global Thermonuclear War scenario.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from wargames import DEFAULT_RULES, TARGET_NOISE, WOPR, EndReason, Rules, World
+
+# Intact cities of one side, in list order: ((strategic_value, population), ...)
+Cities = Tuple[Tuple[int, int], ...]
+
+# (tension, hits on the player, hits on the AI) -> probability
+Distribution = Dict[Tuple[int, int, int], float]
+
+# An exact player policy maps tension and the rules to [(probability, action)],
+# with action one of "strike", "defend" or "negotiate"; strikes use noisy max
+# targeting like WOPR.choose_target. Like the built-in policies it must act
+# the same at every tension above rules.high_tension.
+ExactPolicy = Callable[[int, Rules], List[Tuple[float, str]]]
+
+# Most tension each player action can remove in one move
+ACTION_RELIEF = {"strike": 0, "defend": 10, "negotiate": 30}
+
+def exact_wopr_policy(tension: int, rules: Rules = DEFAULT_RULES) -> List[Tuple[float, str]]:
+    """wargames.wopr_policy as a distribution"""
+    if tension > rules.high_tension:
+        return [(rules.retaliation_chance, "strike"), (1 - rules.retaliation_chance, "defend")]
+    if tension > rules.medium_tension:
+        return [(1 / 3, "strike"), (1 / 3, "defend"), (1 / 3, "negotiate")]
+    return [(1.0, "defend")]
+
+def exact_hawk_policy(tension: int, rules: Rules = DEFAULT_RULES) -> List[Tuple[float, str]]:
+    """wargames.hawk_policy as a distribution"""
+    return [(1.0, "strike")]
+
+def exact_dove_policy(tension: int, rules: Rules = DEFAULT_RULES) -> List[Tuple[float, str]]:
+    """wargames.dove_policy as a distribution"""
+    return [(1.0, "negotiate")]
+
+EXACT_POLICIES: Dict[str, ExactPolicy] = {
+    "wopr": exact_wopr_policy,
+    "hawk": exact_hawk_policy,
+    "dove": exact_dove_policy,
+}
+
+@dataclass
+class Solution:
+    """Exact outcome probabilities and expectations for one matchup"""
+    player_country: str
+    ai_country: str
+    outcomes: Dict[str, float]             # keyed like wargames.summarize
+    expected_casualties: Dict[str, float]
+    expected_cities_destroyed: Dict[str, float]
+    expected_turns: float
+    states: int
+    
+    def probability(self, key: str) -> float:
+        """P(outcome), e.g. probability("USA WINS") or probability("TIME_LIMIT")"""
+        return self.outcomes.get(key, 0.0)
+
+def uniform(low: int, high: int) -> List[Tuple[float, int]]:
+    """randint(low, high) as [(probability, value)]"""
+    weight = 1.0 / (high - low + 1)
+    return [(weight, value) for value in range(low, high + 1)]
+
+@lru_cache(maxsize=None)
+def target_distribution(values: Tuple[int, ...]) -> Tuple[float, ...]:
+    """P(each city is picked) by max(strategic_value + randint(0, TARGET_NOISE))
+    
+    City i wins with score s when every earlier city scores below s and
+    every later city scores at most s, since max() keeps the first maximum.
+    """
+    faces = TARGET_NOISE + 1
+    
+    def at_most(value: int, score: int) -> float:
+        return min(max(score - value + 1, 0), faces) / faces
+    
+    chances = []
+    for i, value in enumerate(values):
+        chance = 0.0
+        for score in range(value, value + faces):
+            p = 1.0 / faces
+            for j, other in enumerate(values):
+                if j < i:
+                    p *= at_most(other, score - 1)
+                elif j > i:
+                    p *= at_most(other, score)
+                if not p:
+                    break
+            chance += p
+        chances.append(chance)
+    return tuple(chances)
+
+@lru_cache(maxsize=None)
+def expected_damage(cities: Cities, hits: int) -> float:
+    """Expected population lost to the next `hits` noisy-max hits on these cities"""
+    if not hits or not cities:
+        return 0.0
+    total = 0.0
+    for i, chance in enumerate(target_distribution(tuple(value for value, _ in cities))):
+        if chance:
+            total += chance * (cities[i][1] + expected_damage(cities[:i] + cities[i + 1:], hits - 1))
+    return total
+
+class ExactSolver:
+    """Turn-by-turn distribution of a game under an exact player policy"""
+    
+    def __init__(self, policy: ExactPolicy, player_country: str = "USA",
+                 world: Optional[World] = None, rules: Optional[Rules] = None):
+        world = world if world is not None else WOPR().world
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.policy = policy
+        self.player_country = player_country
+        self.ai_country = "USSR" if player_country == "USA" else "USA"
+        self.cities = {country: tuple(zip(world.sides[country].strategic_value,
+                                          world.sides[country].population))
+                       for country in (self.player_country, self.ai_country)}
+        self.check_missiles(world)
+        # While tension is in the high band the AI can only lower it by 5 a round
+        high = self.rules.high_tension + 1
+        self.relief = max(ACTION_RELIEF[action] for _, action in policy(high, self.rules)) + 5
+        self.states = 0
+    
+    def check_missiles(self, world: World):
+        """Reject worlds where running out of missiles could end the game"""
+        for country in (self.player_country, self.ai_country):
+            side = world.sides[country]
+            stock = sum(m for m, up in zip(side.base_missiles, side.base_operational) if up)
+            # The player spends at most 3 missiles per strike; the AI spends none
+            spend = 3 * (self.rules.turn_limit + 1) if country == self.player_country else 0
+            if stock <= spend:
+                raise ValueError(f"{country} could run out of missiles; the exact solver "
+                                 "does not model missile exhaustion")
+    
+    def cap(self, turn: int, tension: int) -> int:
+        """Canonical tension: values that stay in the high band to the end are all alike"""
+        return min(tension, self.rules.high_tension + 1 + self.relief * (self.rules.turn_limit - turn + 1))
+    
+    def solve(self) -> Solution:
+        """Run the round chain to the turn limit and combine it with the damage chain"""
+        player_cities = len(self.cities[self.player_country])
+        ai_cities = len(self.cities[self.ai_country])
+        # (reason, player hits, AI hits) -> probability
+        finished: Dict[Tuple[EndReason, int, int], float] = {}
+        expected_turns = 0.0
+        
+        def settle(states: Distribution, turn: int):
+            """end_condition: move finished games out of `states`"""
+            nonlocal expected_turns
+            for key in list(states):
+                _, player_hits, ai_hits = key
+                wiped = (player_hits >= player_cities, ai_hits >= ai_cities)
+                if all(wiped):
+                    reason = EndReason.MUTUAL_DESTRUCTION
+                elif any(wiped):
+                    reason = EndReason.ELIMINATION
+                elif turn >= self.rules.turn_limit:
+                    reason = EndReason.TIME_LIMIT
+                else:
+                    continue
+                p = states.pop(key)
+                end = (reason, player_hits, ai_hits)
+                finished[end] = finished.get(end, 0.0) + p
+                expected_turns += p * turn
+        
+        states: Distribution = {(0, 0, 0): 1.0}
+        turn = 0
+        while states:
+            self.states += len(states)
+            states = self.player_move(states, turn)
+            settle(states, turn)
+            self.states += len(states)
+            states = self.ai_move(states, turn)
+            settle(states, turn)
+            turn += 1
+        
+        return self.combine(finished, expected_turns)
+    
+    def player_move(self, states: Distribution, turn: int) -> Distribution:
+        """Distribution after the player's move"""
+        after: Distribution = {}
+        
+        def put(p: float, tension: int, player_hits: int, ai_hits: int):
+            key = (self.cap(turn, tension), player_hits, ai_hits)
+            after[key] = after.get(key, 0.0) + p
+        
+        hit = self.rules.player_hit_chance
+        talks = self.rules.negotiation_chance
+        for (tension, player_hits, ai_hits), p_state in states.items():
+            for p_action, action in self.policy(tension, self.rules):
+                p = p_state * p_action
+                if action == "strike":
+                    put(p * (1 - hit), tension, player_hits, ai_hits)
+                    for p_rise, rise in uniform(15, 25):
+                        put(p * hit * p_rise, tension + rise, player_hits, ai_hits + 1)
+                elif action == "defend":
+                    for p_drop, drop in uniform(5, 10):
+                        put(p * p_drop, max(0, tension - drop), player_hits, ai_hits)
+                elif action == "negotiate":
+                    for p_drop, drop in uniform(20, 30):
+                        put(p * talks * p_drop, max(0, tension - drop), player_hits, ai_hits)
+                    for p_rise, rise in uniform(5, 10):
+                        put(p * (1 - talks) * p_rise, tension + rise, player_hits, ai_hits)
+                else:
+                    raise ValueError(f"exact policies cannot {action}")
+        return after
+    
+    def ai_move(self, states: Distribution, turn: int) -> Distribution:
+        """Distribution after ai_decide and the AI's response"""
+        after: Distribution = {}
+        
+        def put(p: float, tension: int, player_hits: int, ai_hits: int):
+            key = (self.cap(turn + 1, tension), player_hits, ai_hits)
+            after[key] = after.get(key, 0.0) + p
+        
+        rules = self.rules
+        
+        def strike(p: float, tension: int, player_hits: int, ai_hits: int):
+            put(p * (1 - rules.ai_hit_chance), tension, player_hits, ai_hits)
+            for p_rise, rise in uniform(20, 30):
+                put(p * rules.ai_hit_chance * p_rise, tension + rise, player_hits + 1, ai_hits)
+        
+        for (tension, player_hits, ai_hits), p in states.items():
+            if tension > rules.high_tension:
+                strike(p * rules.retaliation_chance, tension, player_hits, ai_hits)
+                put(p * (1 - rules.retaliation_chance), max(0, tension - 5), player_hits, ai_hits)
+            elif tension > rules.medium_tension:
+                third = p / 3
+                strike(third, tension, player_hits, ai_hits)
+                put(third, tension - 3, player_hits, ai_hits)
+                for p_drop, drop in uniform(10, 15):
+                    put(third * rules.diplomacy_chance * p_drop, tension - drop, player_hits, ai_hits)
+                put(third * (1 - rules.diplomacy_chance), tension, player_hits, ai_hits)
+            else:
+                put(p, max(0, tension - 2), player_hits, ai_hits)
+        return after
+    
+    def combine(self, finished: Dict[Tuple[EndReason, int, int], float],
+                expected_turns: float) -> Solution:
+        """Fold the damage chain into the finished games"""
+        outcomes: Dict[str, float] = {}
+        casualties = {self.player_country: 0.0, self.ai_country: 0.0}
+        destroyed = {self.player_country: 0.0, self.ai_country: 0.0}
+        for (reason, player_hits, ai_hits), p in finished.items():
+            if reason == EndReason.ELIMINATION:
+                lost = player_hits >= len(self.cities[self.player_country])
+                key = f"{self.ai_country if lost else self.player_country} WINS"
+            else:
+                key = reason.value.upper()
+            outcomes[key] = outcomes.get(key, 0.0) + p
+            for country, hits in ((self.player_country, player_hits), (self.ai_country, ai_hits)):
+                casualties[country] += p * expected_damage(self.cities[country], hits)
+                destroyed[country] += p * hits
+        return Solution(
+            player_country=self.player_country,
+            ai_country=self.ai_country,
+            outcomes=outcomes,
+            expected_casualties=casualties,
+            expected_cities_destroyed=destroyed,
+            expected_turns=expected_turns,
+            states=self.states,
+        )
+
+def solve(policy: str = "wopr", player_country: str = "USA",
+          world: Optional[World] = None, rules: Optional[Rules] = None) -> Solution:
+    """Exact outcome distribution for a registered player policy"""
+    return ExactSolver(EXACT_POLICIES[policy], player_country, world, rules).solve()
+
+def main():
+    """Command line entry point"""
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description="Solve Global Thermonuclear War exactly")
+    parser.add_argument("--policy", choices=sorted(EXACT_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    solution = solve(args.policy, args.side)
+    elapsed = time.perf_counter() - start
+    
+    for outcome, p in sorted(solution.outcomes.items()):
+        print(f"  {outcome}: {p:.6%}")
+    for country in (solution.player_country, solution.ai_country):
+        print(f"EXPECTED {country} CASUALTIES: {solution.expected_casualties[country]:,.0f}")
+    print(f"EXPECTED TURNS: {solution.expected_turns:.4f}")
+    print(f"STATES: {solution.states:,} IN {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+WarGames - Parameter Sweeps
+Plays the same games under a grid of Rules and reports how the outcomes move
+
+* Common random numbers: game g of every point is seeded with
+  shard_seed(seed, g), so points differ only through their rules and each
+  point is compared with the baseline (the first point) game by game.
+  Paired differences have far less variance than two independent runs.
+* Content-addressed cache: every block of games is stored under the SHA-256
+  of everything that determines it (rules, policy, side, world, seed, block
+  and engine version). Re-runs, extra points and a larger --games only
+  play the blocks that are missing.
+* Blocks are independent tasks on a process pool. Idle workers take the
+  next block from the shared queue, so points with long stalemates never
+  keep the other workers waiting.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from montecarlo import resolve_policy, shard_seed, shared_world
+from results import ResultStats, RunningStats
+from wargames import DEFAULT_RULES, PLAYER_POLICIES, WOPR, Rules
+
+# Bump when a rules change makes cached blocks stale
+ENGINE_VERSION = 1
+DEFAULT_BLOCK_SIZE = 1000
+DEFAULT_CACHE = os.path.join(".wopr-cache", "sweep")
+
+# Per-game columns kept for the paired comparisons
+PAIRED = ("win", "casualties", "turns")
+
+# One block of games: its statistics and its per-game PAIRED columns
+Block = Tuple[ResultStats, Dict[str, array]]
+
+class ResultCache:
+    """Pickled blocks on disk, addressed by the hash of their inputs"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".pkl")
+    
+    def get(self, key: str) -> Optional[Block]:
+        try:
+            with open(self.path(key), "rb") as handle:
+                return pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+    
+    def put(self, key: str, block: Block):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so an interrupted sweep never leaves half a block
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            pickle.dump(block, handle, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+def world_digest(world_path: Optional[str]) -> str:
+    """Identify a world by content, so renamed files still hit the cache"""
+    if world_path is None:
+        return "builtin"
+    with open(world_path, "rb") as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+def block_key(rules: Rules, policy: str, player_country: str, world: str,
+              seed: int, start: int, count: int) -> str:
+    """Cache key of one block of games"""
+    spec = {
+        "engine": ENGINE_VERSION,
+        "rules": rules.as_dict(),
+        "policy": policy,
+        "side": player_country,
+        "world": world,
+        "seed": seed,
+        "start": start,
+        "count": count,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+def play_block(rules: Rules, policy: str, player_country: str, seed: int,
+               start: int, count: int, world_path: Optional[str] = None) -> Block:
+    """Play games start .. start+count-1, each from its own common seed"""
+    wopr = WOPR(random.Random(), shared_world(world_path), rules=rules)
+    player_policy = resolve_policy(policy)
+    stats = ResultStats()
+    columns = {"win": array("b"), "casualties": array("q"), "turns": array("H")}
+    for game in range(start, start + count):
+        wopr.rng.seed(shard_seed(seed, game))
+        result = wopr.play_headless(player_policy, player_country)
+        stats.add(result)
+        columns["win"].append(result.winner == player_country)
+        columns["casualties"].append(sum(result.casualties.values()))
+        columns["turns"].append(result.turns)
+    return stats, columns
+
+@dataclass
+class PointResult:
+    """Everything measured at one sweep point"""
+    rules: Rules
+    stats: ResultStats = field(default_factory=ResultStats)
+    # Per-game value minus the baseline's value for the same game; empty for the baseline
+    paired: Dict[str, RunningStats] = field(default_factory=lambda: {name: RunningStats() for name in PAIRED})
+    cached_blocks: int = 0
+    played_blocks: int = 0
+    
+    def win_rate(self, country: str) -> float:
+        return self.stats.outcomes.get(f"{country} WINS", 0) / self.stats.games if self.stats.games else 0.0
+
+def parse_value(name: str, text: str):
+    """Convert one grid value to the type of the Rules field"""
+    default = getattr(DEFAULT_RULES, name)
+    if isinstance(default, tuple):
+        return tuple(int(part) for part in text.split("/"))
+    return type(default)(text)
+
+def parse_axis(spec: str) -> Tuple[str, list]:
+    """NAME=a,b,c for a list of values or NAME=low:high:steps for an even range"""
+    name, _, values = spec.partition("=")
+    names = [f.name for f in fields(Rules)]
+    if name not in names:
+        raise ValueError(f"unknown rule {name!r}; choose from {', '.join(names)}")
+    if values.count(":") == 2:
+        low, high, steps = values.split(":")
+        low, high, steps = float(low), float(high), int(steps)
+        points = [low + (high - low) * i / max(steps - 1, 1) for i in range(steps)]
+        if isinstance(getattr(DEFAULT_RULES, name), int):
+            return name, sorted(set(round(point) for point in points))
+        return name, [round(point, 6) for point in points]
+    return name, [parse_value(name, value) for value in values.split(",")]
+
+def grid(axes: Sequence[Tuple[str, list]], base: Rules = DEFAULT_RULES) -> List[Rules]:
+    """Every combination of axis values applied to base"""
+    names = [name for name, _ in axes]
+    return [replace(base, **dict(zip(names, values)))
+            for values in itertools.product(*(values for _, values in axes))]
+
+def sweep(points: Sequence[Rules], games: int, seed: int = 0, policy: str = "wopr",
+          player_country: str = "USA", workers: Optional[int] = None,
+          block_size: int = DEFAULT_BLOCK_SIZE, cache_dir: Optional[str] = DEFAULT_CACHE,
+          world_path: Optional[str] = None, common: bool = True) -> List[PointResult]:
+    """Play `games` games at every point and compare each point with points[0]
+    
+    With common=False each point gets its own seeds, which is only useful to
+    see how much common random numbers narrow the paired intervals.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    world = world_digest(world_path)
+    results = [PointResult(rules) for rules in points]
+    seeds = [seed if common else shard_seed(seed, -1 - index) for index in range(len(points))]
+    blocks = [(start, min(block_size, games - start)) for start in range(0, games, block_size)]
+    
+    # Columns waiting for their partner block: block -> point -> columns
+    waiting: Dict[int, Dict[int, Dict[str, array]]] = {}
+    compared: Dict[int, int] = {}
+    
+    def finish(point: int, block: int, done: Block):
+        stats, columns = done
+        results[point].stats.merge(stats)
+        pending = waiting.setdefault(block, {})
+        pending[point] = columns
+        if 0 not in pending:
+            return
+        baseline = pending[0]
+        for other in [index for index in pending if index]:
+            columns = pending.pop(other)
+            for name in PAIRED:
+                paired = results[other].paired[name]
+                for value, base in zip(columns[name], baseline[name]):
+                    paired.add(value - base)
+            compared[block] = compared.get(block, 0) + 1
+        # The baseline's columns are only needed until every point has been compared
+        if compared.get(block, 0) == len(points) - 1:
+            del waiting[block]
+    
+    # Interleave points within each block so every point fills in evenly
+    tasks = []
+    for block, (start, count) in enumerate(blocks):
+        for point, rules in enumerate(points):
+            key = block_key(rules, policy, player_country, world, seeds[point], start, count)
+            done = cache.get(key) if cache is not None else None
+            if done is not None:
+                results[point].cached_blocks += 1
+                finish(point, block, done)
+            else:
+                tasks.append((point, block, key, (rules, policy, player_country, seeds[point],
+                                                   start, count, world_path)))
+    
+    def played(point: int, block: int, key: str, done: Block):
+        if cache is not None:
+            cache.put(key, done)
+        results[point].played_blocks += 1
+        finish(point, block, done)
+    
+    if workers <= 1 or len(tasks) <= 1:
+        for point, block, key, args in tasks:
+            played(point, block, key, play_block(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(play_block, *args): (point, block, key)
+                       for point, block, key, args in tasks}
+            for future in as_completed(futures):
+                played(*futures[future], future.result())
+    return results
+
+def interval(stats: RunningStats) -> str:
+    """Mean with a 95% confidence half-width"""
+    if not stats.count:
+        return "-"
+    half = 1.96 * stats.stdev / stats.count ** 0.5
+    return f"{stats.mean:,.3f} +/- {half:,.3f}"
+
+def report(results: List[PointResult], player_country: str):
+    """Print one row per point, with differences from the first point"""
+    varying = [f.name for f in fields(Rules)
+               if len({getattr(result.rules, f.name) for result in results}) > 1]
+    header = "".join(f"{name.upper():>20}" for name in varying)
+    print(f"{header}  {'P(WIN)':>8} {'DELTA WIN':>22} {'TURNS':>7} {'DELTA TURNS':>22} "
+          f"{'CASUALTIES':>12} {'BLOCKS':>9}")
+    for result in results:
+        values = "".join(f"{str(getattr(result.rules, name)):>20}" for name in varying)
+        casualties = result.stats.moments["casualties.total"].mean if result.stats.games else 0
+        turns = result.stats.moments["turns"].mean if result.stats.games else 0
+        blocks = f"{result.played_blocks}+{result.cached_blocks}c"
+        print(f"{values}  {result.win_rate(player_country):>8.2%} {interval(result.paired['win']):>22} "
+              f"{turns:>7.2f} {interval(result.paired['turns']):>22} {casualties:>12,.0f} {blocks:>9}")
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Sweep WOPR's rules over a grid of values")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="rule to vary: NAME=a,b,c or NAME=low:high:steps (repeatable)")
+    parser.add_argument("--games", type=int, default=10000, help="games per point")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, metavar="DIR")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--independent", action="store_true",
+                        help="give every point its own seeds instead of common random numbers")
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    args = parser.parse_args()
+    
+    try:
+        points = grid([parse_axis(spec) for spec in args.param])
+    except ValueError as error:
+        parser.error(str(error))
+    
+    start = time.perf_counter()
+    results = sweep(points, args.games, args.seed, args.policy, args.side, args.workers,
+                    args.block_size, None if args.no_cache else args.cache, args.world,
+                    common=not args.independent)
+    elapsed = time.perf_counter() - start
+    
+    report(results, args.side)
+    played = sum(result.played_blocks for result in results)
+    cached = sum(result.cached_blocks for result in results)
+    print(f"\nPOINTS: {len(points)}  BLOCKS PLAYED: {played}  FROM CACHE: {cached}  IN {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+WarGames - Tournaments
+Plays registered policies against each other and ranks them on an Elo ladder
+
+* Every entrant plays both seats. A pairing of A and B is played as seed
+  pairs: game k is played once with A at the keyboard and B as WOPR, and
+  once the other way round, both from shard_seed(seed, k) and from the same
+  side (USA on even k, USSR on odd k). The two entrants face identical
+  dice, and since every pairing uses the same seeds, so does the field.
+* Pairings are split into blocks of seeds, and blocks are independent
+  tasks on a process pool, each cached under the SHA-256 of everything
+  that determines it (see sweep.py). Adding an entrant to a field only
+  plays its new pairings; everything else comes from the cache.
+* Round robin plays every pairing. Swiss plays a few rounds, pairing
+  entrants with similar ratings that have not met yet.
+* The ladder is a Bradley-Terry fit (draws count half) reported on the Elo
+  scale around a field mean of 1500, with 95% intervals from the fit's
+  Fisher information.
+
+Entrants are named from ENTRANTS, optionally with parameters:
+
+    python3 tournament.py
+    python3 tournament.py --add "bands:high=60,medium=30" --add trained
+    python3 tournament.py --entrant stock --entrant cautious --entrant search:budget_ms=2
+    python3 tournament.py --swiss 4
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from montecarlo import shard_seed, shared_world
+from sweep import ENGINE_VERSION, ResultCache, world_digest
+from training import TABLE, PolicyTable
+from wargames import (DEFAULT_RULES, WOPR, CityView, Rules, dove_policy, hawk_policy,
+                      salvo_policy, wopr_policy)
+
+DEFAULT_GAMES = 500
+DEFAULT_BLOCK_SIZE = 250
+DEFAULT_CACHE = os.path.join(".wopr-cache", "tournament")
+SIDES = ("USA", "USSR")
+# Virtual draws added to every pairing, so unbeaten entrants still get a finite rating
+PRIOR_DRAWS = 1.0
+ELO_SCALE = 400 / math.log(10)
+ELO_MEAN = 1500.0
+
+Move = Tuple[str, Optional[CityView]]
+
+# The player seat's command for each AI action
+PLAYER_MOVES = {
+    "retaliate": "strike",
+    "preempt": "strike",
+    "salvo": "salvo",
+    "diplomacy": "negotiate",
+    "posture": "defend",
+    "reinforce": "defend",
+    "ready": "defend",
+}
+
+@dataclass(frozen=True)
+class Stock:
+    """The engine's own play: wopr_policy at the keyboard, ai_decide as WOPR"""
+    
+    def player(self, wopr: WOPR) -> Move:
+        return wopr_policy(wopr)
+    
+    def ai(self, wopr: WOPR) -> Move:
+        return wopr.ai_decide(), None
+
+@dataclass(frozen=True)
+class Fixed:
+    """The same move every turn: strike, salvo, defend or negotiate"""
+    intent: str = "strike"
+    
+    def player(self, wopr: WOPR) -> Move:
+        if self.intent == "strike":
+            return hawk_policy(wopr)
+        if self.intent == "negotiate":
+            return dove_policy(wopr)
+        if self.intent == "salvo":
+            return salvo_policy(wopr)
+        return "defend", None
+    
+    def ai(self, wopr: WOPR) -> Move:
+        return {"strike": "preempt", "negotiate": "diplomacy", "defend": "posture"}.get(
+            self.intent, self.intent), None
+
+@dataclass(frozen=True)
+class Doctrine:
+    """WOPR's tension bands with their own thresholds, targeting and weapon
+    
+    The defaults play exactly like Stock. target picks the city struck:
+    greedy (choose_target, as ai_launch_strike does), top (the most valuable,
+    no noise) or random (any intact city). weapon "salvo" fires an allocated
+    salvo instead of a single missile.
+    """
+    high: int = 70
+    medium: int = 40
+    retaliation: float = 0.7
+    target: str = "greedy"
+    weapon: str = "strike"
+    
+    def band(self, wopr: WOPR) -> str:
+        """strike, hold (stand down in the high band), defend, negotiate or ready"""
+        if wopr.global_tension > self.high:
+            return "strike" if wopr.rng.random() < self.retaliation else "hold"
+        if wopr.global_tension > self.medium:
+            return {"attack": "strike", "defend": "defend", "negotiate": "negotiate"}[
+                wopr.rng.choice(["attack", "defend", "negotiate"])]
+        return "ready"
+    
+    def aim(self, wopr: WOPR, country: str) -> Optional[CityView]:
+        targets = wopr.targets[country]
+        if self.target == "top":
+            top = targets.top(1)
+            return top[0] if top else None
+        if self.target == "random":
+            return targets.cities[targets.intact.find(wopr.rng.randrange(len(targets)))] if targets else None
+        return wopr.choose_target(country)
+    
+    def player(self, wopr: WOPR) -> Move:
+        intent = self.band(wopr)
+        if intent != "strike":
+            return ("negotiate" if intent == "negotiate" else "defend"), None
+        if self.weapon == "salvo":
+            return "salvo", None
+        return "strike", self.aim(wopr, wopr.ai_country)
+    
+    def ai(self, wopr: WOPR) -> Move:
+        intent = self.band(wopr)
+        if intent == "strike":
+            if self.weapon == "salvo":
+                return "salvo", None
+            action = "retaliate" if wopr.global_tension > self.high else "preempt"
+            # A None target lets WOPR choose_target, exactly as ai_decide's strikes do
+            return action, None if self.target == "greedy" else self.aim(wopr, wopr.player_country)
+        return {"hold": "posture", "defend": "reinforce", "negotiate": "diplomacy"}.get(intent, intent), None
+
+class Seated:
+    """Plays an AI policy from either seat
+    
+    At the keyboard the seats are swapped for the duration of the call, so
+    the policy sees the game from its own side, and its action is mapped to
+    the nearest player command (PLAYER_MOVES). The seats are not mirror
+    images (a player strike spends missiles, a posture relieves more
+    tension than a defence), so this is the policy's play, not its equal.
+    """
+    
+    def __init__(self, policy):
+        self.policy = policy
+    
+    def player(self, wopr: WOPR) -> Move:
+        wopr.player_country, wopr.ai_country = wopr.ai_country, wopr.player_country
+        try:
+            action, target_city = self.policy(wopr)
+        finally:
+            wopr.player_country, wopr.ai_country = wopr.ai_country, wopr.player_country
+        command = PLAYER_MOVES.get(action, "defend")
+        if command == "strike" and target_city is None:
+            target_city = wopr.choose_target(wopr.ai_country)
+        return command, target_city
+    
+    def ai(self, wopr: WOPR) -> Move:
+        return self.policy(wopr)
+
+@dataclass(frozen=True)
+class Trained:
+    """The self-play policy table (training.py)"""
+    table: str = TABLE
+    
+    def seated(self) -> Seated:
+        return Seated(PolicyTable.load(self.table))
+
+@dataclass(frozen=True)
+class Search:
+    """The Monte Carlo tree search opponent (search.py); slow and not reproducible"""
+    budget_ms: float = 5.0
+    
+    def seated(self) -> Seated:
+        from search import SearchAI
+        return Seated(SearchAI(budget_ms=self.budget_ms))
+
+# Registered entrants: name -> (kind, parameters). "name:key=value,..." overrides parameters
+ENTRANTS: Dict[str, Tuple[type, Dict[str, object]]] = {
+    "stock": (Stock, {}),
+    "hawk": (Fixed, {"intent": "strike"}),
+    "dove": (Fixed, {"intent": "negotiate"}),
+    "turtle": (Fixed, {"intent": "defend"}),
+    "barrage": (Fixed, {"intent": "salvo"}),
+    "bands": (Doctrine, {}),
+    "cautious": (Doctrine, {"high": 85, "medium": 55}),
+    "aggressive": (Doctrine, {"high": 50, "medium": 25}),
+    "relentless": (Doctrine, {"retaliation": 1.0}),
+    "top-target": (Doctrine, {"target": "top"}),
+    "random-target": (Doctrine, {"target": "random"}),
+    "bands-salvo": (Doctrine, {"weapon": "salvo"}),
+    "trained": (Trained, {}),
+    "search": (Search, {}),
+}
+# The field played when no entrants are named: everything cheap and always available
+DEFAULT_FIELD = [name for name in ENTRANTS if name not in ("trained", "search")]
+
+def parse_entrant(spec: str) -> Tuple[str, type, Dict[str, object]]:
+    """(canonical spec, kind, parameters) for "name" or "name:key=value,...\""""
+    name, _, overrides = spec.partition(":")
+    if name not in ENTRANTS:
+        raise ValueError(f"unknown entrant {name!r}; choose from {', '.join(ENTRANTS)}")
+    kind, parameters = ENTRANTS[name]
+    parameters = dict(parameters)
+    defaults = {f.name: f.default for f in fields(kind)}
+    changed = []
+    for item in filter(None, overrides.split(",")):
+        key, _, value = item.partition("=")
+        if key not in defaults:
+            raise ValueError(f"{name} has no parameter {key!r}; choose from {', '.join(defaults) or 'none'}")
+        parameters[key] = type(defaults[key])(value)
+        changed.append(key)
+    canonical = name
+    if changed:
+        canonical += ":" + ",".join(f"{key}={parameters[key]}" for key in sorted(set(changed)))
+    return canonical, kind, parameters
+
+def build_entrant(spec: str):
+    """An object with player(wopr) and ai(wopr) moves for a spec"""
+    _, kind, parameters = parse_entrant(spec)
+    entrant = kind(**parameters)
+    return entrant.seated() if hasattr(entrant, "seated") else entrant
+
+def entrant_identity(spec: str) -> Dict[str, object]:
+    """What determines an entrant's play, for cache keys; tables count by content"""
+    canonical, kind, parameters = parse_entrant(spec)
+    identity: Dict[str, object] = {"spec": canonical, "parameters": parameters}
+    if kind is Trained:
+        identity["table"] = world_digest(parameters.get("table", Trained.table))
+    return identity
+
+@dataclass
+class Record:
+    """A pairing from its first entrant's side"""
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    played_blocks: int = 0
+    cached_blocks: int = 0
+    
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses + self.draws
+    
+    @property
+    def points(self) -> float:
+        return self.wins + self.draws / 2
+    
+    def add(self, wins: int, losses: int, draws: int):
+        self.wins += wins
+        self.losses += losses
+        self.draws += draws
+    
+    def flipped(self) -> "Record":
+        return Record(self.losses, self.wins, self.draws, self.played_blocks, self.cached_blocks)
+
+def block_key(first: str, second: str, rules: Rules, world: str, seed: int, start: int, count: int) -> str:
+    """Cache key of one block of seed pairs between first and second"""
+    spec = {
+        "engine": ENGINE_VERSION,
+        "first": entrant_identity(first),
+        "second": entrant_identity(second),
+        "rules": rules.as_dict(),
+        "world": world,
+        "seed": seed,
+        "start": start,
+        "count": count,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+# Per-process games and entrants, reused by every block a worker plays
+_arenas: Dict[Tuple[Optional[str], Rules], WOPR] = {}
+_entrants: Dict[str, object] = {}
+
+def play_block(first: str, second: str, seed: int, start: int, count: int,
+               world_path: Optional[str] = None, rules: Rules = DEFAULT_RULES) -> Tuple[int, int, int]:
+    """Play seed pairs start .. start+count-1; return first's (wins, losses, draws)"""
+    key = (world_path, rules)
+    if key not in _arenas:
+        _arenas[key] = WOPR(random.Random(), shared_world(world_path), rules=rules)
+    wopr = _arenas[key]
+    for spec in (first, second):
+        if spec not in _entrants:
+            _entrants[spec] = build_entrant(spec)
+    a, b = _entrants[first], _entrants[second]
+    wins = losses = draws = 0
+    for game in range(start, start + count):
+        game_seed = shard_seed(seed, game)
+        country = SIDES[game % 2]
+        for player, opponent, first_seat in ((a, b, country), (b, a, SIDES[1 - game % 2])):
+            wopr.rng.seed(game_seed)
+            wopr.ai_policy = opponent.ai
+            winner = wopr.play_headless(player.player, country).winner
+            if winner is None:
+                draws += 1
+            elif winner == first_seat:
+                wins += 1
+            else:
+                losses += 1
+    wopr.ai_policy = None
+    return wins, losses, draws
+
+def play_pairings(pairings: Sequence[Tuple[str, str]], games: int = DEFAULT_GAMES, seed: int = 0,
+                  workers: Optional[int] = None, block_size: int = DEFAULT_BLOCK_SIZE,
+                  cache_dir: Optional[str] = DEFAULT_CACHE, world_path: Optional[str] = None,
+                  rules: Rules = DEFAULT_RULES) -> Dict[Tuple[str, str], Record]:
+    """Play `games` seed pairs for every pairing, from the cache where possible"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    world = world_digest(world_path)
+    blocks = [(start, min(block_size, games - start)) for start in range(0, games, block_size)]
+    # Each pairing is played and cached in one orientation, whichever way it was asked for
+    records = {tuple(sorted(pairing)): Record() for pairing in pairings}
+    
+    tasks = []
+    for start, count in blocks:
+        for first, second in records:
+            key = block_key(first, second, rules, world, seed, start, count)
+            done = cache.get(key) if cache is not None else None
+            if done is not None:
+                records[first, second].add(*done)
+                records[first, second].cached_blocks += 1
+            else:
+                tasks.append(((first, second), key, (first, second, seed, start, count, world_path, rules)))
+    
+    def played(pairing: Tuple[str, str], key: str, done: Tuple[int, int, int]):
+        if cache is not None:
+            cache.put(key, done)
+        records[pairing].add(*done)
+        records[pairing].played_blocks += 1
+    
+    if workers <= 1 or len(tasks) <= 1:
+        for pairing, key, args in tasks:
+            played(pairing, key, play_block(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(play_block, *args): (pairing, key) for pairing, key, args in tasks}
+            for future in as_completed(futures):
+                played(*futures[future], future.result())
+    
+    return {(first, second): records[first, second] if first <= second else records[second, first].flipped()
+            for first, second in pairings}
+
+def round_robin(entrants: Sequence[str]) -> List[Tuple[str, str]]:
+    """Every pairing of the field"""
+    return list(itertools.combinations(entrants, 2))
+
+def swiss_round(entrants: Sequence[str], ratings: Dict[str, float],
+                met: Dict[str, set], byes: set) -> List[Tuple[str, str]]:
+    """Pair each entrant, best first, with the next best it has not met yet
+    
+    Unrated entrants count as the field mean. With an odd field the lowest
+    rated entrant that has not sat out yet takes the bye.
+    """
+    waiting = sorted(entrants, key=lambda name: -ratings.get(name, ELO_MEAN))
+    if len(waiting) % 2:
+        bye = ([name for name in waiting if name not in byes] or waiting)[-1]
+        waiting.remove(bye)
+    pairings = []
+    while len(waiting) > 1:
+        first = waiting.pop(0)
+        second = next((name for name in waiting if name not in met[first]), waiting[0])
+        waiting.remove(second)
+        pairings.append((first, second))
+    return pairings
+
+@dataclass
+class Rating:
+    """One entrant's place on the ladder"""
+    name: str
+    elo: float
+    interval: float     # 95% half-width, Elo points
+    points: float
+    games: int
+    opponents: int
+
+def invert(matrix: List[List[float]]) -> List[List[float]]:
+    """Gauss-Jordan inverse of a small, well conditioned matrix"""
+    size = len(matrix)
+    rows = [row[:] + [float(i == j) for j in range(size)] for i, row in enumerate(matrix)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda i: abs(rows[i][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        scale = rows[column][column]
+        rows[column] = [value / scale for value in rows[column]]
+        for i in range(size):
+            if i != column and rows[i][column]:
+                factor = rows[i][column]
+                rows[i] = [value - factor * other for value, other in zip(rows[i], rows[column])]
+    return [row[size:] for row in rows]
+
+def components(games: List[List[float]]) -> List[List[int]]:
+    """Groups of entrants connected by played pairings"""
+    seen: set = set()
+    groups = []
+    for root in range(len(games)):
+        if root in seen:
+            continue
+        seen.add(root)
+        group, stack = [], [root]
+        while stack:
+            i = stack.pop()
+            group.append(i)
+            for j, played in enumerate(games[i]):
+                if played and j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        groups.append(sorted(group))
+    return groups
+
+def bradley_terry(records: Dict[Tuple[str, str], Record], prior: float = PRIOR_DRAWS,
+                  iterations: int = 10000, tolerance: float = 1e-10) -> List[Rating]:
+    """Fit strengths to pairing records by minorize-maximize; best first
+    
+    Each pairing gets `prior` extra draws. Intervals come from the inverse
+    Fisher information of the log strengths (a pseudo-inverse, since only
+    differences are identified), so they are relative to the mean of the
+    entrants connected by played pairings. Ratings in separate groups (early
+    Swiss rounds) are not comparable with each other.
+    """
+    names = sorted({name for pairing in records for name in pairing})
+    index = {name: i for i, name in enumerate(names)}
+    size = len(names)
+    games = [[0.0] * size for _ in range(size)]
+    points = [[0.0] * size for _ in range(size)]
+    real_points = [0.0] * size
+    real_games = [0] * size
+    for (first, second), record in records.items():
+        i, j = index[first], index[second]
+        if i == j:
+            continue
+        total = record.games + 2 * prior
+        games[i][j] += total
+        games[j][i] += total
+        points[i][j] += record.points + prior
+        points[j][i] += record.losses + record.draws / 2 + prior
+        real_points[i] += record.points
+        real_points[j] += record.games - record.points
+        real_games[i] += record.games
+        real_games[j] += record.games
+    
+    strength = [1.0] * size
+    won = [sum(row) for row in points]
+    for _ in range(iterations):
+        updated = [won[i] / sum(games[i][j] / (strength[i] + strength[j]) for j in range(size) if games[i][j])
+                   if any(games[i]) else 1.0 for i in range(size)]
+        mean = math.exp(sum(math.log(value) for value in updated) / size)
+        updated = [value / mean for value in updated]
+        change = max(abs(math.log(new / old)) for new, old in zip(updated, strength))
+        strength = updated
+        if change < tolerance:
+            break
+    
+    # Fisher information of the log strengths: a graph Laplacian weighted by n q (1 - q)
+    information = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(size):
+            if i != j and games[i][j]:
+                q = strength[i] / (strength[i] + strength[j])
+                weight = games[i][j] * q * (1 - q)
+                information[i][j] -= weight
+                information[i][i] += weight
+    # Pseudo-inverse of each connected block of the Laplacian: (L + J/n)^-1 - J/n
+    variance = [0.0] * size
+    for component in components(games):
+        count = len(component)
+        block = invert([[information[i][j] + 1.0 / count for j in component] for i in component])
+        for position, i in enumerate(component):
+            variance[i] = max(0.0, block[position][position] - 1.0 / count)
+    ratings = []
+    for i, name in enumerate(names):
+        ratings.append(Rating(name, ELO_MEAN + ELO_SCALE * math.log(strength[i]),
+                              1.96 * ELO_SCALE * math.sqrt(variance[i]), real_points[i], real_games[i],
+                              sum(1 for j in range(size) if games[i][j])))
+    return sorted(ratings, key=lambda rating: -rating.elo)
+
+def tournament(entrants: Sequence[str], games: int = DEFAULT_GAMES, seed: int = 0,
+               workers: Optional[int] = None, swiss: Optional[int] = None,
+               block_size: int = DEFAULT_BLOCK_SIZE, cache_dir: Optional[str] = DEFAULT_CACHE,
+               world_path: Optional[str] = None, rules: Rules = DEFAULT_RULES
+               ) -> Tuple[List[Rating], Dict[Tuple[str, str], Record]]:
+    """Play a round robin, or `swiss` Swiss rounds, and fit the ladder"""
+    entrants = list(dict.fromkeys(parse_entrant(spec)[0] for spec in entrants))
+    if len(entrants) < 2:
+        raise ValueError("a tournament needs at least two entrants")
+    options = dict(games=games, seed=seed, workers=workers, block_size=block_size,
+                   cache_dir=cache_dir, world_path=world_path, rules=rules)
+    if swiss is None:
+        records = play_pairings(round_robin(entrants), **options)
+        return bradley_terry(records), records
+    
+    records: Dict[Tuple[str, str], Record] = {}
+    met: Dict[str, set] = {name: set() for name in entrants}
+    byes: set = set()
+    ratings: Dict[str, float] = {}
+    for _ in range(swiss):
+        pairings = swiss_round(entrants, ratings, met, byes)
+        byes.update(set(entrants).difference(*pairings))
+        pairings = [pairing for pairing in pairings
+                    if pairing not in records and pairing[::-1] not in records]
+        if not pairings:
+            break
+        records.update(play_pairings(pairings, **options))
+        for first, second in pairings:
+            met[first].add(second)
+            met[second].add(first)
+        ratings = {rating.name: rating.elo for rating in bradley_terry(records)}
+    return bradley_terry(records), records
+
+def report(ratings: List[Rating], records: Dict[Tuple[str, str], Record], show_pairings: bool = False):
+    """Print the ladder, and optionally every pairing"""
+    width = max([len(rating.name) for rating in ratings] + [7])
+    print(f"{'RANK':>4}  {'ENTRANT':<{width}} {'ELO':>7} {'95%':>8} {'SCORE':>7} {'GAMES':>8} {'OPP':>4}")
+    for rank, rating in enumerate(ratings, 1):
+        score = rating.points / rating.games if rating.games else 0.0
+        print(f"{rank:>4}  {rating.name:<{width}} {rating.elo:>7.0f} {f'+/-{rating.interval:.0f}':>8} "
+              f"{score:>7.1%} {rating.games:>8,} {rating.opponents:>4}")
+    if show_pairings:
+        print(f"\n{'PAIRING':<{2 * width + 4}} {'WINS':>7} {'LOSSES':>7} {'DRAWS':>7} {'SCORE':>7}")
+        for (first, second), record in sorted(records.items()):
+            score = record.points / record.games if record.games else 0.0
+            print(f"{first + ' VS ' + second:<{2 * width + 4}} {record.wins:>7,} {record.losses:>7,} "
+                  f"{record.draws:>7,} {score:>7.1%}")
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Rank WOPR policies in a paired-seed tournament")
+    parser.add_argument("--entrant", action="append", default=[], metavar="SPEC",
+                        help="NAME or NAME:KEY=VALUE,... (repeatable; replaces the default field)")
+    parser.add_argument("--add", action="append", default=[], metavar="SPEC",
+                        help="entrant added to the field (repeatable)")
+    parser.add_argument("--swiss", type=int, metavar="ROUNDS", help="play Swiss rounds instead of a round robin")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="seed pairs per pairing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, metavar="DIR")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    parser.add_argument("--pairings", action="store_true", help="also print every pairing's record")
+    parser.add_argument("--list", action="store_true", help="list the registered entrants and exit")
+    args = parser.parse_args()
+    
+    if args.list:
+        for name, (kind, parameters) in ENTRANTS.items():
+            settings = ", ".join(f"{key}={value}" for key, value in parameters.items())
+            print(f"{name:<16} {kind.__name__:<9} {settings}")
+        return
+    
+    start = time.perf_counter()
+    try:
+        ratings, records = tournament((args.entrant or DEFAULT_FIELD) + args.add, args.games, args.seed,
+                                      args.workers, args.swiss, args.block_size,
+                                      None if args.no_cache else args.cache, args.world)
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - start
+    
+    report(ratings, records, args.pairings)
+    played = sum(record.played_blocks for record in records.values())
+    cached = sum(record.cached_blocks for record in records.values())
+    games = sum(record.games for record in records.values())
+    print(f"\nPAIRINGS: {len(records)}  GAMES: {games:,}  BLOCKS PLAYED: {played}  "
+          f"FROM CACHE: {cached}  IN {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
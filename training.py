@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+WarGames - Trained Opponent
+Learns WOPR's side of the game from headless self-play and stores the
+result as a small memory-mapped lookup table
+
+The AI's view of a game is discretized into STATES cells: tension band,
+DEFCON, the share of each side's cities still standing, the share of each
+side's missiles left and the turns remaining. In each cell it picks one of
+ACTIONS: a strike on its best target, an allocated salvo, a defensive
+posture, diplomacy, or holding at readiness.
+
+Training is batched Q-learning. Every round, worker processes map the
+current table, play epsilon-greedy games against a mix of player policies
+and return the Q-learning targets they saw: the final score (1 for a win,
+-1 for a loss, the casualty margin otherwise) for a game's last decision,
+the best known value of the next state for the others. The parent folds
+them into the table and writes it back for the next round, so throughput
+grows with the number of workers.
+
+The table file holds one byte per state with the best action, plus the
+Q values and visit counts that training resumes from:
+
+    magic, u32 header length, JSON header, then 8-byte aligned columns
+    policy  uint8   [STATES]            UNKNOWN where never visited
+    q       float32 [STATES * ACTIONS]
+    visits  uint32  [STATES * ACTIONS]
+
+PolicyTable.load maps it read-only, and a PolicyTable is a WOPR ai_policy:
+each decision is one state index and one byte lookup. States training
+never reached fall back to WOPR's tension bands.
+
+    python3 training.py train --rounds 20 --games 20000
+    python3 training.py evaluate --games 10000
+    python3 wargames.py --ai trained
+"""
+
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from montecarlo import resolve_policy, shard_seed, shared_world
+from wargames import DEFAULT_RULES, WOPR, CityView, Rules, World, self_play
+
+TABLE = "wopr-policy.bin"
+TABLE_MAGIC = b"WOPRPOL1"
+
+ACTIONS = ("strike", "salvo", "posture", "diplomacy", "ready")
+STRIKE, SALVO = 0, 1
+# Policy byte of a state training never reached
+UNKNOWN = 255
+
+# State dimensions: tension in steps of 10 (the last band is open), DEFCON,
+# cities and missiles left per side as shares, turns remaining
+TENSION_BINS = 12
+DEFCON_LEVELS = 5
+CITY_BINS = 5
+MISSILE_BINS = 4
+TURN_BINS = 4
+STATES = TENSION_BINS * DEFCON_LEVELS * CITY_BINS * CITY_BINS * MISSILE_BINS * MISSILE_BINS * TURN_BINS
+
+# Exploration rate for round r: max(EPSILON_FLOOR, EPSILON * EPSILON_DECAY ** r)
+EPSILON = 0.5
+EPSILON_DECAY = 0.85
+EPSILON_FLOOR = 0.05
+# Smallest step a Q value takes towards a round's mean target
+MIN_STEP = 0.05
+OPPONENTS = ("wopr", "hawk", "dove")
+
+class WorldScale:
+    """Per-world totals the state and the score are measured against"""
+    
+    def __init__(self, world: World):
+        self.world = world
+        self.cities = {country: len(side.city_names) for country, side in world.sides.items()}
+        self.missiles = {country: sum(missiles for missiles, operational
+                                      in zip(side.base_missiles, side.base_operational) if operational)
+                         for country, side in world.sides.items()}
+        self.population = sum(sum(side.population) for side in world.sides.values())
+
+def _share(left: int, total: int, bins: int) -> int:
+    """0 for none left, bins - 1 for all of it, evenly between"""
+    if left <= 0 or total <= 0:
+        return 0
+    return 1 + (left * (bins - 2)) // total if left < total else bins - 1
+
+def state_index(wopr: WOPR, scale: WorldScale) -> int:
+    """The AI's discretized view of the game, as an index below STATES"""
+    ai, player = wopr.ai_country, wopr.player_country
+    tension = min(TENSION_BINS - 1, max(0, wopr.global_tension) // 10)
+    limit = wopr.rules.turn_limit
+    turns = min(TURN_BINS - 1, max(0, limit - wopr.turn_count) * TURN_BINS // (limit + 1))
+    index = tension
+    index = index * DEFCON_LEVELS + min(DEFCON_LEVELS, max(1, wopr.defcon_level)) - 1
+    index = index * CITY_BINS + _share(len(wopr.targets[ai]), scale.cities[ai], CITY_BINS)
+    index = index * CITY_BINS + _share(len(wopr.targets[player]), scale.cities[player], CITY_BINS)
+    index = index * MISSILE_BINS + _share(wopr.missile_totals[ai], scale.missiles[ai], MISSILE_BINS)
+    index = index * MISSILE_BINS + _share(wopr.missile_totals[player], scale.missiles[player], MISSILE_BINS)
+    return index * TURN_BINS + turns
+
+def move(wopr: WOPR, action: int) -> Tuple[str, Optional[CityView]]:
+    """The WOPR ai_policy move for an action index"""
+    if action == STRIKE:
+        # WOPR picks the target itself (choose_target)
+        return ("retaliate" if wopr.global_tension > wopr.rules.high_tension else "preempt"), None
+    return ACTIONS[action], None
+
+def score(wopr: WOPR, winner: Optional[str], scale: WorldScale) -> float:
+    """A finished game from the AI's side, in [-1, 1]"""
+    if winner == wopr.ai_country:
+        return 1.0
+    if winner == wopr.player_country:
+        return -1.0
+    margin = wopr.casualties[wopr.player_country] - wopr.casualties[wopr.ai_country]
+    return margin / scale.population if scale.population else 0.0
+
+class PolicyTable:
+    """A learned AI policy: best action per state, with the Q values behind it
+    
+    Use it as a WOPR ai_policy. Loaded tables are read-only views of the
+    mapped file, unmapped by close() or on leaving a with block; empty() and
+    writable() give arrays training can update.
+    """
+    
+    def __init__(self, policy: Sequence[int], q: Sequence[float], visits: Sequence[int],
+                 rules: Optional[Rules] = None, games: int = 0):
+        self.policy = policy
+        self.q = q
+        self.visits = visits
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.games = games
+        self.scale: Optional[WorldScale] = None
+        # The mapping behind a loaded table's columns, and the view they were cut from
+        self.mapped: Optional[mmap.mmap] = None
+        self.view: Optional[memoryview] = None
+    
+    @classmethod
+    def empty(cls, rules: Optional[Rules] = None) -> "PolicyTable":
+        return cls(array("B", bytes([UNKNOWN])) * STATES, array("f", bytes(4 * STATES * len(ACTIONS))),
+                   array("I", bytes(4 * STATES * len(ACTIONS))), rules)
+    
+    @classmethod
+    def load(cls, path: str) -> "PolicyTable":
+        """Map a saved table; its columns are zero-copy views of the file"""
+        with open(path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        if bytes(view[:len(TABLE_MAGIC)]) != TABLE_MAGIC:
+            raise ValueError(f"{path} is not a WOPR policy table")
+        header_length = struct.unpack_from("<I", view, len(TABLE_MAGIC))[0]
+        start = len(TABLE_MAGIC) + 4
+        header = json.loads(bytes(view[start:start + header_length]).rstrip(b"\0 "))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built on a {header['byteorder']}-endian machine")
+        if header["states"] != STATES or header["actions"] != list(ACTIONS):
+            raise ValueError(f"{path} was trained over a different state or action space")
+        base = start + header_length
+        
+        def column(name: str, typecode: str) -> memoryview:
+            offset, length = header["columns"][name]
+            return view[base + offset:base + offset + length].cast(typecode)
+        table = cls(column("policy", "B"), column("q", "f"), column("visits", "I"),
+                    Rules.from_dict(header["rules"]), header["games"])
+        table.mapped, table.view = mapped, view
+        return table
+    
+    def close(self):
+        """Unmap a loaded table; it cannot be played or read afterwards"""
+        if self.mapped is None:
+            return
+        for column in (self.policy, self.q, self.visits):
+            if isinstance(column, memoryview):
+                column.release()
+        self.view.release()
+        self.mapped.close()
+        self.mapped = self.view = None
+    
+    def __enter__(self) -> "PolicyTable":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def writable(self) -> "PolicyTable":
+        """A copy training can update in place"""
+        return PolicyTable(array("B", self.policy), array("f", self.q), array("I", self.visits),
+                           self.rules, self.games)
+    
+    def save(self, path: str):
+        """Write the table atomically, settling the best action of every state"""
+        actions = len(ACTIONS)
+        q, visits = self.q, self.visits
+        policy = array("B", bytes([UNKNOWN])) * STATES
+        for state in range(STATES):
+            row = state * actions
+            best, best_value = UNKNOWN, 0.0
+            for action in range(actions):
+                if visits[row + action] and (best == UNKNOWN or q[row + action] > best_value):
+                    best, best_value = action, q[row + action]
+            policy[state] = best
+        self.policy = policy
+        
+        columns = {}
+        blocks: List[bytes] = []
+        offset = 0
+        for name, data in (("policy", policy.tobytes()), ("q", array("f", q).tobytes()),
+                           ("visits", array("I", visits).tobytes())):
+            columns[name] = [offset, len(data)]
+            blocks.append(data + bytes(-len(data) % 8))
+            offset += len(blocks[-1])
+        header = {"byteorder": sys.byteorder, "states": STATES, "actions": list(ACTIONS),
+                  "rules": self.rules.as_dict(), "games": self.games, "columns": columns}
+        encoded = json.dumps(header).encode("utf-8")
+        padding = bytes(-(len(TABLE_MAGIC) + 4 + len(encoded)) % 8)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(TABLE_MAGIC)
+            handle.write(struct.pack("<I", len(encoded) + len(padding)))
+            handle.write(encoded + padding)
+            for block in blocks:
+                handle.write(block)
+        os.replace(temporary, path)
+    
+    def scale_for(self, world: World) -> WorldScale:
+        if self.scale is None or self.scale.world is not world:
+            self.scale = WorldScale(world)
+        return self.scale
+    
+    def best_value(self, state: int) -> Optional[float]:
+        """Highest Q value among the visited actions of a state"""
+        row = state * len(ACTIONS)
+        values = [self.q[row + action] for action in range(len(ACTIONS)) if self.visits[row + action]]
+        return max(values) if values else None
+    
+    def __call__(self, wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+        action = self.policy[state_index(wopr, self.scale_for(wopr.world))]
+        if action == UNKNOWN:
+            return wopr.ai_decide(), None
+        return move(wopr, action)
+    
+    def visited_states(self) -> int:
+        return sum(1 for action in self.policy if action != UNKNOWN)
+
+class Explorer:
+    """Epsilon-greedy ai_policy over a table that records the game's decisions"""
+    
+    def __init__(self, table: PolicyTable, epsilon: float, rng: random.Random):
+        self.table = table
+        self.epsilon = epsilon
+        self.rng = rng
+        self.decisions: List[Tuple[int, int]] = []
+    
+    def __call__(self, wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+        state = state_index(wopr, self.table.scale_for(wopr.world))
+        action = self.table.policy[state]
+        if action == UNKNOWN or self.rng.random() < self.epsilon:
+            action = self.rng.randrange(len(ACTIONS))
+        self.decisions.append((state, action))
+        return move(wopr, action)
+
+# (state * len(ACTIONS) + action) -> [sum of targets, count]
+Targets = Dict[int, List[float]]
+
+def train_shard(table_path: Optional[str], games: int, seed: int, epsilon: float,
+                opponents: Sequence[str], world_path: Optional[str] = None,
+                rules: Optional[Rules] = None) -> Tuple[Targets, Dict[str, int]]:
+    """Play one shard of training games; return their Q-learning targets and a win tally"""
+    if table_path is not None and os.path.exists(table_path):
+        table = PolicyTable.load(table_path)
+    else:
+        table = PolicyTable.empty(rules)
+    with table:
+        return play_shard(table, games, seed, epsilon, opponents, world_path)
+
+def play_shard(table: PolicyTable, games: int, seed: int, epsilon: float,
+               opponents: Sequence[str], world_path: Optional[str]) -> Tuple[Targets, Dict[str, int]]:
+    """train_shard's games, against a table that is already open"""
+    rng = random.Random(seed)
+    wopr = WOPR(rng, shared_world(world_path), rules=table.rules)
+    explorer = Explorer(table, epsilon, rng)
+    wopr.ai_policy = explorer
+    policies = [resolve_policy(name) for name in opponents]
+    scale = table.scale_for(wopr.world)
+    targets: Targets = {}
+    tally = {"won": 0, "lost": 0, "drawn": 0}
+    
+    for _ in range(games):
+        explorer.decisions = []
+        result = wopr.play_headless(rng.choice(policies), rng.choice(("USA", "USSR")))
+        final = score(wopr, result.winner, scale)
+        tally["won" if final == 1.0 else "lost" if final == -1.0 else "drawn"] += 1
+        decisions = explorer.decisions
+        for step, (state, action) in enumerate(decisions):
+            target = final
+            if step + 1 < len(decisions):
+                following = table.best_value(decisions[step + 1][0])
+                if following is not None:
+                    target = following
+            entry = targets.setdefault(state * len(ACTIONS) + action, [0.0, 0])
+            entry[0] += target
+            entry[1] += 1
+    return targets, tally
+
+def fold(table: PolicyTable, targets: Targets):
+    """Move each Q value towards the mean target seen for it this round"""
+    q, visits = table.q, table.visits
+    for index, (total, count) in targets.items():
+        seen = visits[index]
+        step = max(MIN_STEP, count / (seen + count))
+        q[index] += step * (total / count - q[index])
+        visits[index] = min(seen + count, 0xFFFFFFFF)
+
+def train(rounds: int, games: int, path: str = TABLE, seed: int = 0, workers: Optional[int] = None,
+          opponents: Sequence[str] = OPPONENTS, world_path: Optional[str] = None,
+          rules: Optional[Rules] = None, shard_size: int = 5000, out=print) -> PolicyTable:
+    """Run rounds of parallel self-play, resuming from and saving to path"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if os.path.exists(path):
+        with PolicyTable.load(path) as saved:
+            table = saved.writable()
+    else:
+        table = PolicyTable.empty(rules)
+    table.save(path)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for round_number in range(rounds):
+            epsilon = max(EPSILON_FLOOR, EPSILON * EPSILON_DECAY ** round_number)
+            # Shards are seeded by the games played before them, so resumed runs never repeat
+            arguments = [(path, min(shard_size, games - start), shard_seed(seed, table.games + start),
+                          epsilon, tuple(opponents), world_path, table.rules)
+                         for start in range(0, games, shard_size)]
+            start = time.perf_counter()
+            if executor is None:
+                outcomes = [train_shard(*args) for args in arguments]
+            else:
+                outcomes = list(executor.map(train_shard, *zip(*arguments)))
+            tally = {"won": 0, "lost": 0, "drawn": 0}
+            for targets, shard_tally in outcomes:
+                fold(table, targets)
+                for key, count in shard_tally.items():
+                    tally[key] += count
+            table.games += games
+            table.save(path)
+            elapsed = time.perf_counter() - start
+            out(f"ROUND {round_number + 1:>3}  EPSILON {epsilon:.2f}  "
+                f"WON {tally['won'] / games:6.1%}  LOST {tally['lost'] / games:6.1%}  "
+                f"STATES {table.visited_states():>6,}  {games / elapsed:>9,.0f} GAMES/S")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return table
+
+def evaluate(ai_policy, games: int, opponent: str = "wopr", player_country: str = "USA",
+             seed: int = 0, world: Optional[World] = None) -> Dict[str, float]:
+    """Win, loss and draw rates of an AI policy (None: the tension bands) against one opponent"""
+    ai_country = "USSR" if player_country == "USA" else "USA"
+    results = self_play(games, resolve_policy(opponent), player_country, random.Random(seed),
+                        world, ai_policy)
+    won = sum(1 for result in results if result.winner == ai_country)
+    lost = sum(1 for result in results if result.winner == player_country)
+    return {"won": won / games, "lost": lost / games, "drawn": (games - won - lost) / games}
+
+def main():
+    """Command line entry point"""
+    import argparse
+    from wargames import PLAYER_POLICIES
+    
+    parser = argparse.ArgumentParser(description="Train and evaluate a self-play policy table for WOPR")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--table", default=TABLE, metavar="PATH")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--games", type=int, default=20000, help="games per round, or to evaluate")
+    parser.add_argument("--opponents", nargs="+", choices=sorted(PLAYER_POLICIES), default=list(OPPONENTS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--world", metavar="PATH", help="CSV, JSON or binary world file")
+    args = parser.parse_args()
+    
+    if args.command == "train":
+        start = time.perf_counter()
+        table = train(args.rounds, args.games, args.table, args.seed, args.workers, args.opponents,
+                      args.world)
+        print(f"\nTABLE SAVED TO {args.table}: {table.games:,} GAMES, "
+              f"{table.visited_states():,} OF {STATES:,} STATES, {time.perf_counter() - start:.1f} S")
+        return
+    
+    world = shared_world(args.world)
+    print(f"{'OPPONENT':<10} {'AI':<8} {'WON':>7} {'LOST':>7} {'DRAWN':>7} {'US/GAME':>8}")
+    with PolicyTable.load(args.table) as table:
+        for opponent in args.opponents:
+            for name, policy in (("bands", None), ("trained", table)):
+                start = time.perf_counter()
+                rates = evaluate(policy, args.games, opponent, seed=args.seed, world=world)
+                elapsed = time.perf_counter() - start
+                print(f"{opponent:<10} {name:<8} {rates['won']:>7.1%} {rates['lost']:>7.1%} "
+                      f"{rates['drawn']:>7.1%} {elapsed / args.games * 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
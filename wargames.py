@@ -7,13 +7,18 @@ Built with Amazon Q Developer CLI
 "Shall we play a game?"
 """
 
+import math
 import random
 import time
 import sys
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from array import array
+from typing import List, Dict, Tuple, Optional, Callable, Sequence
 from enum import Enum
 
+from renderers import RENDERERS, Renderer, TerminalRenderer
+
 class GameState(Enum):
     MENU = "menu"
     PLAYING = "playing"
@@ -24,6 +29,17 @@ class Country(Enum):
     USA = "United States"
     USSR = "Soviet Union"
 
+# Display name of each side; scenarios may rename them
+SIDE_NAMES = {country.name: country.value for country in Country}
+
+class EndReason(Enum):
+    MUTUAL_DESTRUCTION = "mutual_destruction"
+    ELIMINATION = "elimination"
+    STALEMATE = "stalemate"
+    TIME_LIMIT = "time_limit"
+    SURRENDER = "surrender"
+    EXIT = "exit"
+
 @dataclass
 class City:
     name: str
@@ -31,6 +47,7 @@ class City:
     strategic_value: int
     destroyed: bool = False
     radiation_level: int = 0
+    coordinates: Tuple[int, int] = (0, 0)
 
 @dataclass
 class MissileBase:
@@ -40,16 +57,450 @@ class MissileBase:
     operational: bool = True
     coordinates: Tuple[int, int] = (0, 0)
 
+@dataclass
+class GameResult:
+    """Structured outcome of one simulated game"""
+    winner: Optional[str]
+    reason: EndReason
+    turns: int
+    defcon: int
+    tension: int
+    casualties: Dict[str, int]
+    cities_destroyed: Dict[str, int]
+
+@dataclass(frozen=True)
+class Rules:
+    """Tunable constants of the simulation; the defaults are the movie's game"""
+    player_hit_chance: float = 0.85
+    ai_hit_chance: float = 0.80
+    negotiation_chance: float = 0.3    # player's ceasefire talks succeed
+    diplomacy_chance: float = 0.4      # AI's diplomatic contact succeeds
+    retaliation_chance: float = 0.7    # AI strikes rather than postures in the high band
+    high_tension: int = 70             # AI and wopr_policy bands: above high, above medium, rest
+    medium_tension: int = 40
+    defcon_thresholds: Tuple[int, ...] = (90, 70, 50, 30)  # tension reaching DEFCON 1, 2, 3, 4
+    turn_limit: int = 20
+    
+    def as_dict(self) -> Dict[str, object]:
+        """Plain field values, e.g. for JSON or cache keys"""
+        values = {field.name: getattr(self, field.name) for field in fields(self)}
+        return {name: list(value) if isinstance(value, tuple) else value
+                for name, value in values.items()}
+    
+    @classmethod
+    def from_dict(cls, values: Dict[str, object]) -> "Rules":
+        """Inverse of as_dict; missing fields keep their defaults"""
+        values = dict(values)
+        if "defcon_thresholds" in values:
+            values["defcon_thresholds"] = tuple(values["defcon_thresholds"])
+        return cls(**values)
+
+DEFAULT_RULES = Rules()
+
+# Translation tables between destroyed flags (0/1 bytes) and binary digits
+_FLAGS_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_DIGITS_TO_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """Canonical, hashable game state for forking, search and transposition tables
+
+    Per-country fields follow the order of countries. Snapshots are
+    immutable, so forks share them freely and only pay for what changes.
+    """
+    countries: Tuple[str, ...]
+    destroyed: Tuple[int, ...]       # bit i set when city i is destroyed
+    radiation: Tuple[bytes, ...]     # int32 radiation of destroyed cities, in city order
+    missiles: Tuple[bytes, ...]      # int64 missiles per base
+    operational: Tuple[bytes, ...]   # one flag byte per base
+    tension: int
+    defcon: int
+    turn: int
+    player_country: Optional[str] = None
+    
+    def __hash__(self) -> int:
+        try:
+            return self.__dict__["_hash"]
+        except KeyError:
+            value = hash((self.countries, self.destroyed, self.radiation, self.missiles,
+                          self.operational, self.tension, self.defcon, self.turn,
+                          self.player_country))
+            object.__setattr__(self, "_hash", value)
+            return value
+
+# AI actions chosen by ai_decide and the console line announcing each one
+AI_ACTION_MESSAGES = {
+    "retaliate": "LAUNCHES RETALIATORY STRIKE!",
+    "posture": "ASSUMES DEFENSIVE POSTURE",
+    "preempt": "LAUNCHES PREEMPTIVE STRIKE!",
+    "reinforce": "REINFORCES DEFENSES",
+    "diplomacy": "ATTEMPTS DIPLOMATIC CONTACT",
+    "ready": "MAINTAINS READINESS",
+    "salvo": "LAUNCHES COORDINATED SALVO!",
+}
+AI_STRIKE_ACTIONS = ("retaliate", "preempt")
+
+# AI targeting adds randint(0, TARGET_NOISE) to each city's strategic value
+TARGET_NOISE = 3
+
+# Radiation left and tension added by a hit, as randint ranges, for the player's and the AI's warheads
+PLAYER_HIT_RADIATION = (500, 1000)
+PLAYER_HIT_TENSION = (15, 25)
+AI_HIT_RADIATION = (400, 900)
+AI_HIT_TENSION = (20, 30)
+
+# Warheads in a salvo fired by a policy, and the most a player may order
+SALVO_SIZE = 3
+MAX_SALVO = 5
+
+# The operator's prompts; the player's command prompt names the side (WOPR.command_prompt)
+MENU_PROMPT = "PLEASE SELECT A GAME: "
+SIDE_PROMPT = "\nCHOOSE SIDE (1-2): "
+TARGET_PROMPT = "\nSELECT TARGET (1-5): "
+SALVO_PROMPT = f"\nSALVO SIZE (1-{MAX_SALVO}): "
+AGAIN_PROMPT = "\nWOULD YOU LIKE TO PLAY ANOTHER GAME? (Y/N): "
+
+class Fenwick:
+    """Binary indexed tree of 0/1 flags with O(log n) rank queries"""
+    
+    def __init__(self, size: int, tree: Optional[array] = None):
+        self.size = size
+        self.total = size
+        # Every flag starts set; tree[i] covers the (i & -i) flags ending at i
+        self.tree = tree[:] if tree is not None else self.full_tree(size)
+        self.top = 1 << size.bit_length() if size else 0
+        
+    @staticmethod
+    def full_tree(size: int) -> array:
+        """Tree contents with every flag set, to copy into new trees"""
+        return array("i", [i & -i for i in range(size + 1)])
+        
+    def clear(self, position: int):
+        """Unset the flag at a 0-based position"""
+        self.total -= 1
+        i = position + 1
+        while i <= self.size:
+            self.tree[i] -= 1
+            i += i & -i
+            
+    def find(self, rank: int) -> int:
+        """0-based position of the set flag with the given 0-based rank"""
+        i = 0
+        step = self.top
+        while step:
+            nxt = i + step
+            if nxt <= self.size and self.tree[nxt] <= rank:
+                i = nxt
+                rank -= self.tree[nxt]
+            step >>= 1
+        return i
+
+class WorldSide:
+    """Immutable city and base columns for one country, shared between games"""
+    
+    def __init__(self, country: str, city_names: Sequence[str], population: Sequence[int],
+                 strategic_value: Sequence[int], city_x: Sequence[int], city_y: Sequence[int],
+                 base_names: Sequence[str], base_missiles: Sequence[int],
+                 base_operational: Sequence[int], base_x: Sequence[int], base_y: Sequence[int],
+                 targeting: Optional[tuple] = None):
+        self.country = country
+        self.city_names = city_names
+        self.population = population
+        self.strategic_value = strategic_value
+        self.city_x = city_x
+        self.city_y = city_y
+        self.base_names = base_names
+        self.base_missiles = base_missiles
+        self.base_operational = base_operational
+        self.base_x = base_x
+        self.base_y = base_y
+        # Precomputed targeting (e.g. from a binary world file), else built on first use
+        self._targeting = targeting
+        
+    @classmethod
+    def from_records(cls, country: str, cities: List[City], bases: List[MissileBase]) -> "WorldSide":
+        """Pack City and MissileBase records into compact columns"""
+        return cls(
+            country,
+            tuple(sys.intern(city.name) for city in cities),
+            array("q", [city.population for city in cities]),
+            array("i", [city.strategic_value for city in cities]),
+            array("i", [city.coordinates[0] for city in cities]),
+            array("i", [city.coordinates[1] for city in cities]),
+            tuple(sys.intern(base.name) for base in bases),
+            array("q", [base.missiles for base in bases]),
+            array("B", [base.operational for base in bases]),
+            array("i", [base.coordinates[0] for base in bases]),
+            array("i", [base.coordinates[1] for base in bases]),
+        )
+        
+    def targeting(self):
+        """Strategic value buckets for TargetIndex, built on first use
+
+        Returns (buckets, slots, values, intact_tree): buckets maps each value
+        to its city positions and a full Fenwick tree, slots gives each city's
+        position within its bucket, and values lists the values high to low.
+        """
+        if self._targeting is None:
+            members: Dict[int, List[int]] = {}
+            slots = array("i")
+            for i, value in enumerate(self.strategic_value):
+                bucket = members.setdefault(value, [])
+                slots.append(len(bucket))
+                bucket.append(i)
+            buckets = {value: (array("i", positions), Fenwick.full_tree(len(positions)))
+                       for value, positions in members.items()}
+            self._targeting = (buckets, slots, sorted(buckets, reverse=True),
+                               Fenwick.full_tree(len(self.city_names)))
+        return self._targeting
+
+class World:
+    """Immutable world data shared by any number of concurrent games"""
+    
+    def __init__(self, sides: Dict[str, WorldSide]):
+        self.sides = sides
+        
+    @classmethod
+    def from_records(cls, cities: Dict[str, List[City]],
+                     bases: Dict[str, List[MissileBase]]) -> "World":
+        """Build a world from per-country City and MissileBase lists"""
+        return cls({country: WorldSide.from_records(country, cities[country], bases.get(country, []))
+                    for country in cities})
+
+class CityView:
+    """One city of a game, reading shared columns and per-game state"""
+    __slots__ = ("table", "index")
+    
+    def __init__(self, table: "CityTable", index: int):
+        self.table = table
+        self.index = index
+        
+    @property
+    def name(self) -> str:
+        return self.table.side.city_names[self.index]
+        
+    @property
+    def population(self) -> int:
+        return self.table.side.population[self.index]
+        
+    @property
+    def strategic_value(self) -> int:
+        return self.table.side.strategic_value[self.index]
+        
+    @property
+    def coordinates(self) -> Tuple[int, int]:
+        return (self.table.side.city_x[self.index], self.table.side.city_y[self.index])
+        
+    @property
+    def destroyed(self) -> bool:
+        return bool(self.table.destroyed[self.index])
+        
+    @destroyed.setter
+    def destroyed(self, value: bool):
+        self.table.destroyed[self.index] = bool(value)
+        
+    @property
+    def radiation_level(self) -> int:
+        return self.table.radiation[self.index]
+        
+    @radiation_level.setter
+    def radiation_level(self, value: int):
+        self.table.radiation[self.index] = value
+        
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CityView) and other.table is self.table and other.index == self.index
+        
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+        
+    def __repr__(self) -> str:
+        return f"CityView({self.name!r}, destroyed={self.destroyed})"
+
+class CityTable:
+    """One country's cities in one game: shared columns plus mutable state"""
+    __slots__ = ("side", "destroyed", "radiation")
+    
+    def __init__(self, side: WorldSide):
+        count = len(side.city_names)
+        self.side = side
+        self.destroyed = bytearray(count)
+        self.radiation = array("i", bytes(4 * count))
+        
+    def __len__(self) -> int:
+        return len(self.destroyed)
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [CityView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("city index out of range")
+        return CityView(self, index)
+        
+    def __iter__(self):
+        return (CityView(self, i) for i in range(len(self)))
+
+class BaseView:
+    """One missile base of a game, reading shared columns and per-game state"""
+    __slots__ = ("table", "index")
+    
+    def __init__(self, table: "BaseTable", index: int):
+        self.table = table
+        self.index = index
+        
+    @property
+    def name(self) -> str:
+        return self.table.side.base_names[self.index]
+        
+    @property
+    def country(self):
+        country = self.table.side.country
+        return Country[country] if country in Country.__members__ else country
+        
+    @property
+    def coordinates(self) -> Tuple[int, int]:
+        return (self.table.side.base_x[self.index], self.table.side.base_y[self.index])
+        
+    @property
+    def missiles(self) -> int:
+        return self.table.missiles[self.index]
+        
+    @missiles.setter
+    def missiles(self, value: int):
+        self.table.missiles[self.index] = value
+        
+    @property
+    def operational(self) -> bool:
+        return bool(self.table.operational[self.index])
+        
+    @operational.setter
+    def operational(self, value: bool):
+        self.table.operational[self.index] = bool(value)
+        
+    def __repr__(self) -> str:
+        return f"BaseView({self.name!r}, missiles={self.missiles})"
+
+class BaseTable:
+    """One country's missile bases in one game: shared columns plus mutable state"""
+    __slots__ = ("side", "missiles", "operational")
+    
+    def __init__(self, side: WorldSide):
+        self.side = side
+        self.missiles = array("q", side.base_missiles)
+        self.operational = bytearray(side.base_operational)
+        
+    def __len__(self) -> int:
+        return len(self.missiles)
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [BaseView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("base index out of range")
+        return BaseView(self, index)
+        
+    def __iter__(self):
+        return (BaseView(self, i) for i in range(len(self)))
+
+class TargetIndex:
+    """Intact cities of one side, bucketed by strategic value for fast targeting"""
+    
+    def __init__(self, cities: CityTable):
+        self.cities = cities
+        buckets, self.slot, values, intact_tree = cities.side.targeting()
+        self.intact = Fenwick(len(cities), intact_tree)
+        self.buckets = {value: (positions, Fenwick(len(positions), tree))
+                        for value, (positions, tree) in buckets.items()}
+        self.values = list(values)
+        
+    def __len__(self) -> int:
+        return self.intact.total
+        
+    def top(self, count: int) -> List[CityView]:
+        """Up to count intact cities, highest strategic value first"""
+        chosen: List[CityView] = []
+        for value in self.values:
+            positions, tree = self.buckets[value]
+            for rank in range(min(tree.total, count - len(chosen))):
+                chosen.append(self.cities[positions[tree.find(rank)]])
+            if len(chosen) >= count:
+                break
+        return chosen
+        
+    def first(self, count: int) -> List[CityView]:
+        """The first count intact cities in list order"""
+        return [self.cities[self.intact.find(rank)]
+                for rank in range(min(count, self.intact.total))]
+                
+    def discard(self, city: CityView):
+        """Remove a destroyed city from the index"""
+        i = city.index
+        self.intact.clear(i)
+        value = city.strategic_value
+        tree = self.buckets[value][1]
+        tree.clear(self.slot[i])
+        if not tree.total:
+            self.values.remove(value)
+            
+    def choose(self, rng: random.Random) -> Optional[CityView]:
+        """Sample max(cities, key=strategic_value + randint(0, TARGET_NOISE))
+
+        Walks candidate scores from the top down. At each score every bucket
+        that can still reach it gets a geometric roll for the rank of its first
+        city scoring exactly that much, so the cost depends on the number of
+        distinct values rather than the number of cities. Ties go to the
+        earliest city in list order, as with max().
+        """
+        if not self.values:
+            return None
+        top = self.values[0]
+        for score in range(top + TARGET_NOISE, top - 1, -1):
+            best = None
+            for value in self.values:
+                spread = score - value
+                if spread > TARGET_NOISE:
+                    break
+                positions, tree = self.buckets[value]
+                if spread:
+                    miss = math.log(1.0 - 1.0 / (spread + 1))
+                    rank = int(math.log(1.0 - rng.random()) / miss)
+                    if rank >= tree.total:
+                        continue
+                else:
+                    rank = 0
+                position = positions[tree.find(rank)]
+                if best is None or position < best:
+                    best = position
+            if best is not None:
+                return self.cities[best]
+        return None
+
 class WOPR:
     """War Operation Plan Response - The AI System"""
     
-    def __init__(self):
-        self.state = GameState.MENU
+    def __init__(self, rng: Optional[random.Random] = None, world: Optional[World] = None,
+                 renderer: Optional[Renderer] = None, rules: Optional[Rules] = None):
+        # Every roll goes through self.rng so seeded runs are reproducible
+        self.rng = rng if rng is not None else random.Random()
+        # All text, typing, pauses and prompts go through the renderer
+        self.renderer = renderer if renderer is not None else TerminalRenderer()
+        # Cities and bases are shared read-only; each game copies only mutable state
+        if world is None:
+            world = World.from_records(self.create_cities(), self.create_missile_bases())
+        self.world = world
+        # Hit chances, bands and limits; one Rules may be shared by many games
+        self.rules = rules if rules is not None else DEFAULT_RULES
         self.player_country = None
         self.ai_country = None
-        self.turn_count = 0
-        self.global_tension = 0
-        self.defcon_level = 5
+        # Optional AI policy returning (action, target_city); None uses ai_decide
+        self.ai_policy: Optional["AIPolicy"] = None
+        # Optional event recorder (eventlog.EventWriter); None records nothing
+        self.events = None
+        # Optional fallout raster (fallout.FalloutModel); None keeps each impact's fixed radiation
+        self.fallout = None
         self.game_scenarios = [
             "Global Thermonuclear War",
             "Theater European War", 
@@ -58,528 +509,1042 @@ class WOPR:
             "Guerrilla Engagement",
             "Desert Storm"
         ]
+        self.side_names = SIDE_NAMES
+        # In-house scenarios join game_scenarios the first time the menu is shown
+        self.scenarios_discovered = False
         
         # Initialize world data
-        self.cities = self.create_cities()
-        self.missile_bases = self.create_missile_bases()
-        self.casualties = {"USA": 0, "USSR": 0}
+        self.reset()
+        
+    def reset(self):
+        """Restore a fresh world and clock for a new game"""
+        self.state = GameState.MENU
+        self.turn_count = 0
+        self.global_tension = 0
+        self.defcon_level = 5
+        self.cities = {country: CityTable(side) for country, side in self.world.sides.items()}
+        self.missile_bases = {country: BaseTable(side) for country, side in self.world.sides.items()}
+        self.casualties = {country: 0 for country in self.cities}
+        
+        # Running aggregates, updated as cities fall and missiles are spent
+        self.targets = {country: TargetIndex(cities) for country, cities in self.cities.items()}
+        self.destroyed_cities: Dict[str, List[CityView]] = {country: [] for country in self.cities}
+        self.missile_totals = {country: sum(base.missiles for base in bases if base.operational)
+                               for country, bases in self.missile_bases.items()}
+        self.next_base = {country: 0 for country in self.missile_bases}
+        if self.fallout is not None:
+            self.fallout.reset()
         
     def create_cities(self) -> Dict[str, List[City]]:
-        """Create major cities for both superpowers"""
+        """Create major cities for both superpowers, at (longitude, latitude) in degrees"""
         return {
             "USA": [
-                City("New York", 8000000, 10),
-                City("Los Angeles", 4000000, 8),
-                City("Chicago", 3000000, 7),
-                City("Houston", 2300000, 6),
-                City("Washington D.C.", 700000, 10),
-                City("San Francisco", 900000, 8),
-                City("Detroit", 700000, 7),
-                City("Seattle", 750000, 6),
-                City("Boston", 700000, 8),
-                City("Miami", 450000, 5)
+                City("New York", 8000000, 10, coordinates=(-74, 41)),
+                City("Los Angeles", 4000000, 8, coordinates=(-118, 34)),
+                City("Chicago", 3000000, 7, coordinates=(-88, 42)),
+                City("Houston", 2300000, 6, coordinates=(-95, 30)),
+                City("Washington D.C.", 700000, 10, coordinates=(-77, 39)),
+                City("San Francisco", 900000, 8, coordinates=(-122, 38)),
+                City("Detroit", 700000, 7, coordinates=(-83, 42)),
+                City("Seattle", 750000, 6, coordinates=(-122, 48)),
+                City("Boston", 700000, 8, coordinates=(-71, 42)),
+                City("Miami", 450000, 5, coordinates=(-80, 26))
             ],
             "USSR": [
-                City("Moscow", 8500000, 10),
-                City("Leningrad", 5000000, 9),
-                City("Kiev", 2600000, 7),
-                City("Tashkent", 2000000, 6),
-                City("Baku", 1800000, 8),
-                City("Kharkov", 1600000, 6),
-                City("Gorky", 1400000, 7),
-                City("Novosibirsk", 1400000, 6),
-                City("Minsk", 1600000, 6),
-                City("Tbilisi", 1200000, 5)
+                City("Moscow", 8500000, 10, coordinates=(38, 56)),
+                City("Leningrad", 5000000, 9, coordinates=(30, 60)),
+                City("Kiev", 2600000, 7, coordinates=(31, 50)),
+                City("Tashkent", 2000000, 6, coordinates=(69, 41)),
+                City("Baku", 1800000, 8, coordinates=(50, 40)),
+                City("Kharkov", 1600000, 6, coordinates=(36, 50)),
+                City("Gorky", 1400000, 7, coordinates=(44, 56)),
+                City("Novosibirsk", 1400000, 6, coordinates=(83, 55)),
+                City("Minsk", 1600000, 6, coordinates=(28, 54)),
+                City("Tbilisi", 1200000, 5, coordinates=(45, 42))
             ]
         }
     
     def create_missile_bases(self) -> Dict[str, List[MissileBase]]:
-        """Create missile installations"""
+        """Create missile installations, at (longitude, latitude) in degrees"""
         return {
             "USA": [
-                MissileBase("Malmstrom AFB", Country.USA, 150),
-                MissileBase("Minot AFB", Country.USA, 150),
-                MissileBase("F.E. Warren AFB", Country.USA, 150),
-                MissileBase("Vandenberg AFB", Country.USA, 100),
-                MissileBase("Strategic Command", Country.USA, 200)
+                MissileBase("Malmstrom AFB", Country.USA, 150, coordinates=(-111, 47)),
+                MissileBase("Minot AFB", Country.USA, 150, coordinates=(-101, 48)),
+                MissileBase("F.E. Warren AFB", Country.USA, 150, coordinates=(-105, 41)),
+                MissileBase("Vandenberg AFB", Country.USA, 100, coordinates=(-121, 35)),
+                MissileBase("Strategic Command", Country.USA, 200, coordinates=(-96, 41))
             ],
             "USSR": [
-                MissileBase("Plesetsk", Country.USSR, 180),
-                MissileBase("Baikonur", Country.USSR, 120),
-                MissileBase("Svobodny", Country.USSR, 100),
-                MissileBase("Strategic Rocket Forces", Country.USSR, 250),
-                MissileBase("Northern Fleet", Country.USSR, 150)
+                MissileBase("Plesetsk", Country.USSR, 180, coordinates=(41, 63)),
+                MissileBase("Baikonur", Country.USSR, 120, coordinates=(63, 46)),
+                MissileBase("Svobodny", Country.USSR, 100, coordinates=(128, 51)),
+                MissileBase("Strategic Rocket Forces", Country.USSR, 250, coordinates=(37, 56)),
+                MissileBase("Northern Fleet", Country.USSR, 150, coordinates=(33, 69))
             ]
         }
     
     def display_intro(self):
         """Display the classic WarGames intro"""
         self.slow_type("LOGON: ")
-        time.sleep(1)
-        print()
+        self.renderer.pause(1)
+        self.renderer.line()
         self.slow_type("W.O.P.R.")
-        time.sleep(1)
-        print("\n")
+        self.renderer.pause(1)
+        self.renderer.line("\n")
         
         self.slow_type("WAR OPERATION PLAN RESPONSE")
-        time.sleep(1)
-        print("\n")
+        self.renderer.pause(1)
+        self.renderer.line("\n")
         
         self.slow_type("UNITED STATES NUCLEAR FORCES")
-        time.sleep(1)
-        print()
+        self.renderer.pause(1)
+        self.renderer.line()
         
         self.slow_type("AUTHENTICATION: ")
-        time.sleep(0.5)
+        self.renderer.pause(0.5)
         self.slow_type("VERIFIED")
-        time.sleep(1)
-        print("\n")
+        self.renderer.pause(1)
+        self.renderer.line("\n")
         
         self.slow_type("SHALL WE PLAY A GAME?")
-        time.sleep(1)
-        print("\n")
+        self.renderer.pause(1)
+        self.renderer.line("\n")
     
     def slow_type(self, text: str, delay: float = 0.05):
         """Type text slowly for authentic computer terminal feel"""
-        for char in text:
-            sys.stdout.write(char)
-            sys.stdout.flush()
-            time.sleep(delay)
+        self.renderer.type(text, delay)
     
     def display_menu(self):
         """Display available war games"""
-        print("AVAILABLE GAMES:")
-        print("=" * 40)
+        self.discover_scenarios()
+        self.renderer.line("AVAILABLE GAMES:")
+        self.renderer.line("=" * 40)
         
         for i, scenario in enumerate(self.game_scenarios, 1):
-            print(f"{i}. {scenario}")
+            self.renderer.line(f"{i}. {scenario}")
         
-        print(f"{len(self.game_scenarios) + 1}. List Games")
-        print(f"{len(self.game_scenarios) + 2}. Exit")
-        print()
+        self.renderer.line(f"{len(self.game_scenarios) + 1}. List Games")
+        self.renderer.line(f"{len(self.game_scenarios) + 2}. Exit")
+        self.renderer.line()
     
     def select_game(self):
         """Handle game selection"""
         while True:
             try:
-                choice = input("PLEASE SELECT A GAME: ").strip()
-                
-                if choice.upper() in ['EXIT', 'QUIT', 'LOGOFF']:
+                stay, selected_game = self.menu_choice(self.renderer.read_line(MENU_PROMPT).strip())
+                if not stay:
                     return False
-                
-                choice_num = int(choice)
-                
-                if 1 <= choice_num <= len(self.game_scenarios):
-                    selected_game = self.game_scenarios[choice_num - 1]
-                    print(f"\nLOADING: {selected_game}")
-                    time.sleep(2)
-                    
-                    if selected_game == "Global Thermonuclear War":
-                        return self.start_nuclear_war()
-                    else:
-                        print(f"\n{selected_game} - SIMULATION NOT AVAILABLE")
-                        print("ONLY GLOBAL THERMONUCLEAR WAR IS CURRENTLY OPERATIONAL")
-                        time.sleep(2)
-                        continue
-                        
-                elif choice_num == len(self.game_scenarios) + 1:
-                    self.display_menu()
+                if selected_game is None:
                     continue
-                elif choice_num == len(self.game_scenarios) + 2:
-                    return False
-                else:
-                    print("INVALID SELECTION")
+                if selected_game == "Global Thermonuclear War":
+                    return self.start_nuclear_war()
+                scenario = self.load_scenario(selected_game)
+                if scenario is not None:
+                    return self.play_scenario(scenario)
                     
-            except ValueError:
-                print("INVALID INPUT - PLEASE ENTER A NUMBER")
             except KeyboardInterrupt:
-                print("\n\nLOGGING OFF...")
+                self.renderer.line("\n\nLOGGING OFF...")
                 return False
     
-    def start_nuclear_war(self):
-        """Initialize Global Thermonuclear War simulation"""
-        print("\n" + "="*50)
-        print("GLOBAL THERMONUCLEAR WAR")
-        print("="*50)
+    def menu_choice(self, choice: str) -> Tuple[bool, Optional[str]]:
+        """Act on an answer at the game menu
         
-        self.slow_type("\nINITIALIZING SIMULATION...")
-        time.sleep(2)
+        Returns (stay, title): stay is False to log off, and title is the game
+        to load, or None to ask again.
+        """
+        if choice.upper() in ['EXIT', 'QUIT', 'LOGOFF']:
+            return False, None
+        
+        try:
+            choice_num = int(choice)
+        except ValueError:
+            self.renderer.line("INVALID INPUT - PLEASE ENTER A NUMBER")
+            return True, None
+        
+        if 1 <= choice_num <= len(self.game_scenarios):
+            selected_game = self.game_scenarios[choice_num - 1]
+            self.renderer.line(f"\nLOADING: {selected_game}")
+            self.renderer.pause(2)
+            return True, selected_game
+        elif choice_num == len(self.game_scenarios) + 1:
+            self.display_menu()
+        elif choice_num == len(self.game_scenarios) + 2:
+            return False, None
+        else:
+            self.renderer.line("INVALID SELECTION")
+        return True, None
+    
+    def load_scenario(self, title: str):
+        """The scenario behind a menu title, or None after saying why it cannot be played"""
+        try:
+            scenario = self.find_scenario(title)
+        except (OSError, ValueError, KeyError) as exc:
+            # A broken package: say why rather than failing the menu
+            self.renderer.line(f"\n{title} - SIMULATION NOT AVAILABLE")
+            self.renderer.line(f"SCENARIO FAILED TO LOAD ({exc})")
+            self.renderer.pause(2)
+            return None
+        if scenario is None:
+            self.renderer.line(f"\n{title} - SIMULATION NOT AVAILABLE")
+            self.renderer.line("ONLY GLOBAL THERMONUCLEAR WAR IS CURRENTLY OPERATIONAL")
+            self.renderer.pause(2)
+        return scenario
+    
+    def discover_scenarios(self):
+        """Add in-house scenarios from the registry to the menu, once"""
+        if self.scenarios_discovered:
+            return
+        from scenarios import REGISTRY, slugify
+        listed = {slugify(title) for title in self.game_scenarios}
+        self.game_scenarios += [title for slug, title in REGISTRY.titles() if slug not in listed]
+        self.scenarios_discovered = True
+        
+    def find_scenario(self, title: str):
+        """The compiled scenario (scenarios.Scenario) behind a menu title, or None"""
+        from scenarios import REGISTRY
+        return REGISTRY.load(title)
+        
+    @contextmanager
+    def theatre(self, scenario):
+        """Play in a scenario's world, rules, AI and side names, restoring this game's after"""
+        home = (self.world, self.rules, self.ai_policy, self.side_names, self.events, self.fallout)
+        self.world, self.rules, self.side_names = scenario.world, scenario.rules, scenario.sides
+        self.ai_policy = scenario.ai_policy(self.renderer.line)
+        # Event logs and fallout rasters are bound to the home world
+        self.events = self.fallout = None
+        self.reset()
+        try:
+            yield scenario
+        finally:
+            # A trained opponent's table is mapped per game; let it go
+            if hasattr(self.ai_policy, "close"):
+                self.ai_policy.close()
+            self.world, self.rules, self.ai_policy, self.side_names, self.events, self.fallout = home
+            self.reset()
+            
+    def play_scenario(self, scenario) -> bool:
+        """Play one game of a scenario"""
+        with self.theatre(scenario):
+            return self.start_nuclear_war(scenario)
         
-        print("\n\nSELECT YOUR SIDE:")
-        print("1. UNITED STATES")
-        print("2. SOVIET UNION")
+    def start_nuclear_war(self, scenario=None):
+        """Initialize Global Thermonuclear War simulation, or a scenario's war"""
+        self.brief(scenario)
         
         while True:
             try:
-                choice = input("\nCHOOSE SIDE (1-2): ").strip()
-                if choice == "1":
-                    self.player_country = "USA"
-                    self.ai_country = "USSR"
+                if self.choose_side(self.renderer.read_line(SIDE_PROMPT).strip()):
                     break
-                elif choice == "2":
-                    self.player_country = "USSR"
-                    self.ai_country = "USA"
-                    break
-                else:
-                    print("INVALID SELECTION")
             except KeyboardInterrupt:
                 return False
         
-        print(f"\nYOU ARE: {Country.USA.value if self.player_country == 'USA' else Country.USSR.value}")
-        print(f"OPPONENT: {Country.USSR.value if self.ai_country == 'USSR' else Country.USA.value}")
-        
-        time.sleep(2)
         return self.run_simulation()
     
+    def brief(self, scenario=None):
+        """Announce the war, read a scenario's briefing and offer the sides"""
+        self.renderer.line("\n" + "="*50)
+        self.renderer.line(scenario.title.upper() if scenario is not None else "GLOBAL THERMONUCLEAR WAR")
+        self.renderer.line("="*50)
+        if scenario is not None:
+            for line in scenario.briefing:
+                self.renderer.line(line)
+        
+        self.slow_type("\nINITIALIZING SIMULATION...")
+        self.renderer.pause(2)
+        
+        self.renderer.line("\n\nSELECT YOUR SIDE:")
+        self.renderer.line(f"1. {self.side_names['USA'].upper()}")
+        self.renderer.line(f"2. {self.side_names['USSR'].upper()}")
+    
+    def choose_side(self, choice: str) -> bool:
+        """Take the side picked at the side prompt; False if the answer was not a side"""
+        if choice == "1":
+            self.player_country = "USA"
+            self.ai_country = "USSR"
+        elif choice == "2":
+            self.player_country = "USSR"
+            self.ai_country = "USA"
+        else:
+            self.renderer.line("INVALID SELECTION")
+            return False
+        
+        self.renderer.line(f"\nYOU ARE: {self.side_names[self.player_country]}")
+        self.renderer.line(f"OPPONENT: {self.side_names[self.ai_country]}")
+        
+        self.renderer.pause(2)
+        return True
+    
     def run_simulation(self):
         """Main game simulation loop"""
+        self.commence_simulation()
+        
+        while self.state == GameState.SIMULATION:
+            self.show_turn()
+            
+            if not self.player_turn():
+                self.quit_simulation()
+                break
+                
+            self.finish_turn()
+        
+        return self.game_over()
+    
+    def commence_simulation(self):
+        """Put the game in play and announce it"""
         self.state = GameState.SIMULATION
         self.defcon_level = 5
         
-        print(f"\n{'='*60}")
-        print("SIMULATION COMMENCING")
-        print(f"{'='*60}")
+        self.renderer.line(f"\n{'='*60}")
+        self.renderer.line("SIMULATION COMMENCING")
+        self.renderer.line(f"{'='*60}")
+        if self.events is not None:
+            self.events.start(self)
+    
+    def show_turn(self):
+        """Open a turn with the war status"""
+        self.display_status()
+        self.renderer.update(self)
+    
+    def quit_simulation(self):
+        """Record a game the player surrendered or left"""
+        if self.events is not None:
+            surrendered = self.state == GameState.GAME_OVER
+            self.events.end(self, EndReason.SURRENDER if surrendered else EndReason.EXIT)
+    
+    def finish_turn(self):
+        """Everything after the player's command: the AI's reply and the next turn, unless the war is over"""
+        if self.check_end_conditions():
+            return
+            
+        self.ai_turn()
         
-        while self.state == GameState.SIMULATION:
-            self.display_status()
+        if self.check_end_conditions():
+            return
             
-            if not self.player_turn():
+        self.next_turn()
+        self.renderer.pause(1)
+    
+    def play_headless(self, player_policy: "PlayerPolicy", player_country: str = "USA") -> GameResult:
+        """Play one full game between player_policy and WOPR with no I/O or pacing"""
+        self.reset()
+        self.player_country = player_country
+        self.ai_country = "USSR" if player_country == "USA" else "USA"
+        self.state = GameState.SIMULATION
+        if self.events is not None:
+            self.events.start(self)
+        return self.play_out(player_policy)
+        
+    def play_out(self, player_policy: "PlayerPolicy") -> GameResult:
+        """Play the current game to the end headless, e.g. from a restored snapshot"""
+        while True:
+            action, target_city = player_policy(self)
+            if not self.player_step(action, target_city):
+                reason = EndReason.SURRENDER if action == "surrender" else EndReason.EXIT
                 break
                 
-            if self.check_end_conditions():
+            reason = self.end_condition()
+            if reason is not None:
                 break
                 
-            self.ai_turn()
+            self.ai_step()
             
-            if self.check_end_conditions():
+            reason = self.end_condition()
+            if reason is not None:
                 break
                 
-            self.turn_count += 1
-            time.sleep(1)
+            self.next_turn()
+            
+        self.state = GameState.GAME_OVER
+        if self.events is not None:
+            self.events.end(self, reason)
+        return self.result(reason)
+        
+    def next_turn(self):
+        """Advance the turn counter"""
+        self.turn_count += 1
+        if self.fallout is not None:
+            self.fallout.advance(self)
+        if self.events is not None:
+            self.events.turn(self)
         
-        return self.game_over()
-    
     def display_status(self):
         """Display current war status"""
-        print(f"\n--- TURN {self.turn_count + 1} ---")
-        print(f"DEFCON LEVEL: {self.defcon_level}")
-        print(f"GLOBAL TENSION: {self.global_tension}%")
+        self.renderer.line(f"\n--- TURN {self.turn_count + 1} ---")
+        self.renderer.line(f"DEFCON LEVEL: {self.defcon_level}")
+        self.renderer.line(f"GLOBAL TENSION: {self.global_tension}%")
         
         # Show casualties
-        usa_casualties = sum(city.population for city in self.cities["USA"] if city.destroyed)
-        ussr_casualties = sum(city.population for city in self.cities["USSR"] if city.destroyed)
+        usa_casualties = self.side_casualties("USA")
+        ussr_casualties = self.side_casualties("USSR")
         
-        print(f"\nCASUALTIES:")
-        print(f"  USA: {usa_casualties:,}")
-        print(f"  USSR: {ussr_casualties:,}")
+        self.renderer.line(f"\nCASUALTIES:")
+        self.renderer.line(f"  {self.side_label('USA')}: {usa_casualties:,}")
+        self.renderer.line(f"  {self.side_label('USSR')}: {ussr_casualties:,}")
         
         # Show remaining missiles
-        usa_missiles = sum(base.missiles for base in self.missile_bases["USA"] if base.operational)
-        ussr_missiles = sum(base.missiles for base in self.missile_bases["USSR"] if base.operational)
+        usa_missiles = self.missiles_remaining("USA")
+        ussr_missiles = self.missiles_remaining("USSR")
         
-        print(f"\nREMAINING MISSILES:")
-        print(f"  USA: {usa_missiles}")
-        print(f"  USSR: {ussr_missiles}")
+        self.renderer.line(f"\nREMAINING MISSILES:")
+        self.renderer.line(f"  {self.side_label('USA')}: {usa_missiles}")
+        self.renderer.line(f"  {self.side_label('USSR')}: {ussr_missiles}")
     
     def player_turn(self):
         """Handle player's turn"""
-        print(f"\n{self.player_country} COMMAND OPTIONS:")
-        print("1. LAUNCH NUCLEAR STRIKE")
-        print("2. DEFENSIVE POSTURE")
-        print("3. NEGOTIATE")
-        print("4. STATUS REPORT")
-        print("5. SURRENDER")
-        print("6. EXIT SIMULATION")
+        self.command_options()
         
         while True:
             try:
-                choice = input(f"\n{self.player_country} COMMAND: ").strip()
-                
-                if choice == "1":
-                    return self.launch_strike(self.player_country, self.ai_country)
-                elif choice == "2":
-                    return self.defensive_posture()
-                elif choice == "3":
-                    return self.negotiate()
-                elif choice == "4":
-                    self.detailed_status()
-                    continue
-                elif choice == "5":
-                    return self.surrender()
-                elif choice == "6":
-                    print("EXITING SIMULATION...")
-                    return False
-                else:
-                    print("INVALID COMMAND")
+                result = self.command(self.renderer.read_line(self.command_prompt()).strip())
+                if result is not None:
+                    return result
                     
             except KeyboardInterrupt:
-                print("\nEXITING SIMULATION...")
+                self.renderer.line("\nEXITING SIMULATION...")
                 return False
     
+    def command_options(self):
+        """List the player's commands"""
+        self.renderer.line(f"\n{self.side_label(self.player_country)} COMMAND OPTIONS:")
+        self.renderer.line("1. LAUNCH NUCLEAR STRIKE")
+        self.renderer.line("2. DEFENSIVE POSTURE")
+        self.renderer.line("3. NEGOTIATE")
+        self.renderer.line("4. STATUS REPORT")
+        self.renderer.line("5. SURRENDER")
+        self.renderer.line("6. EXIT SIMULATION")
+        self.renderer.line("7. PLANNED SALVO")
+    
+    def command_prompt(self) -> str:
+        """The prompt for the player's command, naming the side"""
+        return f"\n{self.side_label(self.player_country)} COMMAND: "
+    
+    def command(self, choice: str) -> Optional[bool]:
+        """Carry out a command; False ends the game and None asks for another"""
+        if choice == "1":
+            return self.launch_strike(self.player_country, self.ai_country)
+        elif choice == "2":
+            return self.defensive_posture()
+        elif choice == "3":
+            return self.negotiate()
+        elif choice == "4":
+            self.detailed_status()
+            return None
+        elif choice == "5":
+            return self.surrender()
+        elif choice == "6":
+            self.renderer.line("EXITING SIMULATION...")
+            return False
+        elif choice == "7":
+            return self.launch_salvo(self.player_country)
+        self.renderer.line("INVALID COMMAND")
+        return None
+    
+    def player_step(self, action: str, target_city: Optional[CityView] = None) -> bool:
+        """Apply a player command without any terminal output"""
+        if action == "strike":
+            if target_city is not None and not target_city.destroyed:
+                self.resolve_player_strike(self.player_country, target_city)
+            return True
+        elif action == "defend":
+            self.apply_defensive_posture()
+            return True
+        elif action == "negotiate":
+            self.attempt_negotiation()
+            return True
+        elif action == "surrender":
+            self.state = GameState.GAME_OVER
+            return False
+        elif action == "salvo":
+            self.fire_salvo(self.player_country, SALVO_SIZE)
+            return True
+        elif action == "exit":
+            return False
+        raise ValueError(f"unknown player action: {action}")
+        
     def launch_strike(self, attacker: str, target: str):
         """Launch nuclear strike"""
-        print(f"\n{attacker} LAUNCHING NUCLEAR STRIKE...")
+        available_cities = self.strike_targets(attacker, target)
+        if not available_cities:
+            return True
+        return self.strike_choice(attacker, available_cities, self.renderer.read_line(TARGET_PROMPT))
+    
+    def strike_targets(self, attacker: str, target: str) -> List[CityView]:
+        """Announce a strike and list the cities on offer, none if no targets remain"""
+        self.renderer.line(f"\n{self.side_label(attacker)} LAUNCHING NUCLEAR STRIKE...")
         
         # Select target cities
-        available_cities = [city for city in self.cities[target] if not city.destroyed]
+        available_cities = self.targets[target].first(5)
         if not available_cities:
-            print("NO VIABLE TARGETS REMAINING")
-            return True
+            self.renderer.line("NO VIABLE TARGETS REMAINING")
+            return available_cities
         
         # Show available targets
-        print(f"\nAVAILABLE TARGETS IN {target}:")
-        for i, city in enumerate(available_cities[:5], 1):  # Show top 5 targets
-            print(f"{i}. {city.name} (Pop: {city.population:,}, Value: {city.strategic_value})")
-        
+        self.renderer.line(f"\nAVAILABLE TARGETS IN {self.side_label(target)}:")
+        for i, city in enumerate(available_cities, 1):  # Show top 5 targets
+            self.renderer.line(f"{i}. {city.name} (Pop: {city.population:,}, Value: {city.strategic_value})")
+        return available_cities
+    
+    def strike_choice(self, attacker: str, available_cities: List[CityView], choice: str):
+        """Launch at the listed city picked at the target prompt"""
         try:
-            target_choice = int(input("\nSELECT TARGET (1-5): ")) - 1
-            if 0 <= target_choice < len(available_cities[:5]):
+            target_choice = int(choice) - 1
+            if 0 <= target_choice < len(available_cities):
                 target_city = available_cities[target_choice]
                 
-                print(f"\nTARGET ACQUIRED: {target_city.name}")
+                self.renderer.line(f"\nTARGET ACQUIRED: {target_city.name}")
                 self.slow_type("LAUNCHING...")
-                time.sleep(2)
+                self.renderer.pause(2)
                 
                 # Strike resolution
-                if random.random() < 0.85:  # 85% hit chance
-                    target_city.destroyed = True
-                    target_city.radiation_level = random.randint(500, 1000)
-                    
-                    print(f"\nDIRECT HIT ON {target_city.name}")
-                    print(f"ESTIMATED CASUALTIES: {target_city.population:,}")
-                    print(f"RADIATION LEVEL: {target_city.radiation_level} RADS")
-                    
-                    self.global_tension += random.randint(15, 25)
-                    self.adjust_defcon()
-                    
+                if self.resolve_player_strike(attacker, target_city):
+                    self.renderer.line(f"\nDIRECT HIT ON {target_city.name}")
+                    self.renderer.line(f"ESTIMATED CASUALTIES: {target_city.population:,}")
+                    self.renderer.line(f"RADIATION LEVEL: {target_city.radiation_level} RADS")
                 else:
-                    print(f"\nMISSILE INTERCEPTED - {target_city.name} UNDAMAGED")
-                
-                # Reduce attacker's missiles
-                for base in self.missile_bases[attacker]:
-                    if base.missiles > 0:
-                        base.missiles -= random.randint(1, 3)
-                        break
+                    self.renderer.line(f"\nMISSILE INTERCEPTED - {target_city.name} UNDAMAGED")
                 
                 return True
             else:
-                print("INVALID TARGET")
+                self.renderer.line("INVALID TARGET")
                 return True
                 
         except (ValueError, IndexError):
-            print("INVALID TARGET SELECTION")
+            self.renderer.line("INVALID TARGET SELECTION")
+            return True
+    
+    def launch_salvo(self, attacker: str):
+        """Plan and launch a multi-warhead salvo"""
+        return self.salvo_order(attacker, self.renderer.read_line(SALVO_PROMPT))
+    
+    def salvo_order(self, attacker: str, size: str):
+        """Plan and launch a salvo of the size given at the salvo prompt"""
+        try:
+            warheads = int(size)
+        except ValueError:
+            self.renderer.line("INVALID SALVO SIZE")
+            return True
+        if not 1 <= warheads <= MAX_SALVO:
+            self.renderer.line("INVALID SALVO SIZE")
+            return True
+        
+        from allocation import plan_salvo
+        plan = plan_salvo(self, attacker, warheads)
+        if not plan:
+            self.renderer.line("NO VIABLE TARGETS REMAINING")
             return True
+        
+        self.renderer.line("\nTARGETING PLAN:")
+        for city, count in plan:
+            self.renderer.line(f"  {city.name}: {count} WARHEAD{'S' if count > 1 else ''}")
+        self.slow_type("LAUNCHING...")
+        self.renderer.pause(2)
+        
+        for city, hit in self.fire_salvo(attacker, plan=plan):
+            if hit:
+                self.renderer.line(f"DIRECT HIT ON {city.name}")
+                self.renderer.line(f"ESTIMATED CASUALTIES: {city.population:,}")
+            else:
+                self.renderer.line(f"MISSILE INTERCEPTED - {city.name} UNDAMAGED")
+        return True
     
+    def fire_salvo(self, attacker: str, warheads: int = SALVO_SIZE,
+                   plan: Optional[List[Tuple[CityView, int]]] = None) -> List[Tuple[CityView, bool]]:
+        """Fire an allocated salvo and return (city, hit) for every warhead launched
+        
+        Warheads on one city are fired in turn and the rest are held back once
+        it is destroyed.
+        """
+        if plan is None:
+            from allocation import plan_salvo
+            plan = plan_salvo(self, attacker, warheads)
+        resolve = (self.resolve_ai_strike if attacker == self.ai_country
+                   else lambda city: self.resolve_player_strike(attacker, city))
+        shots = []
+        for city, count in plan:
+            for _ in range(count):
+                if city.destroyed:
+                    break
+                shots.append((city, resolve(city)))
+        return shots
+    
+    def resolve_player_strike(self, attacker: str, target_city: CityView) -> bool:
+        """Resolve a player strike and expend the attacker's missiles"""
+        hit = self.rng.random() < self.rules.player_hit_chance
+        if hit:
+            self.land_warhead(attacker, target_city, ai=False)
+        elif self.events is not None:
+            self.events.strike(self, attacker, target_city, False)
+            
+        # Reduce attacker's missiles
+        self.expend_missiles(attacker, self.rng.randint(1, 3))
+                
+        return hit
+        
+    def opponent(self, country: str) -> str:
+        """The other superpower"""
+        return "USSR" if country == "USA" else "USA"
+    
+    def side_label(self, country: str) -> str:
+        """A side as turn messages name it: its code, or a scenario's own name in capitals"""
+        name = self.side_names[country]
+        return country if name == SIDE_NAMES.get(country) else name.upper()
+        
+    def destroy_city(self, country: str, city: CityView, radiation_level: int):
+        """Mark a city destroyed and update the running aggregates"""
+        city.destroyed = True
+        city.radiation_level = radiation_level
+        self.casualties[country] += city.population
+        self.destroyed_cities[country].append(city)
+        self.targets[country].discard(city)
+        if self.fallout is not None:
+            # The city's earlier fallout deaths are now part of its whole population
+            self.casualties[country] -= self.fallout.impact(country, city, radiation_level)
+        
+    def expend_missiles(self, country: str, count: int):
+        """Take count missiles from the first operational base that still has any"""
+        bases = self.missile_bases[country]
+        i = self.next_base[country]
+        while i < len(bases) and (bases.missiles[i] <= 0 or not bases.operational[i]):
+            i += 1
+        self.next_base[country] = i
+        if i < len(bases):
+            self.expend_from(country, i, count)
+            
+    def expend_from(self, country: str, base: int, count: int):
+        """Take count missiles from one particular base"""
+        bases = self.missile_bases[country]
+        bases.missiles[base] -= count
+        if bases.operational[base]:
+            self.missile_totals[country] -= count
+        if self.events is not None:
+            self.events.missiles(self, country, base, count)
+            
+    def disable_base(self, country: str, base: int):
+        """Take a base offline; its remaining missiles can no longer be launched"""
+        bases = self.missile_bases[country]
+        if bases.operational[base]:
+            bases.operational[base] = 0
+            self.missile_totals[country] -= bases.missiles[base]
+            if self.events is not None:
+                self.events.base_offline(self, country, base)
+        
     def defensive_posture(self):
         """Take defensive stance"""
-        print("\nASSUMING DEFENSIVE POSTURE...")
-        self.global_tension = max(0, self.global_tension - random.randint(5, 10))
-        print("GLOBAL TENSION REDUCED")
+        self.renderer.line("\nASSUMING DEFENSIVE POSTURE...")
+        self.apply_defensive_posture()
+        self.renderer.line("GLOBAL TENSION REDUCED")
         return True
+        
+    def apply_defensive_posture(self):
+        """Lower global tension for the player's defensive stance"""
+        before = self.global_tension
+        self.global_tension = max(0, before - self.rng.randint(5, 10))
+        if self.events is not None:
+            self.events.action(self, self.player_country, "defend")
+            self.events.tension(self, self.global_tension - before)
     
     def negotiate(self):
         """Attempt negotiation"""
-        print("\nATTEMPTING DIPLOMATIC CONTACT...")
-        time.sleep(2)
-        
-        if random.random() < 0.3:  # 30% chance of success
-            print("COMMUNICATION ESTABLISHED")
-            print("CEASEFIRE NEGOTIATIONS IN PROGRESS...")
-            self.global_tension = max(0, self.global_tension - random.randint(20, 30))
-            print("TENSION SIGNIFICANTLY REDUCED")
+        self.renderer.line("\nATTEMPTING DIPLOMATIC CONTACT...")
+        self.renderer.pause(2)
+        
+        if self.attempt_negotiation():
+            self.renderer.line("COMMUNICATION ESTABLISHED")
+            self.renderer.line("CEASEFIRE NEGOTIATIONS IN PROGRESS...")
+            self.renderer.line("TENSION SIGNIFICANTLY REDUCED")
         else:
-            print("COMMUNICATION FAILED - NO RESPONSE")
-            print("ENEMY INTERPRETS AS WEAKNESS")
-            self.global_tension += random.randint(5, 10)
+            self.renderer.line("COMMUNICATION FAILED - NO RESPONSE")
+            self.renderer.line("ENEMY INTERPRETS AS WEAKNESS")
         
         return True
+        
+    def attempt_negotiation(self) -> bool:
+        """Roll the player's negotiation and apply its tension change"""
+        before = self.global_tension
+        success = self.rng.random() < self.rules.negotiation_chance
+        if success:
+            self.global_tension = max(0, before - self.rng.randint(20, 30))
+        else:
+            self.global_tension += self.rng.randint(5, 10)
+        if self.events is not None:
+            self.events.action(self, self.player_country, "negotiate")
+            self.events.tension(self, self.global_tension - before)
+        return success
     
     def detailed_status(self):
         """Show detailed status report"""
-        print(f"\n{'='*50}")
-        print("DETAILED STATUS REPORT")
-        print(f"{'='*50}")
+        self.renderer.line(f"\n{'='*50}")
+        self.renderer.line("DETAILED STATUS REPORT")
+        self.renderer.line(f"{'='*50}")
         
         for country in ["USA", "USSR"]:
-            print(f"\n{country} STATUS:")
+            self.renderer.line(f"\n{self.side_label(country)} STATUS:")
             
             # Cities
-            destroyed_cities = [city for city in self.cities[country] if city.destroyed]
-            intact_cities = [city for city in self.cities[country] if not city.destroyed]
+            destroyed_cities = self.destroyed_cities[country]
             
-            print(f"  Cities Destroyed: {len(destroyed_cities)}")
-            print(f"  Cities Intact: {len(intact_cities)}")
+            self.renderer.line(f"  Cities Destroyed: {len(destroyed_cities)}")
+            self.renderer.line(f"  Cities Intact: {len(self.targets[country])}")
             
             if destroyed_cities:
-                print("  Destroyed Cities:")
+                self.renderer.line("  Destroyed Cities:")
                 for city in destroyed_cities:
-                    print(f"    - {city.name} ({city.radiation_level} rads)")
+                    self.renderer.line(f"    - {city.name} ({city.radiation_level} rads)")
             
             # Military assets
             operational_bases = [base for base in self.missile_bases[country] if base.operational]
-            total_missiles = sum(base.missiles for base in operational_bases)
             
-            print(f"  Operational Bases: {len(operational_bases)}")
-            print(f"  Total Missiles: {total_missiles}")
+            self.renderer.line(f"  Operational Bases: {len(operational_bases)}")
+            self.renderer.line(f"  Total Missiles: {self.missile_totals[country]}")
+            
+            # Fallout drifting over the country
+            if self.fallout is not None:
+                exposed = int((self.fallout.base_radiation(country) >= 1).sum())
+                self.renderer.line(f"  Contaminated Cities: {self.fallout.contaminated_cities(country)}")
+                self.renderer.line(f"  Bases Under Fallout: {exposed}")
+                self.renderer.line(f"  Fallout Casualties: {self.fallout.fallout_casualties(country):,}")
     
     def surrender(self):
         """Handle surrender"""
-        print(f"\n{self.player_country} SURRENDERS")
-        print("SIMULATION TERMINATED")
+        self.renderer.line(f"\n{self.side_label(self.player_country)} SURRENDERS")
+        self.renderer.line("SIMULATION TERMINATED")
         self.state = GameState.GAME_OVER
         return False
     
     def ai_turn(self):
         """Handle AI opponent's turn"""
-        print(f"\n{self.ai_country} ANALYZING...")
-        time.sleep(2)
+        self.renderer.line(f"\n{self.side_label(self.ai_country)} ANALYZING...")
+        self.renderer.pause(2)
         
-        # AI decision making based on current state
-        if self.global_tension > 70:
+        action, target_city = self.ai_choose()
+        self.renderer.line(f"{self.side_label(self.ai_country)} {AI_ACTION_MESSAGES[action]}")
+        if action in AI_STRIKE_ACTIONS:
+            self.ai_launch_strike(target_city)
+        elif action == "salvo":
+            for city, hit in self.fire_salvo(self.ai_country):
+                if hit:
+                    self.renderer.line(f"DIRECT HIT ON {city.name}")
+                    self.renderer.line(f"ESTIMATED CASUALTIES: {city.population:,}")
+                else:
+                    self.renderer.line(f"MISSILE INTERCEPTED - {city.name} SAFE")
+        elif action == "diplomacy":
+            if self.ai_diplomacy():
+                self.renderer.line("DIPLOMATIC CHANNEL OPENED")
+        else:
+            self.ai_stand_down(action)
+            
+    def ai_choose(self) -> Tuple[str, Optional[CityView]]:
+        """Ask the configured AI policy, or the built-in tension bands, for a move"""
+        if self.ai_policy is not None:
+            action, target_city = self.ai_policy(self)
+        else:
+            action, target_city = self.ai_decide(), None
+        if self.events is not None:
+            self.events.action(self, self.ai_country, action)
+        return action, target_city
+            
+    def ai_decide(self) -> str:
+        """Pick the AI's action from the current tension band"""
+        if self.global_tension > self.rules.high_tension:
             # High tension - likely to attack
-            if random.random() < 0.7:
-                print(f"{self.ai_country} LAUNCHES RETALIATORY STRIKE!")
-                self.ai_launch_strike()
-            else:
-                print(f"{self.ai_country} ASSUMES DEFENSIVE POSTURE")
-                self.global_tension = max(0, self.global_tension - 5)
-        elif self.global_tension > 40:
+            if self.rng.random() < self.rules.retaliation_chance:
+                return "retaliate"
+            return "posture"
+        elif self.global_tension > self.rules.medium_tension:
             # Medium tension - mixed actions
-            action = random.choice(["attack", "defend", "negotiate"])
+            action = self.rng.choice(["attack", "defend", "negotiate"])
             if action == "attack":
-                print(f"{self.ai_country} LAUNCHES PREEMPTIVE STRIKE!")
-                self.ai_launch_strike()
+                return "preempt"
             elif action == "defend":
-                print(f"{self.ai_country} REINFORCES DEFENSES")
-                self.global_tension -= 3
-            else:
-                print(f"{self.ai_country} ATTEMPTS DIPLOMATIC CONTACT")
-                if random.random() < 0.4:
-                    print("DIPLOMATIC CHANNEL OPENED")
-                    self.global_tension -= random.randint(10, 15)
+                return "reinforce"
+            return "diplomacy"
+        # Low tension - mostly defensive
+        return "ready"
+        
+    def ai_diplomacy(self) -> bool:
+        """Roll the AI's diplomatic contact and apply its tension change"""
+        if self.rng.random() < self.rules.diplomacy_chance:
+            drop = self.rng.randint(10, 15)
+            self.global_tension -= drop
+            if self.events is not None:
+                self.events.tension(self, -drop)
+            return True
+        return False
+        
+    def ai_stand_down(self, action: str):
+        """Apply the tension relief of a non-strike AI action"""
+        before = self.global_tension
+        if action == "posture":
+            self.global_tension = max(0, before - 5)
+        elif action == "reinforce":
+            self.global_tension -= 3
+        else:
+            self.global_tension = max(0, before - 2)
+        if self.events is not None:
+            self.events.tension(self, self.global_tension - before)
+            
+    def ai_step(self) -> str:
+        """Play the AI turn without any terminal output"""
+        action, target_city = self.ai_choose()
+        if action in AI_STRIKE_ACTIONS:
+            if target_city is None:
+                target_city = self.choose_target(self.player_country)
+            if target_city is not None:
+                self.resolve_ai_strike(target_city)
+        elif action == "salvo":
+            self.fire_salvo(self.ai_country)
+        elif action == "diplomacy":
+            self.ai_diplomacy()
         else:
-            # Low tension - mostly defensive
-            print(f"{self.ai_country} MAINTAINS READINESS")
-            self.global_tension = max(0, self.global_tension - 2)
+            self.ai_stand_down(action)
+        return action
+        
+    def choose_target(self, country: str) -> Optional[CityView]:
+        """Pick the highest value intact city, with a little noise"""
+        return self.targets[country].choose(self.rng)
     
-    def ai_launch_strike(self):
+    def ai_launch_strike(self, target_city: Optional[CityView] = None):
         """AI launches nuclear strike"""
-        available_cities = [city for city in self.cities[self.player_country] if not city.destroyed]
-        if not available_cities:
+        # AI targets highest value cities unless its policy already picked one
+        if target_city is None:
+            target_city = self.choose_target(self.player_country)
+        if target_city is None:
             return
         
-        # AI targets highest value cities
-        target_city = max(available_cities, key=lambda c: c.strategic_value + random.randint(0, 3))
+        self.renderer.line(f"TARGET: {target_city.name}")
+        self.renderer.pause(2)
         
-        print(f"TARGET: {target_city.name}")
-        time.sleep(2)
-        
-        if random.random() < 0.80:  # 80% AI hit chance
-            target_city.destroyed = True
-            target_city.radiation_level = random.randint(400, 900)
-            
-            print(f"DIRECT HIT ON {target_city.name}")
-            print(f"ESTIMATED CASUALTIES: {target_city.population:,}")
-            
-            self.global_tension += random.randint(20, 30)
-            self.adjust_defcon()
+        if self.resolve_ai_strike(target_city):
+            self.renderer.line(f"DIRECT HIT ON {target_city.name}")
+            self.renderer.line(f"ESTIMATED CASUALTIES: {target_city.population:,}")
         else:
-            print(f"MISSILE INTERCEPTED - {target_city.name} SAFE")
+            self.renderer.line(f"MISSILE INTERCEPTED - {target_city.name} SAFE")
+            
+    def resolve_ai_strike(self, target_city: CityView) -> bool:
+        """Resolve an AI strike on target_city"""
+        if self.rng.random() < self.rules.ai_hit_chance:
+            self.land_warhead(self.ai_country, target_city, ai=True)
+            return True
+        if self.events is not None:
+            self.events.strike(self, self.ai_country, target_city, False)
+        return False
+    
+    def land_warhead(self, attacker: str, target_city: CityView, ai: bool):
+        """Destroy target_city with a hit from attacker and escalate; ai picks the AI's ranges"""
+        radiation = AI_HIT_RADIATION if ai else PLAYER_HIT_RADIATION
+        self.destroy_city(self.opponent(attacker), target_city, self.rng.randint(*radiation))
+        rise = self.rng.randint(*(AI_HIT_TENSION if ai else PLAYER_HIT_TENSION))
+        self.global_tension += rise
+        if self.events is not None:
+            self.events.strike(self, attacker, target_city, True)
+            self.events.tension(self, rise)
+        self.adjust_defcon()
     
     def adjust_defcon(self):
         """Adjust DEFCON level based on tension"""
-        if self.global_tension >= 90:
-            self.defcon_level = 1
-        elif self.global_tension >= 70:
-            self.defcon_level = 2
-        elif self.global_tension >= 50:
-            self.defcon_level = 3
-        elif self.global_tension >= 30:
-            self.defcon_level = 4
-        else:
-            self.defcon_level = 5
+        before = self.defcon_level
+        self.defcon_level = 5
+        for level, threshold in enumerate(self.rules.defcon_thresholds, 1):
+            if self.global_tension >= threshold:
+                self.defcon_level = level
+                break
+        if self.events is not None and self.defcon_level != before:
+            self.events.defcon(self)
     
     def check_end_conditions(self):
         """Check if simulation should end"""
+        reason = self.end_condition()
+        if reason is None:
+            return False
+            
+        if reason is EndReason.MUTUAL_DESTRUCTION:
+            self.renderer.line("\nMUTUAL ASSURED DESTRUCTION ACHIEVED")
+            self.renderer.line("HUMAN CIVILIZATION TERMINATED")
+        elif reason is EndReason.ELIMINATION:
+            winner = self.winner(reason)
+            loser = "USA" if winner == "USSR" else "USSR"
+            self.renderer.line(f"\n{self.side_names[loser]} ELIMINATED")
+            self.renderer.line(f"{self.side_names[winner]} WINS")
+        elif reason is EndReason.STALEMATE:
+            self.renderer.line("\nALL NUCLEAR WEAPONS EXPENDED")
+            self.renderer.line("STALEMATE ACHIEVED")
+        else:
+            self.renderer.line("\nSIMULATION TIME LIMIT REACHED")
+            
+        self.state = GameState.GAME_OVER
+        if self.events is not None:
+            self.events.end(self, reason)
+        return True
+        
+    def end_condition(self) -> Optional[EndReason]:
+        """Return why the simulation should end, or None to keep playing"""
         # Check for total destruction
-        usa_destroyed = all(city.destroyed for city in self.cities["USA"])
-        ussr_destroyed = all(city.destroyed for city in self.cities["USSR"])
+        usa_destroyed = not self.targets["USA"]
+        ussr_destroyed = not self.targets["USSR"]
         
         if usa_destroyed and ussr_destroyed:
-            print("\nMUTUAL ASSURED DESTRUCTION ACHIEVED")
-            print("HUMAN CIVILIZATION TERMINATED")
-            self.state = GameState.GAME_OVER
-            return True
-        elif usa_destroyed:
-            print(f"\n{Country.USA.value} ELIMINATED")
-            print(f"{Country.USSR.value} WINS")
-            self.state = GameState.GAME_OVER
-            return True
-        elif ussr_destroyed:
-            print(f"\n{Country.USSR.value} ELIMINATED")
-            print(f"{Country.USA.value} WINS")
-            self.state = GameState.GAME_OVER
-            return True
+            return EndReason.MUTUAL_DESTRUCTION
+        elif usa_destroyed or ussr_destroyed:
+            return EndReason.ELIMINATION
         
         # Check for no missiles remaining
-        usa_missiles = sum(base.missiles for base in self.missile_bases["USA"] if base.operational)
-        ussr_missiles = sum(base.missiles for base in self.missile_bases["USSR"] if base.operational)
-        
-        if usa_missiles == 0 and ussr_missiles == 0:
-            print("\nALL NUCLEAR WEAPONS EXPENDED")
-            print("STALEMATE ACHIEVED")
-            self.state = GameState.GAME_OVER
-            return True
+        if self.missiles_remaining("USA") == 0 and self.missiles_remaining("USSR") == 0:
+            return EndReason.STALEMATE
         
         # Check turn limit
-        if self.turn_count >= 20:
-            print("\nSIMULATION TIME LIMIT REACHED")
-            self.state = GameState.GAME_OVER
-            return True
+        if self.turn_count >= self.rules.turn_limit:
+            return EndReason.TIME_LIMIT
         
-        return False
+        return None
+        
+    def winner(self, reason: EndReason) -> Optional[str]:
+        """Return the winning side for a finished game, if there is one"""
+        if reason is EndReason.ELIMINATION:
+            return "USSR" if not self.targets["USA"] else "USA"
+        if reason is EndReason.SURRENDER:
+            return self.ai_country
+        return None
+        
+    def side_casualties(self, country: str) -> int:
+        """Total population of destroyed cities for one side"""
+        return self.casualties[country]
+        
+    def cities_destroyed(self, country: str) -> int:
+        """Number of destroyed cities for one side"""
+        return len(self.destroyed_cities[country])
+        
+    def missiles_remaining(self, country: str) -> int:
+        """Missiles left at one side's operational bases"""
+        return self.missile_totals[country]
+        
+    def snapshot(self) -> GameSnapshot:
+        """Capture the current game state as a compact GameSnapshot"""
+        countries = tuple(self.cities)
+        destroyed, radiation = [], []
+        for country in countries:
+            table = self.cities[country]
+            digits = table.destroyed.translate(_FLAGS_TO_DIGITS)[::-1]
+            destroyed.append(int(digits, 2) if digits else 0)
+            radiation.append(array("i", [table.radiation[i] for i in self.destroyed_positions(country)]).tobytes())
+        return GameSnapshot(
+            countries=countries,
+            destroyed=tuple(destroyed),
+            radiation=tuple(radiation),
+            missiles=tuple(self.missile_bases[country].missiles.tobytes() for country in countries),
+            operational=tuple(bytes(self.missile_bases[country].operational) for country in countries),
+            tension=self.global_tension,
+            defcon=self.defcon_level,
+            turn=self.turn_count,
+            player_country=self.player_country,
+        )
+        
+    def restore(self, snapshot: GameSnapshot):
+        """Replace the current game state with a snapshot of the same world"""
+        self.reset()
+        self.state = GameState.SIMULATION
+        self.global_tension = snapshot.tension
+        self.defcon_level = snapshot.defcon
+        self.turn_count = snapshot.turn
+        self.player_country = snapshot.player_country
+        self.ai_country = self.opponent(snapshot.player_country) if snapshot.player_country else None
+        
+        for country, mask, radiation, missiles, operational in zip(
+                snapshot.countries, snapshot.destroyed, snapshot.radiation,
+                snapshot.missiles, snapshot.operational):
+            table = self.cities[country]
+            digits = format(mask, "b")[::-1].ljust(len(table), "0")
+            table.destroyed[:] = digits.encode("ascii").translate(_DIGITS_TO_FLAGS)
+            levels = array("i")
+            levels.frombytes(radiation)
+            for i, level in zip(self.destroyed_positions(country), levels):
+                city = table[i]
+                table.radiation[i] = level
+                self.casualties[country] += city.population
+                self.destroyed_cities[country].append(city)
+                self.targets[country].discard(city)
+                
+            bases = self.missile_bases[country]
+            bases.missiles = array("q")
+            bases.missiles.frombytes(missiles)
+            bases.operational = bytearray(operational)
+            self.missile_totals[country] = sum(base.missiles for base in bases if base.operational)
+            
+    def fork(self, rng: Optional[random.Random] = None) -> "WOPR":
+        """A new WOPR on the same world, starting from this game's state"""
+        branch = WOPR(rng, self.world, rules=self.rules)
+        branch.restore(self.snapshot())
+        return branch
+        
+    def destroyed_positions(self, country: str) -> List[int]:
+        """Indices of destroyed cities for one side, in city order"""
+        flags = self.cities[country].destroyed
+        positions = []
+        i = flags.find(1)
+        while i >= 0:
+            positions.append(i)
+            i = flags.find(1, i + 1)
+        return positions
+        
+    def result(self, reason: EndReason) -> GameResult:
+        """Summarize the current game as a GameResult"""
+        return GameResult(
+            winner=self.winner(reason),
+            reason=reason,
+            turns=self.turn_count,
+            defcon=self.defcon_level,
+            tension=self.global_tension,
+            casualties={country: self.side_casualties(country) for country in ("USA", "USSR")},
+            cities_destroyed={country: self.cities_destroyed(country) for country in ("USA", "USSR")},
+        )
     
     def game_over(self):
         """Handle game over"""
-        print(f"\n{'='*60}")
-        print("SIMULATION COMPLETE")
-        print(f"{'='*60}")
+        self.renderer.line(f"\n{'='*60}")
+        self.renderer.line("SIMULATION COMPLETE")
+        self.renderer.line(f"{'='*60}")
         
         # Calculate final statistics
-        usa_casualties = sum(city.population for city in self.cities["USA"] if city.destroyed)
-        ussr_casualties = sum(city.population for city in self.cities["USSR"] if city.destroyed)
+        usa_casualties = self.side_casualties("USA")
+        ussr_casualties = self.side_casualties("USSR")
         total_casualties = usa_casualties + ussr_casualties
         
-        print(f"\nFINAL CASUALTY REPORT:")
-        print(f"USA Casualties: {usa_casualties:,}")
-        print(f"USSR Casualties: {ussr_casualties:,}")
-        print(f"Total Casualties: {total_casualties:,}")
+        self.renderer.line(f"\nFINAL CASUALTY REPORT:")
+        self.renderer.line(f"{self.side_label('USA')} Casualties: {usa_casualties:,}")
+        self.renderer.line(f"{self.side_label('USSR')} Casualties: {ussr_casualties:,}")
+        self.renderer.line(f"Total Casualties: {total_casualties:,}")
         
-        usa_cities_destroyed = len([city for city in self.cities["USA"] if city.destroyed])
-        ussr_cities_destroyed = len([city for city in self.cities["USSR"] if city.destroyed])
+        usa_cities_destroyed = self.cities_destroyed("USA")
+        ussr_cities_destroyed = self.cities_destroyed("USSR")
         
-        print(f"\nCITIES DESTROYED:")
-        print(f"USA: {usa_cities_destroyed}/10")
-        print(f"USSR: {ussr_cities_destroyed}/10")
+        self.renderer.line(f"\nCITIES DESTROYED:")
+        self.renderer.line(f"{self.side_label('USA')}: {usa_cities_destroyed}/{len(self.cities['USA'])}")
+        self.renderer.line(f"{self.side_label('USSR')}: {ussr_cities_destroyed}/{len(self.cities['USSR'])}")
         
-        print(f"\nTURNS ELAPSED: {self.turn_count}")
-        print(f"FINAL DEFCON LEVEL: {self.defcon_level}")
+        self.renderer.line(f"\nTURNS ELAPSED: {self.turn_count}")
+        self.renderer.line(f"FINAL DEFCON LEVEL: {self.defcon_level}")
+        
+        self.renderer.update(self)
         
         # The famous ending
-        time.sleep(3)
-        print(f"\n{'='*60}")
+        self.renderer.pause(3)
+        self.renderer.line(f"\n{'='*60}")
         self.slow_type("ANALYSIS COMPLETE.", 0.1)
-        time.sleep(2)
-        print("\n")
+        self.renderer.pause(2)
+        self.renderer.line("\n")
         self.slow_type("THE ONLY WINNING MOVE IS NOT TO PLAY.", 0.1)
-        time.sleep(3)
-        print("\n")
+        self.renderer.pause(3)
+        self.renderer.line("\n")
         self.slow_type("HOW ABOUT A NICE GAME OF CHESS?", 0.1)
-        time.sleep(2)
-        print(f"\n{'='*60}")
+        self.renderer.pause(2)
+        self.renderer.line(f"\n{'='*60}")
         
         return True
     
+    def log_off(self):
+        """Sign off the terminal"""
+        self.renderer.line("\nLOGGING OFF...")
+        self.renderer.line("CONNECTION TERMINATED")
+        
     def run(self):
         """Main game loop"""
         try:
@@ -591,17 +1556,161 @@ class WOPR:
                     break
                 
                 # Ask to play again
-                play_again = input("\nWOULD YOU LIKE TO PLAY ANOTHER GAME? (Y/N): ").strip().upper()
+                play_again = self.renderer.read_line(AGAIN_PROMPT).strip().upper()
                 if play_again != 'Y':
                     break
             
-            print("\nLOGGING OFF...")
-            print("CONNECTION TERMINATED")
+            self.log_off()
             
         except KeyboardInterrupt:
-            print("\n\nEMERGENCY SHUTDOWN")
-            print("CONNECTION TERMINATED")
+            self.renderer.line("\n\nEMERGENCY SHUTDOWN")
+            self.renderer.line("CONNECTION TERMINATED")
+        finally:
+            self.renderer.flush()
+
+# A player policy looks at the game and returns (action, target_city), where
+# action is one of "strike", "salvo", "defend", "negotiate", "surrender" or "exit"
+PlayerPolicy = Callable[[WOPR], Tuple[str, Optional[CityView]]]
+
+# An AI policy returns (action, target_city) with action one of the
+# AI_ACTION_MESSAGES keys; a None target lets WOPR pick one itself
+AIPolicy = Callable[[WOPR], Tuple[str, Optional[CityView]]]
+
+def wopr_policy(wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+    """Play the player side with WOPR's own tension bands"""
+    rules = wopr.rules
+    if wopr.global_tension > rules.high_tension:
+        action = "strike" if wopr.rng.random() < rules.retaliation_chance else "defend"
+    elif wopr.global_tension > rules.medium_tension:
+        action = wopr.rng.choice(["strike", "defend", "negotiate"])
+    else:
+        action = "defend"
+        
+    if action == "strike":
+        return action, wopr.choose_target(wopr.ai_country)
+    return action, None
+
+def hawk_policy(wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+    """Strike the most valuable enemy city every turn"""
+    return "strike", wopr.choose_target(wopr.ai_country)
+
+def dove_policy(wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+    """Negotiate every turn"""
+    return "negotiate", None
+
+def salvo_policy(wopr: WOPR) -> Tuple[str, Optional[CityView]]:
+    """Fire an allocated salvo every turn (see allocation.py)"""
+    return "salvo", None
+
+PLAYER_POLICIES: Dict[str, PlayerPolicy] = {
+    "wopr": wopr_policy,
+    "hawk": hawk_policy,
+    "dove": dove_policy,
+    "salvo": salvo_policy,
+}
+
+def self_play(games: int, player_policy: PlayerPolicy = wopr_policy,
+              player_country: str = "USA", rng: Optional[random.Random] = None,
+              world: Optional[World] = None, ai_policy: Optional[AIPolicy] = None,
+              rules: Optional[Rules] = None, metrics=None) -> List[GameResult]:
+    """Let WOPR play itself headless and return one result per game"""
+    wopr = WOPR(rng, world, rules=rules)
+    wopr.ai_policy = ai_policy
+    if metrics is not None:
+        metrics.attach(wopr)
+    return [wopr.play_headless(player_policy, player_country) for _ in range(games)]
+
+def summarize(results: List[GameResult]) -> Dict[str, int]:
+    """Count game outcomes by winner or end reason"""
+    summary: Dict[str, int] = {}
+    for result in results:
+        key = f"{result.winner} WINS" if result.winner else result.reason.value.upper()
+        summary[key] = summary.get(key, 0) + 1
+    return summary
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="WarGames - Global Thermonuclear War Simulation")
+    parser.add_argument("--selfplay", type=int, metavar="GAMES",
+                        help="let WOPR play itself headless for GAMES games")
+    parser.add_argument("--policy", choices=sorted(PLAYER_POLICIES), default="wopr",
+                        help="policy driving the player side in self-play")
+    parser.add_argument("--side", choices=["USA", "USSR"], default="USA",
+                        help="side played by the policy in self-play")
+    parser.add_argument("--world", metavar="PATH",
+                        help="load cities and bases from a CSV, JSON or binary world file")
+    parser.add_argument("--ai", choices=["wopr", "search", "salvo", "trained"], default="wopr",
+                        help="opponent: the classic tension bands, tree search, allocated salvos "
+                             "or a self-play trained table")
+    parser.add_argument("--ai-budget-ms", type=float, default=50.0,
+                        help="thinking time per move for the search opponent")
+    parser.add_argument("--ai-table", default="wopr-policy.bin", metavar="PATH",
+                        help="policy table for the trained opponent (see training.py)")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="terminal",
+                        help="output backend for interactive play")
+    parser.add_argument("--log", metavar="PATH",
+                        help="record an event log of interactive play (see eventlog.py)")
+    parser.add_argument("--fallout", action="store_true",
+                        help="model drifting fallout in interactive play (see fallout.py)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="time the turn loop and write Prometheus metrics to PATH (see metrics.py)")
+    args = parser.parse_args(argv)
+    
+    world = None
+    if args.world:
+        from world import load_world
+        world = load_world(args.world)
+        
+    ai_policy = None
+    if args.ai == "search":
+        from search import SearchAI
+        ai_policy = SearchAI(budget_ms=args.ai_budget_ms)
+    elif args.ai == "salvo":
+        from allocation import salvo_ai_policy
+        ai_policy = salvo_ai_policy
+    elif args.ai == "trained":
+        from training import PolicyTable
+        ai_policy = PolicyTable.load(args.ai_table)
+        
+    metrics = None
+    if args.metrics:
+        from metrics import Metrics
+        metrics = Metrics()
+        
+    if args.selfplay is None:
+        with RENDERERS[args.renderer]() as renderer:
+            wopr = WOPR(world=world, renderer=renderer)
+            wopr.ai_policy = ai_policy
+            if args.fallout:
+                from fallout import FalloutModel
+                wopr.fallout = FalloutModel(wopr.world)
+            if args.log:
+                from eventlog import EventWriter
+                wopr.events = EventWriter(args.log, wopr.world)
+            if metrics is not None:
+                metrics.attach(wopr)
+            try:
+                wopr.run()
+            finally:
+                if wopr.events is not None:
+                    wopr.events.close()
+                if metrics is not None:
+                    metrics.write_prometheus(args.metrics)
+        return
+
+    start = time.perf_counter()
+    results = self_play(args.selfplay, PLAYER_POLICIES[args.policy], args.side,
+                        world=world, ai_policy=ai_policy, metrics=metrics)
+    elapsed = time.perf_counter() - start
+    if metrics is not None:
+        metrics.write_prometheus(args.metrics)
+    
+    print(f"GAMES PLAYED: {len(results):,}")
+    for outcome, count in sorted(summarize(results).items()):
+        print(f"  {outcome}: {count:,}")
+    print(f"GAMES PER SECOND: {len(results) / elapsed:,.0f}")
 
 if __name__ == "__main__":
-    wopr = WOPR()
-    wopr.run()
+    main()
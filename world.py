@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+WarGames - World Loader
+Loads theatres of cities and missile bases from CSV, JSON or a prebuilt
+binary file that is memory-mapped instead of parsed
+
+Every loader returns a wargames.World. A World is read-only and can be
+passed to any number of WOPR instances; each game copies only its mutable
+state (destroyed flags, radiation, missiles, operational flags).
+
+CSV files have one row per city or base:
+
+    kind,country,name,population,strategic_value,missiles,operational,x,y
+    city,USA,New York,8000000,10,,,0,0
+    base,USA,Malmstrom AFB,,,150,1,0,0
+
+JSON files mirror create_cities and create_missile_bases:
+
+    {"cities": {"USA": [{"name": "New York", "population": 8000000,
+                         "strategic_value": 10, "coordinates": [0, 0]}]},
+     "missile_bases": {"USA": [{"name": "Malmstrom AFB", "missiles": 150}]}}
+"""
+
+import csv
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from wargames import WOPR, City, Country, MissileBase, World, WorldSide
+
+BINARY_MAGIC = b"WOPRWLD1"
+
+# Numeric WorldSide columns and their array typecodes
+CITY_COLUMNS = (("population", "q"), ("strategic_value", "i"), ("city_x", "i"), ("city_y", "i"))
+BASE_COLUMNS = (("base_missiles", "q"), ("base_operational", "B"), ("base_x", "i"), ("base_y", "i"))
+
+def _records_to_world(cities: Dict[str, List[City]], bases: Dict[str, List[MissileBase]]) -> World:
+    """Build a World, making sure every country with bases also has a city list"""
+    for country in bases:
+        cities.setdefault(country, [])
+    return World.from_records(cities, bases)
+
+def _country(name: str):
+    """Country enum member for a side name, or the name itself"""
+    return Country[name] if name in Country.__members__ else name
+
+def load_world_csv(path: str) -> World:
+    """Load cities and bases from a CSV file"""
+    cities: Dict[str, List[City]] = {}
+    bases: Dict[str, List[MissileBase]] = {}
+    with open(path, newline="") as handle:
+        for row in csv.DictReader(handle):
+            kind = row["kind"].strip().lower()
+            country = row["country"].strip()
+            coordinates = (int(row.get("x") or 0), int(row.get("y") or 0))
+            if kind == "city":
+                cities.setdefault(country, []).append(City(
+                    row["name"], int(row["population"]), int(row["strategic_value"]),
+                    coordinates=coordinates))
+            elif kind == "base":
+                operational = (row.get("operational") or "1").strip().lower() not in ("0", "false", "no")
+                bases.setdefault(country, []).append(MissileBase(
+                    row["name"], _country(country), int(row["missiles"]), operational, coordinates))
+            else:
+                raise ValueError(f"unknown row kind {kind!r} in {path}")
+    return _records_to_world(cities, bases)
+
+def load_world_json(path: str) -> World:
+    """Load cities and bases from a JSON file"""
+    with open(path) as handle:
+        return world_from_dict(json.load(handle))
+
+def world_from_dict(data: dict) -> World:
+    """Build a world from decoded JSON (the "cities" and "missile_bases" keys)"""
+    cities = {country: [City(entry["name"], entry["population"], entry["strategic_value"],
+                             coordinates=tuple(entry.get("coordinates", (0, 0))))
+                        for entry in entries]
+              for country, entries in data.get("cities", {}).items()}
+    bases = {country: [MissileBase(entry["name"], _country(country), entry["missiles"],
+                                   entry.get("operational", True),
+                                   tuple(entry.get("coordinates", (0, 0))))
+                       for entry in entries]
+             for country, entries in data.get("missile_bases", {}).items()}
+    return _records_to_world(cities, bases)
+
+class NameColumn(Sequence):
+    """Names stored as one UTF-8 blob plus offsets, decoded on access"""
+    
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self.blob = blob
+        self.offsets = offsets
+        
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+def _pack_names(names: Sequence[str]):
+    """Encode names as a blob and an offsets array"""
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = array("q", [0])
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    return b"".join(encoded), offsets
+
+def save_world_binary(world: World, path: str, meta: Optional[dict] = None):
+    """Write a world in the memory-mappable binary format
+
+    Layout: magic, a little-endian u32 header length, a JSON header giving
+    the offset and length of every column, then the columns themselves,
+    each aligned to 8 bytes. Each side's targeting buckets are stored
+    precomputed, so loading never rebuilds them; `meta` is kept in the
+    header for read_world_binary.
+    """
+    blocks: List[bytes] = []
+    header = {"byteorder": sys.byteorder, "sides": []}
+    if meta is not None:
+        header["meta"] = meta
+    offset = 0
+    
+    def add(data: bytes) -> List[int]:
+        nonlocal offset
+        span = [offset, len(data)]
+        blocks.append(data + bytes(-len(data) % 8))
+        offset += len(blocks[-1])
+        return span
+        
+    for country, side in world.sides.items():
+        entry = {"country": country}
+        for prefix, names in (("city", side.city_names), ("base", side.base_names)):
+            blob, offsets = _pack_names(names)
+            entry[f"{prefix}_names"] = add(blob)
+            entry[f"{prefix}_name_offsets"] = add(offsets.tobytes())
+        for column, typecode in CITY_COLUMNS + BASE_COLUMNS:
+            entry[column] = add(array(typecode, getattr(side, column)).tobytes())
+        buckets, slots, values, intact_tree = side.targeting()
+        offsets, positions, trees = array("q", [0]), array("i"), array("i")
+        for value in values:
+            bucket_positions, tree = buckets[value]
+            offsets.append(offsets[-1] + len(bucket_positions))
+            positions.extend(bucket_positions)
+            trees.extend(tree)
+        entry["target_values"] = add(array("i", values).tobytes())
+        entry["target_offsets"] = add(offsets.tobytes())
+        entry["target_positions"] = add(positions.tobytes())
+        entry["target_trees"] = add(trees.tobytes())
+        entry["target_slots"] = add(array("i", slots).tobytes())
+        entry["intact_tree"] = add(array("i", intact_tree).tobytes())
+        header["sides"].append(entry)
+        
+    encoded = json.dumps(header).encode("utf-8")
+    prefix = len(BINARY_MAGIC) + 4 + len(encoded)
+    padding = bytes(-prefix % 8)
+    with open(path, "wb") as handle:
+        handle.write(BINARY_MAGIC)
+        handle.write(struct.pack("<I", len(encoded) + len(padding)))
+        handle.write(encoded + padding)
+        for block in blocks:
+            handle.write(block)
+
+def read_world_binary(path: str) -> Tuple[World, Optional[dict]]:
+    """Memory-map a binary world; returns it with the meta saved alongside"""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if bytes(view[:len(BINARY_MAGIC)]) != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a WOPR world file")
+    header_length = struct.unpack_from("<I", view, len(BINARY_MAGIC))[0]
+    start = len(BINARY_MAGIC) + 4
+    header = json.loads(bytes(view[start:start + header_length]).rstrip(b"\0 "))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was built on a {header['byteorder']}-endian machine")
+    base = start + header_length
+    
+    def column(span: List[int], typecode: str) -> memoryview:
+        return view[base + span[0]:base + span[0] + span[1]].cast(typecode)
+        
+    def targeting(entry: dict) -> Optional[tuple]:
+        """The side's stored targeting buckets; trees are copied, since games clear them"""
+        if "target_values" not in entry:
+            return None
+        values = column(entry["target_values"], "i")
+        offsets = column(entry["target_offsets"], "q")
+        positions = column(entry["target_positions"], "i")
+        trees = column(entry["target_trees"], "i")
+        buckets = {}
+        for k, value in enumerate(values):
+            start, end = offsets[k], offsets[k + 1]
+            # Bucket k's tree has one more slot than its positions, after k earlier trees
+            buckets[value] = (positions[start:end], array("i", trees[start + k:end + k + 1]))
+        return (buckets, column(entry["target_slots"], "i"), list(values),
+                array("i", column(entry["intact_tree"], "i")))
+        
+    sides = {}
+    for entry in header["sides"]:
+        columns = {name: column(entry[name], typecode)
+                   for name, typecode in CITY_COLUMNS + BASE_COLUMNS}
+        sides[entry["country"]] = WorldSide(
+            entry["country"],
+            NameColumn(column(entry["city_names"], "B"), column(entry["city_name_offsets"], "q")),
+            columns["population"], columns["strategic_value"],
+            columns["city_x"], columns["city_y"],
+            NameColumn(column(entry["base_names"], "B"), column(entry["base_name_offsets"], "q")),
+            columns["base_missiles"], columns["base_operational"],
+            columns["base_x"], columns["base_y"], targeting(entry))
+    return World(sides), header.get("meta")
+
+def load_world_binary(path: str) -> World:
+    """Memory-map a binary world; columns are zero-copy views of the file"""
+    return read_world_binary(path)[0]
+
+def load_world(path: str) -> World:
+    """Load a world, picking the format from the file extension"""
+    if path.endswith(".csv"):
+        return load_world_csv(path)
+    if path.endswith(".json"):
+        return load_world_json(path)
+    return load_world_binary(path)
+
+def main():
+    """Command line entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Inspect and compile WOPR worlds")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="convert a CSV/JSON world to binary")
+    compile_parser.add_argument("source")
+    compile_parser.add_argument("output")
+    info_parser = commands.add_parser("info", help="summarize a world file")
+    info_parser.add_argument("path")
+    commands.add_parser("default", help="write the built-in world as binary").add_argument("output")
+    args = parser.parse_args()
+    
+    if args.command == "compile":
+        save_world_binary(load_world(args.source), args.output)
+    elif args.command == "default":
+        save_world_binary(WOPR().world, args.output)
+    else:
+        world = load_world(args.path)
+        for country, side in world.sides.items():
+            print(f"{country}: {len(side.city_names):,} CITIES, {len(side.base_names):,} BASES, "
+                  f"{sum(side.base_missiles):,} MISSILES")
+
+if __name__ == "__main__":
+    main()